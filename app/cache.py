@@ -0,0 +1,76 @@
+"""Простой потокобезопасный LRU-кэш для результатов запросов.
+
+Используется для хранения уже собранных ответов, ключом которых служит
+водяной знак загрузки (`loaded_at`). Пока водяной знак не меняется,
+повторно ходить в БД за тяжёлыми агрегатами не нужно. Для данных, которые
+водяной знак покрывает не полностью, можно задать срок жизни записи (ttl_sec).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Ограниченный по количеству элементов LRU-кэш с блокировкой.
+
+    При ttl_sec запись считается отсутствующей через ttl_sec секунд после put.
+    """
+
+    def __init__(self, max_size: int = 32, *, ttl_sec: float | None = None) -> None:
+        self._max_size = max(0, max_size)
+        self._ttl_sec = ttl_sec if ttl_sec and ttl_sec > 0 else None
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._expires_at: dict[K, float] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING and self._ttl_sec is not None and monotonic() >= self._expires_at[key]:
+                del self._data[key]
+                del self._expires_at[key]
+                value = _MISSING
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value  # type: ignore[return-value]
+
+    def put(self, key: K, value: V) -> None:
+        if self._max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self._ttl_sec is not None:
+                self._expires_at[key] = monotonic() + self._ttl_sec
+            while len(self._data) > self._max_size:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires_at.pop(evicted, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires_at.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+__all__ = ["LRUCache"]
@@ -1,16 +1,109 @@
 from __future__ import annotations
 
 from functools import cache
+from typing import Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Потолок пула по умолчанию: 40 потоков + параллельный режим дали бы ~43
+# соединения на процесс, а max_connections у Postgres по умолчанию 100
+DEFAULT_DB_POOL_MAX_SIZE = 20
+
 
 class Settings(BaseSettings):
     """Конфигурация приложения с валидацией переменных окружения."""
 
     db_dsn: str | None = Field(None, env="DB_DSN")
     allowed_origins: str = Field("*", env="ALLOWED_ORIGINS")
+    # Размер пула потоков AnyIO, в котором FastAPI выполняет синхронные эндпоинты
+    thread_pool_size: int = Field(40, ge=1, env="THREAD_POOL_SIZE")
+    db_pool_min_size: int = Field(1, ge=0, env="DB_POOL_MIN_SIZE")
+    # Если не задан, пул соединений следует размеру пула потоков, но не больше
+    # DEFAULT_DB_POOL_MAX_SIZE (см. db_pool_size)
+    db_pool_max_size: int | None = Field(None, ge=1, env="DB_POOL_MAX_SIZE")
+    # Число процессов uvicorn (у каждого свой пул) и лимит max_connections
+    # сервера БД: при превышении на старте пишется предупреждение
+    web_concurrency: int = Field(1, ge=1, env="WEB_CONCURRENCY")
+    db_server_max_connections: int | None = Field(None, ge=1, env="DB_SERVER_MAX_CONNECTIONS")
+    db_pool_acquire_timeout: float = Field(10.0, gt=0, env="DB_POOL_ACQUIRE_TIMEOUT")
+    # Соединения, использованные недавно, выдаются без проверочного SELECT 1
+    db_validate_idle_sec: float = Field(30.0, ge=0, env="DB_VALIDATE_IDLE_SEC")
+    # Соединения старше этого возраста закрываются фоновым потоком (0 — без ограничения)
+    db_max_lifetime_sec: float = Field(1800.0, ge=0, env="DB_MAX_LIFETIME_SEC")
+    # Порция строк серверного курсора для больших выборок (0 — клиентский курсор)
+    db_server_cursor_itersize: int = Field(2000, ge=0, env="DB_SERVER_CURSOR_ITERSIZE")
+    # Создание недостающих индексов при старте (см. app/schema.py)
+    schema_bootstrap_enabled: bool = Field(True, env="SCHEMA_BOOTSTRAP_ENABLED")
+    # Пауза между повторными попытками, если при старте БД была недоступна
+    schema_bootstrap_retry_sec: float = Field(60.0, gt=0, env="SCHEMA_BOOTSTRAP_RETRY_SEC")
+    # Фоновое построение индексов CONCURRENTLY: сколько ждать блокировок и
+    # сколько может длиться построение одного индекса (0 — без ограничения)
+    schema_index_lock_timeout_sec: float = Field(10.0, ge=0, env="SCHEMA_INDEX_LOCK_TIMEOUT_SEC")
+    schema_index_statement_timeout_sec: float = Field(1800.0, ge=0, env="SCHEMA_INDEX_STATEMENT_TIMEOUT_SEC")
+    # Очередь визитов: запросы только ставят запись, фоновый поток пишет пачками
+    visit_queue_max_size: int = Field(1000, ge=1, env="VISIT_QUEUE_MAX_SIZE")
+    visit_flush_interval_sec: float = Field(2.0, gt=0, env="VISIT_FLUSH_INTERVAL_SEC")
+    visit_batch_size: int = Field(200, ge=1, env="VISIT_BATCH_SIZE")
+    # Рендеринг PDF: число процессов (0 — в потоке запроса), длина очереди
+    # сверх них и сколько ждать свободного места до ответа 503
+    pdf_workers: int = Field(2, ge=0, env="PDF_WORKERS")
+    pdf_queue_size: int = Field(4, ge=0, env="PDF_QUEUE_SIZE")
+    pdf_queue_timeout_sec: float = Field(5.0, ge=0, env="PDF_QUEUE_TIMEOUT_SEC")
+    pdf_retry_after_sec: int = Field(5, ge=1, env="PDF_RETRY_AFTER_SEC")
+    # Сколько ждать готовый PDF от процесса пула: зависший процесс завершается,
+    # пул пересоздаётся, клиент получает 503
+    pdf_render_timeout_sec: float = Field(60.0, gt=0, env="PDF_RENDER_TIMEOUT_SEC")
+    # Фоновый прогрев движка PDF после старта (иначе он грузится при первом отчёте)
+    pdf_warmup_enabled: bool = Field(True, env="PDF_WARMUP_ENABLED")
+    # Дисковый кэш готовых PDF (по умолчанию во временном каталоге ОС, 0 МБ — выключен)
+    pdf_cache_dir: str | None = Field(None, env="PDF_CACHE_DIR")
+    pdf_cache_max_mb: int = Field(200, ge=0, env="PDF_CACHE_MAX_MB")
+    dashboard_cache_size: int = Field(32, ge=0, env="DASHBOARD_CACHE_SIZE")
+    # Stale-while-revalidate: сколько секунд можно отдавать последний удачный
+    # результат, если БД медленная или недоступна (0 — выключено), и сколько
+    # ждать свежих данных, прежде чем отдать устаревшие
+    dashboard_stale_window_sec: float = Field(3600.0, ge=0, env="DASHBOARD_STALE_WINDOW_SEC")
+    dashboard_fresh_timeout_sec: float = Field(1.0, ge=0, env="DASHBOARD_FRESH_TIMEOUT_SEC")
+    # multi — последовательные запросы, combined — один запрос с CTE и JSON,
+    # parallel — независимые подзапросы одновременно на нескольких соединениях
+    dashboard_query_mode: Literal["multi", "combined", "parallel"] = Field(
+        "multi", env="DASHBOARD_QUERY_MODE"
+    )
+    # Группировка items и расчёт плана ВНР в БД вместо Python (режимы multi и parallel)
+    dashboard_sql_aggregation: bool = Field(False, env="DASHBOARD_SQL_AGGREGATION")
+    # join — код сметы через соединение с skpdi_rates в SQL, memory — справочник
+    # расценок загружается один раз на водяной знак и подставляется в Python
+    dashboard_rates_lookup: Literal["join", "memory"] = Field("join", env="DASHBOARD_RATES_LOOKUP")
+    # Подневная расшифровка работы: search — отдельный запрос ILIKE '%работа%'
+    # на каждый клик, cube — все работы месяца одним запросом с кэшем по
+    # водяному знаку; работа ищется в кубе по точному описанию, а если её там
+    # нет — прежним поиском по подстроке
+    work_breakdown_mode: Literal["search", "cube"] = Field("search", env="WORK_BREAKDOWN_MODE")
+    work_breakdown_cache_size: int = Field(4, ge=0, env="WORK_BREAKDOWN_CACHE_SIZE")
+    # Куб читает skpdi_fact_with_money, а водяной знак берётся из агрегатов:
+    # строки факта, загруженные без его сдвига, подхватываются по истечении срока (0 — без срока)
+    work_breakdown_cache_ttl_sec: float = Field(300.0, ge=0, env="WORK_BREAKDOWN_CACHE_TTL_SEC")
+    # Помесячные итоги диапазона (/dashboard/range) по (начало, конец, водяной знак)
+    dashboard_range_cache_size: int = Field(8, ge=0, env="DASHBOARD_RANGE_CACHE_SIZE")
+    # Общий лимит соединений, которые параллельный режим занимает сверх основного
+    dashboard_parallel_workers: int = Field(3, ge=1, env="DASHBOARD_PARALLEL_WORKERS")
+
+    # Источник данных: postgres — рабочая БД, snapshot — файл SQLite со снимком
+    # тех же таблиц (SNAPSHOT_PATH, выгрузка: python -m app.snapshot export)
+    data_source: Literal["postgres", "snapshot"] = Field("postgres", env="DATA_SOURCE")
+    snapshot_path: str | None = Field(None, env="SNAPSHOT_PATH")
+    # Читать из снимка, если основная БД не выдала соединение (пул исчерпан
+    # или подключение отклонено), пока снимок не старше заданного возраста
+    snapshot_fallback_enabled: bool = Field(False, env="SNAPSHOT_FALLBACK_ENABLED")
+    snapshot_fallback_max_age_sec: float = Field(86400.0, gt=0, env="SNAPSHOT_FALLBACK_MAX_AGE_SEC")
+
+    # Эндпоинт /metrics и замеры времени запросов по маршрутам
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    # Заголовок Server-Timing с замерами этапов запроса и, по желанию, строка
+    # лога с теми же замерами (выключено — накладные расходы практически нулевые)
+    server_timing_enabled: bool = Field(False, env="SERVER_TIMING_ENABLED")
+    server_timing_log: bool = Field(False, env="SERVER_TIMING_LOG")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
@@ -35,6 +128,15 @@ class Settings(BaseSettings):
         
         return value
 
+    @property
+    def db_pool_size(self) -> int:
+        """Максимум соединений в пуле: по соединению на каждый поток обработчиков
+        и на каждый поток параллельного режима дашборда, но не больше
+        DEFAULT_DB_POOL_MAX_SIZE. Остальные потоки ждут в очереди пула."""
+        if self.db_pool_max_size is not None:
+            return self.db_pool_max_size
+        return min(self.thread_pool_size + self.dashboard_parallel_workers, DEFAULT_DB_POOL_MAX_SIZE)
+
     @property
     def allowed_origins_list(self) -> list[str]:
         raw = self.allowed_origins.strip()
@@ -10,6 +10,7 @@ from __future__ import annotations
 API_PREFIX = "/api"
 DASHBOARD_BASE_PATH = f"{API_PREFIX}/dashboard"
 HEALTH_PATH = "/health"
+METRICS_PATH = "/metrics"
 
 # Отображение значений
 EMPTY_DISPLAY_VALUE = "–"
@@ -37,12 +38,16 @@ TABLE_FACT_AGG = "skpdi_fact_agg"
 TABLE_PLAN_AGG = "skpdi_plan_agg"
 TABLE_CONTRACT_TOTAL = "podolsk_mad_2025_contract_amount"
 TABLE_CONTRACT_EXECUTED = "skpdi_fact_monthly_cat_mv"
+TABLE_FACT_WITH_MONEY = "skpdi_fact_with_money"
+TABLE_DASHBOARD_VISITS = "dashboard_visits"
 
 # PDF / отчёты
 LAST_UPDATED_DATETIME_FORMAT = "%d.%m.%Y %H:%M МСК"
 MIN_VALUE_THRESHOLD = 1.0
 PAGE_NUMBER_OFFSET_X_MM = 15
 PAGE_NUMBER_OFFSET_Y_MM = 10
+# Увеличивать при любом изменении вёрстки PDF: входит в ключ дискового кэша
+PDF_RENDERER_VERSION = "1"
 
 SUMMARY_LABEL_PLAN = "План"
 SUMMARY_LABEL_FACT = "Факт"
@@ -0,0 +1,188 @@
+"""Источники данных дашборда: рабочий PostgreSQL и локальный снимок.
+
+Публичные fetch_* из queries.py не берут соединение напрямую, а открывают
+сессию источника через `data_session()`. Сессия отдаёт уже разобранные
+данные (строки items, дневную выручку, отчёты), а кэши, single-flight,
+повторы и stale-while-revalidate остаются над ней и одинаково работают
+для любого источника.
+
+Источники (DATA_SOURCE):
+  postgres — рабочая БД через пул соединений (реализация в queries.py);
+  snapshot — файл SQLite с теми же таблицами (SNAPSHOT_PATH, см. snapshot.py),
+             для воспроизводимых бенчмарков и нагрузочных тестов без БД.
+
+При SNAPSHOT_FALLBACK_ENABLED основной источник, который не смог выдать
+соединение (пул исчерпан или БД отклонила подключение), подменяется снимком,
+если тот не старше SNAPSHOT_FALLBACK_MAX_AGE_SEC. У такой сессии выставлен
+fallback_age_sec: её результаты не кэшируются как подтверждённые, а ответы
+помечаются устаревшими. Ошибки уже начатых запросов
+так не обрабатываются: их повторяет db_retry, а дашборд прикрывает
+stale-while-revalidate.
+"""
+
+from __future__ import annotations
+
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from datetime import date, datetime
+import logging
+from threading import Lock
+from typing import TYPE_CHECKING, Iterator, Protocol, Sequence
+
+from psycopg2 import OperationalError
+
+from .config import get_settings
+from .db import PoolTimeout
+from .metrics import DATA_SOURCE_FALLBACKS
+
+if TYPE_CHECKING:
+    from .models import DailyReportItem, DailyWorkVolume, RangeMonthSummary
+    from .queries import DashboardData, WorkBreakdownBatch, WorkBreakdownCube
+    from .snapshot import SnapshotDataSource
+
+logger = logging.getLogger(__name__)
+
+# Ошибки получения соединения, при которых можно перейти на снимок
+_FALLBACK_ERRORS = (PoolTimeout, OperationalError)
+
+
+class DataSession(Protocol):
+    """Набор чтений, из которых собираются ответы API."""
+
+    source_name: str
+    # Возраст данных в секундах, если сессия — снимок, подменивший основной
+    # источник; None — данные основного источника
+    fallback_age_sec: float | None
+
+    def last_updated(self) -> datetime | None:
+        """Водяной знак последней загрузки (MAX(loaded_at))."""
+
+    def dashboard_data(self, month_start: date, watermark: datetime | None) -> "DashboardData":
+        """Сырые данные дашборда за месяц: items, summary, выручка, контракт."""
+
+    def available_months(self, limit: int) -> list[date]:
+        """Месяцы, за которые есть план или факт, от новых к старым."""
+
+    def available_days(self) -> list[date]:
+        """Дни текущего месяца с фактическими работами, от новых к старым."""
+
+    def daily_report_items(self, target_date: date) -> list["DailyReportItem"]:
+        """Строки отчёта о работах за день."""
+
+    def work_daily_breakdown(self, month_start: date, work_identifier: str) -> list["DailyWorkVolume"]:
+        """Подневные объёмы работ, описание которых содержит work_identifier."""
+
+    def work_breakdown_cube(self, month_start: date) -> "WorkBreakdownCube":
+        """Подневные объёмы и суммы всех работ месяца (см. queries.WorkBreakdownCube)."""
+
+    def work_breakdown_batch(self, months: Sequence[date], works: Sequence[str]) -> "WorkBreakdownBatch":
+        """Подневные объёмы работ с описанием из works за месяцы months (по возрастанию)."""
+
+    def dashboard_range(self, start: date, end: date) -> list["RangeMonthSummary"]:
+        """Помесячные итоги с категориями за месяцы с start по end включительно."""
+
+
+class DataSource(Protocol):
+    name: str
+
+    def session(self) -> AbstractContextManager[DataSession]:
+        """Возвращает контекстный менеджер с сессией чтения."""
+
+
+_source: DataSource | None = None
+_source_lock = Lock()
+_fallback_source: "SnapshotDataSource | None" = None
+
+
+def _create_source(kind: str) -> DataSource:
+    if kind == "snapshot":
+        from .snapshot import SnapshotDataSource
+
+        path = get_settings().snapshot_path
+        if not path:
+            msg = (
+                "Переменная окружения SNAPSHOT_PATH не задана. "
+                "Источник данных snapshot требует путь к файлу снимка."
+            )
+            raise RuntimeError(msg)
+        logger.info("Источник данных: снимок %s", path)
+        return SnapshotDataSource(path)
+
+    from .queries import PostgresDataSource
+
+    return PostgresDataSource()
+
+
+def get_data_source() -> DataSource:
+    """Основной источник данных, выбранный настройкой DATA_SOURCE."""
+
+    global _source
+    if _source is None:
+        with _source_lock:
+            if _source is None:
+                _source = _create_source(get_settings().data_source)
+    return _source
+
+
+def _get_fallback_source() -> "SnapshotDataSource | None":
+    """Снимок для подмены перегруженной БД или None, если подменять нечем."""
+
+    global _fallback_source
+    settings = get_settings()
+    if (
+        not settings.snapshot_fallback_enabled
+        or not settings.snapshot_path
+        or settings.data_source != "postgres"
+    ):
+        return None
+
+    if _fallback_source is None:
+        with _source_lock:
+            if _fallback_source is None:
+                from .snapshot import SnapshotDataSource
+
+                _fallback_source = SnapshotDataSource(settings.snapshot_path)
+
+    try:
+        age_sec = _fallback_source.age_sec()
+    except Exception as exc:  # noqa: BLE001 - нет файла или он повреждён
+        logger.warning("Снимок %s недоступен для подмены БД: %s", settings.snapshot_path, exc)
+        return None
+    if age_sec > settings.snapshot_fallback_max_age_sec:
+        logger.warning(
+            "Снимок %s слишком старый для подмены БД (%.0f с > %.0f с)",
+            settings.snapshot_path,
+            age_sec,
+            settings.snapshot_fallback_max_age_sec,
+        )
+        return None
+    return _fallback_source
+
+
+@contextmanager
+def data_session() -> Iterator[DataSession]:
+    """Сессия основного источника, а если он перегружен — сессия снимка."""
+
+    with ExitStack() as stack:
+        try:
+            session = stack.enter_context(get_data_source().session())
+        except _FALLBACK_ERRORS as exc:
+            fallback = _get_fallback_source()
+            if fallback is None:
+                raise
+            try:
+                session = stack.enter_context(fallback.session())
+            except Exception as fallback_exc:  # noqa: BLE001 - наружу уходит исходная ошибка
+                logger.warning("Не удалось открыть снимок %s: %s", fallback.path, fallback_exc)
+                raise exc from fallback_exc
+            session.fallback_age_sec = fallback.age_sec()
+            DATA_SOURCE_FALLBACKS.inc(type(exc).__name__)
+            logger.warning("Основная БД не выдала соединение (%s), данные читаются из снимка", exc)
+        yield session
+
+
+__all__ = [
+    "DataSession",
+    "DataSource",
+    "data_session",
+    "get_data_source",
+]
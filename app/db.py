@@ -1,18 +1,29 @@
 from __future__ import annotations
 
+from collections import deque
 from contextlib import AbstractContextManager, contextmanager
 import logging
-from threading import Lock
+from threading import Event, Lock, Thread
+from time import monotonic
 from typing import Iterator, Protocol
 
-from psycopg2 import OperationalError, connect
-from psycopg2.extensions import connection as PGConnection
-from psycopg2.pool import ThreadedConnectionPool
+from psycopg2 import InterfaceError, OperationalError, connect
+from psycopg2.extensions import (
+    DECIMAL,
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+    connection as PGConnection,
+    new_type,
+    register_type,
+)
+from psycopg2.pool import PoolError
 
-from .config import get_settings
+from .config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+_REAP_INTERVAL_SEC = 60.0
+
 
 class _ConnectionProvider(Protocol):
     def connection(self) -> AbstractContextManager[PGConnection]:
@@ -22,14 +33,243 @@ class _ConnectionProvider(Protocol):
         """Закрывает ресурсы провайдера."""
 
 
+class PoolTimeout(PoolError):
+    """Свободное соединение не появилось за отведённое время ожидания."""
+
+
+class _Waiter:
+    """Поток, ожидающий соединение в очереди пула."""
+
+    __slots__ = ("event", "conn", "may_connect")
+
+    def __init__(self) -> None:
+        self.event = Event()
+        self.conn: PGConnection | None = None
+        # Вместо готового соединения поток может получить право открыть новое
+        self.may_connect = False
+
+
 class _ThreadSafeConnectionPool:
-    """Обёртка над ThreadedConnectionPool с безопасным контекстом."""
+    """Блокирующий пул соединений с честной очередью ожидания.
+
+    В отличие от ThreadedConnectionPool не бросает PoolError при исчерпании,
+    а ставит поток в FIFO-очередь и ждёт освобождения соединения не дольше
+    acquire_timeout. Освобождённое соединение передаётся первому ожидающему
+    напрямую, поэтому новые запросы не обгоняют тех, кто уже ждёт.
+
+    Проверочный SELECT 1 выполняется только для соединений, простаивавших
+    дольше validate_idle_sec, или после сетевой ошибки на любом соединении
+    пула. Соединения старше max_lifetime закрываются при возврате и фоновым
+    потоком, поэтому на горячем пути нет лишних round trip.
+    """
+
+    def __init__(
+        self,
+        conninfo: str,
+        *,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 10.0,
+        validate_idle_sec: float = 30.0,
+        max_lifetime_sec: float = 1800.0,
+    ) -> None:
+        self._conninfo = conninfo
+        self._max_size = max(1, max_size)
+        self._acquire_timeout = acquire_timeout
+        self._validate_idle_sec = validate_idle_sec
+        self._max_lifetime_sec = max_lifetime_sec
+        self._created_at: dict[PGConnection, float] = {}
+        self._last_used: dict[PGConnection, float] = {}
+        # Соединения, использованные до этого момента, перед выдачей проверяются
+        self._invalidated_at = 0.0
+        self._retired_total = 0
+        self._validations_total = 0
+        self._stop_reaper = Event()
+        self._lock = Lock()
+        self._idle: list[PGConnection] = []
+        self._waiters: deque[_Waiter] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._acquired_total = 0
+        self._waited_total = 0
+        self._timeouts_total = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+        for _ in range(min(min_size, self._max_size)):
+            self._idle.append(self._connect())
+            self._size += 1
+
+        if self._max_lifetime_sec > 0:
+            Thread(target=self._reap_loop, name="db-pool-reaper", daemon=True).start()
+
+    def _connect(self) -> PGConnection:
+        conn = connect(self._conninfo)
+        now = monotonic()
+        self._created_at[conn] = now
+        self._last_used[conn] = now
+        return conn
+
+    def _is_expired(self, conn: PGConnection, now: float) -> bool:
+        if self._max_lifetime_sec <= 0:
+            return False
+        return now - self._created_at.get(conn, now) >= self._max_lifetime_sec
+
+    def _needs_validation(self, conn: PGConnection) -> bool:
+        if conn.closed:
+            return True
+        last_used = self._last_used.get(conn, 0.0)
+        return (
+            last_used <= self._invalidated_at
+            or monotonic() - last_used >= self._validate_idle_sec
+        )
+
+    def _acquire(self) -> PGConnection:
+        waiter: _Waiter | None = None
+        with self._lock:
+            if self._closed:
+                raise PoolError("Пул соединений закрыт")
+            self._acquired_total += 1
+            if not self._waiters and self._idle:
+                self._in_use += 1
+                return self._idle.pop()
+            if not self._waiters and self._size < self._max_size:
+                self._size += 1
+                self._in_use += 1
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            started = monotonic()
+            waiter.event.wait(self._acquire_timeout)
+            with self._lock:
+                waited = monotonic() - started
+                self._waited_total += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+                if waiter.conn is None and not waiter.may_connect and self._closed:
+                    # close() уже снял всех ожидающих с очереди и разбудил их
+                    raise PoolError("Пул соединений закрыт")
+                if waiter.conn is None and not waiter.may_connect:
+                    # Передача не состоялась: снимаемся с очереди
+                    self._waiters.remove(waiter)
+                    self._timeouts_total += 1
+                    msg = (
+                        f"Не удалось получить соединение с БД за {self._acquire_timeout:.1f} с: "
+                        f"все {self._max_size} соединений заняты"
+                    )
+                    raise PoolTimeout(msg)
+            if waiter.conn is not None:
+                return waiter.conn
+
+        try:
+            return self._connect()
+        except Exception:
+            self._discard_slot()
+            raise
+
+    def _release(self, conn: PGConnection, *, close: bool = False) -> None:
+        now = monotonic()
+        if not close and self._is_expired(conn, now):
+            close = True
+            with self._lock:
+                self._retired_total += 1
+        if not close and not conn.closed:
+            close = not self._reset_connection(conn)
+
+        if close or conn.closed or self._closed:
+            self._close_quietly(conn)
+            self._discard_slot()
+            return
+
+        self._last_used[conn] = now
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                waiter.event.set()
+                return
+            self._in_use -= 1
+            self._idle.append(conn)
+
+    def _discard_slot(self) -> None:
+        """Освобождает место закрытого соединения или отдаёт его ожидающему."""
+        with self._lock:
+            if self._waiters and not self._closed:
+                waiter = self._waiters.popleft()
+                waiter.may_connect = True
+                waiter.event.set()
+                return
+            self._size -= 1
+            self._in_use -= 1
+
+    @staticmethod
+    def _reset_connection(conn: PGConnection) -> bool:
+        """Завершает незакрытую транзакцию перед возвратом в пул."""
+        try:
+            status = conn.info.transaction_status
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:  # noqa: BLE001
+            return False
+        return True
+
+    def _close_quietly(self, conn: PGConnection) -> None:
+        self._created_at.pop(conn, None)
+        self._last_used.pop(conn, None)
+        try:
+            conn.close()
+        except Exception:  # noqa: BLE001
+            pass
 
-    def __init__(self, conninfo: str, *, min_size: int = 1, max_size: int = 10) -> None:
-        self._pool = ThreadedConnectionPool(minconn=min_size, maxconn=max_size, dsn=conninfo)
+    def _reap_loop(self) -> None:
+        interval = min(_REAP_INTERVAL_SEC, self._max_lifetime_sec)
+        while not self._stop_reaper.wait(interval):
+            try:
+                self._reap_expired()
+            except Exception as exc:  # noqa: BLE001 - фоновый поток не должен падать
+                logger.warning("Ошибка при закрытии устаревших соединений: %s", exc)
+
+    def _reap_expired(self) -> None:
+        """Закрывает простаивающие соединения старше max_lifetime."""
+        now = monotonic()
+        with self._lock:
+            expired = [conn for conn in self._idle if self._is_expired(conn, now)]
+            if not expired:
+                return
+            self._idle = [conn for conn in self._idle if not self._is_expired(conn, now)]
+            self._size -= len(expired)
+            self._retired_total += len(expired)
+        for conn in expired:
+            self._close_quietly(conn)
+        logger.debug("Закрыто устаревших соединений с БД: %d", len(expired))
+
+    def stats(self) -> dict[str, float]:
+        """Снимок состояния пула: занятость, очередь и время ожидания."""
+        with self._lock:
+            return {
+                "max_size": self._max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "acquired_total": self._acquired_total,
+                "waited_total": self._waited_total,
+                "timeouts_total": self._timeouts_total,
+                "validations_total": self._validations_total,
+                "retired_total": self._retired_total,
+                "wait_time_total_sec": self._wait_time_total,
+                "wait_time_max_sec": self._wait_time_max,
+            }
 
     def _get_valid_connection(self) -> PGConnection:
-        conn = self._pool.getconn()
+        conn = self._acquire()
+        if not self._needs_validation(conn):
+            return conn
         try:
             self._ensure_connection_alive(conn)
         except Exception as exc:
@@ -38,26 +278,34 @@ class _ThreadSafeConnectionPool:
                 exc,
                 exc_info=True,
             )
-            self._pool.putconn(conn, close=True)
+            self._release(conn, close=True)
+            # Если умерло одно соединение, остальные простаивающие тоже под подозрением
+            self._invalidate_idle()
 
             logger.info("Пробую получить новое соединение после ошибки проверки.")
-            conn = self._pool.getconn()
+            conn = self._acquire()
             try:
-                self._ensure_connection_alive(conn)
+                if self._needs_validation(conn):
+                    self._ensure_connection_alive(conn)
             except Exception:
-                self._pool.putconn(conn, close=True)
+                self._release(conn, close=True)
                 raise
         return conn
 
-    @staticmethod
-    def _ensure_connection_alive(conn: PGConnection) -> None:
+    def _invalidate_idle(self) -> None:
+        """Помечает все использованные ранее соединения как требующие проверки."""
+        with self._lock:
+            self._invalidated_at = monotonic()
+
+    def _ensure_connection_alive(self, conn: PGConnection) -> None:
         if conn.closed:
             msg = "Соединение с базой данных закрыто"
             raise OperationalError(msg)
 
-        if not conn.autocommit:
-            conn.rollback()
-
+        # Незавершённые транзакции откатываются при возврате в пул (_release),
+        # поэтому здесь достаточно одного проверочного запроса.
+        with self._lock:
+            self._validations_total += 1
         try:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1")
@@ -87,13 +335,27 @@ class _ThreadSafeConnectionPool:
                 exc,
                 exc_info=False,
             )
-            self._pool.putconn(conn, close=True)
+            if isinstance(exc, (OperationalError, InterfaceError)):
+                # Обрыв сокета: следующие выдачи проверят соединения, а сам запрос
+                # повторит db_retry уже на другом соединении.
+                self._invalidate_idle()
+            self._release(conn, close=True)
             raise
         else:
-            self._pool.putconn(conn)
+            self._release(conn)
 
     def close(self) -> None:
-        self._pool.closeall()
+        """Закрывает простаивающие соединения; ожидающие потоки сразу получают PoolError."""
+        self._stop_reaper.set()
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            waiters, self._waiters = self._waiters, deque()
+        for waiter in waiters:
+            waiter.event.set()
+        for conn in idle:
+            self._close_quietly(conn)
 
 
 class _DirectConnectionProvider:
@@ -118,12 +380,37 @@ _pool: _ConnectionProvider | None = None
 _pool_lock = Lock()
 
 
+def _warn_if_pool_exceeds_server(settings: Settings) -> None:
+    """Предупреждает, если пулы всех процессов могут упереться в max_connections."""
+    if settings.db_server_max_connections is None:
+        return
+    total = settings.web_concurrency * settings.db_pool_size
+    if total > settings.db_server_max_connections:
+        logger.warning(
+            "Пулы соединений %d процессов по %d соединений (%d) превышают max_connections "
+            "сервера БД (%d): уменьшите DB_POOL_MAX_SIZE или WEB_CONCURRENCY.",
+            settings.web_concurrency,
+            settings.db_pool_size,
+            total,
+            settings.db_server_max_connections,
+        )
+
+
 def _create_pool(dsn: str) -> _ConnectionProvider:
+    settings = get_settings()
+    _warn_if_pool_exceeds_server(settings)
     try:
-        return _ThreadSafeConnectionPool(conninfo=dsn)
+        return _ThreadSafeConnectionPool(
+            conninfo=dsn,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_size,
+            acquire_timeout=settings.db_pool_acquire_timeout,
+            validate_idle_sec=settings.db_validate_idle_sec,
+            max_lifetime_sec=settings.db_max_lifetime_sec,
+        )
     except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
         logger.error(
-            "Не удалось создать ThreadedConnectionPool: %s. Переключаюсь на последовательные подключения.",
+            "Не удалось создать пул соединений: %s. Переключаюсь на последовательные подключения.",
             exc,
             exc_info=True,
         )
@@ -159,6 +446,51 @@ def get_connection() -> Iterator[PGConnection]:
         yield conn
 
 
+def _cast_numeric_to_float(value: str | None, _cursor) -> float | None:
+    return None if value is None else float(value)
+
+
+_NUMERIC_AS_FLOAT = new_type(DECIMAL.values, "NUMERIC_AS_FLOAT", _cast_numeric_to_float)
+
+
+def register_numeric_as_float(scope) -> None:
+    """Декодирует NUMERIC сразу во float в пределах переданного курсора.
+
+    По умолчанию psycopg2 создаёт Decimal для каждого значения NUMERIC, а
+    горячие запросы всё равно переводят его во float. Тип регистрируется
+    только на курсоре (или соединении), глобальное поведение не меняется.
+    """
+
+    register_type(_NUMERIC_AS_FLOAT, scope)
+
+
+def streaming_cursor(conn: PGConnection, name: str, *, cursor_factory=None):
+    """Курсор для больших выборок: серверный (именованный) с порциями itersize.
+
+    Клиентский курсор psycopg2 буферизует весь результат в памяти libpq ещё
+    до начала итерации; именованный курсор читает строки порциями по
+    DB_SERVER_CURSOR_ITERSIZE, и пиковая память не растёт с числом строк.
+    При itersize=0 возвращается обычный клиентский курсор. Имя должно быть
+    уникальным среди одновременно открытых курсоров соединения.
+    """
+
+    itersize = get_settings().db_server_cursor_itersize
+    if itersize <= 0:
+        return conn.cursor(cursor_factory=cursor_factory)
+    cur = conn.cursor(name=name, cursor_factory=cursor_factory)
+    cur.itersize = itersize
+    return cur
+
+
+def get_pool_stats() -> dict[str, float]:
+    """Возвращает статистику пула соединений или пустой словарь, если пула нет."""
+
+    pool = _pool
+    if isinstance(pool, _ThreadSafeConnectionPool):
+        return pool.stats()
+    return {}
+
+
 def close_pool() -> None:
     global _pool
     if _pool is not None:
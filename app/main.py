@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
+import json
+import logging
 from pathlib import Path
+from time import perf_counter
 
+from anyio import to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
-from .constants import API_PREFIX, HEALTH_PATH
+from .constants import API_PREFIX, HEALTH_PATH, METRICS_PATH
 from .db import close_pool
+from .metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, PROMETHEUS_CONTENT_TYPE, render_metrics
+from .pdf_renderer import shutdown_pdf_executor, warm_up_pdf_engine
+from .queries import shutdown_query_executor
 from .routers import dashboard
+from .schema import bootstrap_schema
+from .timing import format_server_timing, start_request_timing, summarize
+from .visit_logger import stop_visit_logger
 
 NO_CACHE_HEADERS = {
     "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -20,16 +30,75 @@ NO_CACHE_HEADERS = {
 }
 
 
+timing_logger = logging.getLogger("app.server_timing")
+
+
 def _apply_no_cache(response):
     response.headers.update(NO_CACHE_HEADERS)
 
 
+def _route_label(request: Request) -> str:
+    """Шаблон маршрута для меток метрик (/api/dashboard, а не конкретный URL).
+
+    Берётся из совпавшего маршрута (path_format), поэтому не зависит от
+    значений параметров пути. У маршрутов подключённого роутера path_format
+    задан без префикса, он восстанавливается по фактическому пути. Всё, что
+    обслуживают смонтированные приложения (статика фронтенда), сводится к
+    шаблону монтирования, а несовпавшие пути — к метке unmatched: иначе число
+    рядов метрики росло бы с каждым новым URL.
+    """
+
+    route = request.scope.get("route")
+    if route is None:
+        # Mount не записывает route, но подставляет своё приложение в endpoint
+        if request.scope.get("endpoint") is not None:
+            return f"{request.scope.get('root_path', '')}/*"
+        return "unmatched"
+    path_format = getattr(route, "path_format", None)
+    path_regex = getattr(route, "path_regex", None)
+    if path_format is None or path_regex is None:
+        return "unmatched"
+    path = request.scope["path"]
+    for index, char in enumerate(path):
+        if char == "/" and path_regex.match(path[index:]):
+            return f"{path[:index]}{path_format}"
+    return path_format
+
+
+def _log_server_timing(request: Request, status_code: int, spans, total_sec: float) -> None:
+    timing_logger.info(
+        "server-timing %s",
+        json.dumps(
+            {
+                "method": request.method,
+                "path": request.url.path,
+                "status": status_code,
+                "total_ms": round(total_sec * 1000, 1),
+                "spans_ms": {name: round(duration_ms, 1) for name, duration_ms, _ in summarize(spans)},
+            },
+            ensure_ascii=False,
+        ),
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление lifecycle приложения: инициализация и чистка ресурсов."""
     # Startup: подготовка при запуске приложения
+    # Пул соединений рассчитан на размер пула потоков с потолком (см. Settings.db_pool_size)
+    to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+    # Идемпотентный DDL выполняется один раз до приёма запросов, а не в обработчиках;
+    # долгие индексы CONCURRENTLY достраиваются в фоне уже после старта
+    if settings.schema_bootstrap_enabled and settings.db_dsn:
+        await to_thread.run_sync(bootstrap_schema)
+    # Движок PDF (reportlab, шрифты) грузится в фоне и не задерживает первый запрос
+    if settings.pdf_warmup_enabled:
+        warm_up_pdf_engine()
     yield
     # Shutdown: очистка при завершении приложения
+    stop_visit_logger()
+    shutdown_pdf_executor()
+    shutdown_query_executor()
     close_pool()
 
 
@@ -51,6 +120,9 @@ def create_app() -> FastAPI:
         allow_credentials=not allow_all_origins,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Фронтенд с другого домена должен видеть ETag для условных запросов
+        # и признак устаревших данных с их возрастом
+        expose_headers=["ETag", "X-Data-Stale", "Age", "Server-Timing"],
     )
 
     @app.middleware("http")
@@ -65,12 +137,41 @@ def create_app() -> FastAPI:
 
         return response
 
+    if settings.metrics_enabled:
+        @app.middleware("http")
+        async def collect_request_metrics(request: Request, call_next):
+            started = perf_counter()
+            response = await call_next(request)
+            route = _route_label(request)
+            HTTP_REQUEST_DURATION.observe(perf_counter() - started, request.method, route)
+            HTTP_REQUESTS.inc(request.method, route, str(response.status_code))
+            return response
+
+    if settings.server_timing_enabled:
+        # Регистрируется последним, то есть внешним: total включает остальные middleware
+        @app.middleware("http")
+        async def server_timing(request: Request, call_next):
+            spans = start_request_timing()
+            started = perf_counter()
+            response = await call_next(request)
+            total_sec = perf_counter() - started
+            response.headers["Server-Timing"] = format_server_timing(spans, total_sec)
+            if settings.server_timing_log:
+                _log_server_timing(request, response.status_code, spans, total_sec)
+            return response
+
     app.include_router(dashboard.router, prefix=API_PREFIX)
 
     @app.get(HEALTH_PATH)
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    if settings.metrics_enabled:
+        @app.get(METRICS_PATH, include_in_schema=False)
+        def metrics() -> Response:
+            # Только накопленные в памяти значения, без обращений к БД
+            return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
     return app
 
 
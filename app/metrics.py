@@ -0,0 +1,304 @@
+"""Метрики приложения в текстовом формате Prometheus.
+
+Собственный минимальный реестр без внешних зависимостей. Счётчики и
+гистограммы обновляются в горячем пути под собственной короткой блокировкой
+каждой метрики (общей блокировки нет). Состояние пула соединений, кэшей,
+очереди визитов и single-flight не дублируется: оно считывается из уже
+существующих счётчиков в момент запроса /metrics, без обращений к БД.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import logging
+from threading import Lock
+from typing import Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PDF_RENDER_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in labels.items())
+    return f"{{{inner}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _labels(self, values: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонный счётчик с метками."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, self._labels(label_values), value
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: [счётчики по корзинам (+Inf последней), сумма]
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = ([0] * (len(self._buckets) + 1), [0.0])
+                self._values[label_values] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items()]
+        for label_values, (counts, total) in values:
+            labels = self._labels(label_values)
+            cumulative = 0
+            for bound, count in zip((*self._buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CollectedMetric:
+    """Метрика, значения которой вычисляются при каждом запросе /metrics."""
+
+    def __init__(self, name: str, kind: str, documentation: str) -> None:
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.values: list[tuple[dict[str, str], float]] = []
+
+    def add(self, value: float, **labels: str) -> "CollectedMetric":
+        self.values.append((labels, float(value)))
+        return self
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self.values:
+            yield self.name, labels, value
+
+
+Collector = Callable[[], Iterable[CollectedMetric]]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics: list[_Metric | CollectedMetric] = list(self._metrics)
+        for collector in self._collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as exc:  # noqa: BLE001 - сбой одного источника не ломает выдачу
+                logger.warning("Не удалось собрать метрики %s: %s", collector.__name__, exc, exc_info=True)
+
+        lines: list[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "mad_http_request_duration_seconds",
+    "Время обработки HTTP-запроса по шаблону маршрута.",
+    ("method", "route"),
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "mad_http_requests_total",
+    "Число HTTP-запросов по шаблону маршрута и коду ответа.",
+    ("method", "route", "status"),
+)
+PDF_RENDER_DURATION = REGISTRY.histogram(
+    "mad_pdf_render_duration_seconds",
+    "Время построения PDF (без ожидания очереди): process — в пуле процессов, inline — в потоке запроса.",
+    ("mode",),
+    PDF_RENDER_BUCKETS,
+)
+DB_RETRY_ATTEMPTS = REGISTRY.counter(
+    "mad_db_retry_attempts_total",
+    "Повторные попытки операций с БД (db_retry).",
+    ("operation",),
+)
+DB_RETRY_EXHAUSTED = REGISTRY.counter(
+    "mad_db_retry_exhausted_total",
+    "Операции с БД, завершившиеся ошибкой после всех повторов.",
+    ("operation",),
+)
+DATA_SOURCE_FALLBACKS = REGISTRY.counter(
+    "mad_data_source_fallback_total",
+    "Сессии, открытые на снимке вместо основной БД, по причине отказа.",
+    ("reason",),
+)
+
+
+def _collect_runtime_stats() -> Iterable[CollectedMetric]:
+    """Считывает уже накопленную статистику компонентов (без обращений к БД)."""
+
+    # Импорт здесь: модули приложения сами пишут в метрики этого модуля
+    from .db import get_pool_stats
+    from .pdf_cache import get_pdf_cache
+    from .queries import cache_stats
+    from .singleflight import get_singleflight_stats
+    from .visit_logger import get_visit_queue_stats
+
+    pool = get_pool_stats()
+    if pool:
+        yield (
+            CollectedMetric("mad_db_pool_connections", "gauge", "Соединения пула БД по состоянию.")
+            .add(pool["in_use"], state="in_use")
+            .add(pool["idle"], state="idle")
+        )
+        yield CollectedMetric("mad_db_pool_size", "gauge", "Открытые соединения пула БД.").add(pool["size"])
+        yield CollectedMetric("mad_db_pool_max_size", "gauge", "Максимум соединений пула БД.").add(pool["max_size"])
+        yield CollectedMetric("mad_db_pool_waiting", "gauge", "Потоки, ожидающие соединение.").add(pool["waiting"])
+        yield CollectedMetric(
+            "mad_db_pool_acquired_total", "counter", "Выданные пулом соединения."
+        ).add(pool["acquired_total"])
+        yield CollectedMetric(
+            "mad_db_pool_waited_total", "counter", "Выдачи соединения, которым пришлось ждать."
+        ).add(pool["waited_total"])
+        yield CollectedMetric(
+            "mad_db_pool_timeouts_total", "counter", "Отказы из-за таймаута ожидания соединения."
+        ).add(pool["timeouts_total"])
+        yield CollectedMetric(
+            "mad_db_pool_wait_seconds_total", "counter", "Суммарное время ожидания соединений."
+        ).add(pool["wait_time_total_sec"])
+
+    pdf_cache = get_pdf_cache()
+    caches = {**cache_stats(), "pdf_disk": (pdf_cache.hits, pdf_cache.misses)}
+    hits = CollectedMetric("mad_cache_hits_total", "counter", "Попадания в кэши приложения.")
+    misses = CollectedMetric("mad_cache_misses_total", "counter", "Промахи кэшей приложения.")
+    for name, (cache_hits, cache_misses) in caches.items():
+        hits.add(cache_hits, cache=name)
+        misses.add(cache_misses, cache=name)
+    yield hits
+    yield misses
+
+    visits = get_visit_queue_stats()
+    yield CollectedMetric("mad_visit_queue_depth", "gauge", "Визиты в очереди на запись.").add(visits["depth"])
+    yield CollectedMetric(
+        "mad_visit_dropped_total", "counter", "Визиты, отброшенные из-за переполнения очереди или повторной ошибки записи."
+    ).add(visits["dropped_total"])
+    yield CollectedMetric("mad_visit_written_total", "counter", "Записанные в БД визиты.").add(
+        visits["written_total"]
+    )
+
+    executed = CollectedMetric("mad_singleflight_executed_total", "counter", "Выполненные вызовы single-flight.")
+    coalesced = CollectedMetric(
+        "mad_singleflight_coalesced_total", "counter", "Вызовы, дождавшиеся чужого результата."
+    )
+    for group, stats in get_singleflight_stats().items():
+        executed.add(stats["executed_total"], group=group)
+        coalesced.add(stats["coalesced_total"], group=group)
+    yield executed
+    yield coalesced
+
+
+REGISTRY.register_collector(_collect_runtime_stats)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+__all__ = [
+    "Counter",
+    "DATA_SOURCE_FALLBACKS",
+    "DB_RETRY_ATTEMPTS",
+    "DB_RETRY_EXHAUSTED",
+    "HTTP_REQUESTS",
+    "HTTP_REQUEST_DURATION",
+    "Histogram",
+    "MetricsRegistry",
+    "PDF_RENDER_DURATION",
+    "PROMETHEUS_CONTENT_TYPE",
+    "REGISTRY",
+    "render_metrics",
+]
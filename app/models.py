@@ -80,3 +80,28 @@ class DashboardResponse(BaseModel):
     summary: DashboardSummary | None
     items: list[DashboardItem]
     has_data: bool
+
+
+class RangeCategoryTotal(BaseModel):
+    category: str
+    planned_amount: float
+    fact_amount: float
+    delta_amount: float
+    completion_pct: float | None = None
+
+
+class RangeMonthSummary(BaseModel):
+    month: date
+    planned_amount: float
+    fact_amount: float
+    delta_amount: float
+    completion_pct: float | None = None
+    has_data: bool
+    categories: list[RangeCategoryTotal] | None = None
+
+
+class DashboardRangeResponse(BaseModel):
+    start: date
+    end: date
+    last_updated: datetime | None
+    months: list[RangeMonthSummary]
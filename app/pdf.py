@@ -41,12 +41,12 @@ from .constants import (
 )
 from .font_storage import ensure_embedded_fonts
 from .models import DashboardItem, DashboardSummary
+from .timing import span
 from .utils import format_money, format_percent, normalize_string
 
 LOGGER = logging.getLogger(__name__)
 
 FONT_DIR = Path(__file__).resolve().parent / "fonts"
-ensure_embedded_fonts(FONT_DIR)
 BODY_FONT = "DejaVuSans"
 BODY_FONT_BOLD = "DejaVuSans-Bold"
 DEFAULT_FONT = "Helvetica"
@@ -115,6 +115,8 @@ def _resolve_font_path(file_names: Sequence[str]) -> Path | None:
 
 
 def _register_fonts() -> dict[str, str]:
+    # Встроенные шрифты распаковываются только здесь, при первой подготовке PDF
+    ensure_embedded_fonts(FONT_DIR)
     resolved: dict[str, str] = {}
     registered = set(pdfmetrics.getRegisteredFontNames())
     for font_name, file_candidates in FONT_ALTERNATIVES.items():
@@ -510,18 +512,22 @@ def build_dashboard_pdf(
         topMargin=18 * mm,
         bottomMargin=18 * mm,
     )
-    story: list = []
-    story.append(Paragraph("Сводный отчёт по работам Подольск", TITLE_STYLE))
-    story.append(Paragraph(f"Месяц: <b>{_format_month(month)}</b>", META_STYLE))
-    story.append(Paragraph(f"Данные обновлены: {_format_last_updated(last_updated)}", META_STYLE))
-    story.append(Paragraph("Факт содержит только заявки в статусе «Рассмотрено».", META_STYLE))
-    story.append(Spacer(1, 6))
-    story.append(_build_summary_table(summary, doc.width))
-    story.append(Spacer(1, 8))
-    groups = _group_items(items)
-    if not groups:
-        story.append(Paragraph("Нет данных по выбранному месяцу.", META_STYLE))
-    else:
-        story.append(_build_items_table(groups, doc.width))
-    doc.build(story, canvasmaker=NumberedCanvas)
+    # Замеры попадают в Server-Timing только при рендере в потоке запроса
+    # (PDF_WORKERS=0): в процессе пула контекста запроса нет
+    with span("pdf_layout"):
+        story: list = []
+        story.append(Paragraph("Сводный отчёт по работам Подольск", TITLE_STYLE))
+        story.append(Paragraph(f"Месяц: <b>{_format_month(month)}</b>", META_STYLE))
+        story.append(Paragraph(f"Данные обновлены: {_format_last_updated(last_updated)}", META_STYLE))
+        story.append(Paragraph("Факт содержит только заявки в статусе «Рассмотрено».", META_STYLE))
+        story.append(Spacer(1, 6))
+        story.append(_build_summary_table(summary, doc.width))
+        story.append(Spacer(1, 8))
+        groups = _group_items(items)
+        if not groups:
+            story.append(Paragraph("Нет данных по выбранному месяцу.", META_STYLE))
+        else:
+            story.append(_build_items_table(groups, doc.width))
+    with span("pdf_build"):
+        doc.build(story, canvasmaker=NumberedCanvas)
     return buffer.getvalue()
@@ -0,0 +1,131 @@
+"""Дисковый кэш готовых PDF-отчётов.
+
+Ключ — хэш от (месяц, водяной знак loaded_at, версия рендерера), поэтому
+закрытые месяцы после первой выгрузки отдаются чтением файла, а любая новая
+загрузка данных или изменение вёрстки отчёта автоматически дают новый ключ.
+Запись атомарная (временный файл + os.replace), размер каталога ограничен:
+при переполнении удаляются давно не использованные файлы. Поэтому get отдаёт
+содержимое файла, а не путь: файл может быть вытеснен сразу после проверки.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+import hashlib
+import logging
+import os
+from pathlib import Path
+import tempfile
+from threading import Lock
+
+from .config import get_settings
+from .constants import PDF_RENDERER_VERSION
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".pdf"
+
+
+class PdfDiskCache:
+    """Кэш PDF-файлов в каталоге с LRU-вытеснением по времени доступа (mtime)."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._evict_lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @staticmethod
+    def make_key(month: date, last_updated: datetime | None) -> str:
+        watermark = last_updated.isoformat() if last_updated else "none"
+        raw = f"{month.isoformat()}|{watermark}|{PDF_RENDERER_VERSION}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}{_SUFFIX}"
+
+    def get(self, key: str) -> bytes | None:
+        """Возвращает содержимое готового файла или None. Обновляет время доступа.
+
+        Файл, вытесненный другим потоком между проверкой и чтением, считается
+        промахом.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            os.utime(path)
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> Path | None:
+        """Атомарно сохраняет PDF и при необходимости вытесняет старые файлы."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self._directory, prefix=".tmp-", suffix=_SUFFIX)
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    tmp.write(data)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            logger.warning("Не удалось сохранить PDF в кэш %s: %s", self._directory, exc)
+            return None
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        with self._evict_lock:
+            entries: list[tuple[float, int, Path]] = []
+            total = 0
+            for path in self._directory.glob(f"*{_SUFFIX}"):
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self._max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= self._max_bytes:
+                    break
+
+
+def _default_cache_dir() -> Path:
+    return Path(tempfile.gettempdir()) / "mad-podolsk-pdf"
+
+
+_cache: PdfDiskCache | None = None
+
+
+def get_pdf_cache() -> PdfDiskCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        directory = Path(settings.pdf_cache_dir) if settings.pdf_cache_dir else _default_cache_dir()
+        _cache = PdfDiskCache(directory, settings.pdf_cache_max_mb * 1024 * 1024)
+    return _cache
+
+
+__all__ = ["PdfDiskCache", "get_pdf_cache"]
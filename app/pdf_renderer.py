@@ -0,0 +1,354 @@
+"""Рендеринг PDF в отдельном пуле процессов.
+
+reportlab — чистая CPU-работа под GIL: рендер в потоке запроса тормозит
+JSON-эндпоинты того же воркера. Поэтому отчёты строятся в multiprocessing.Pool,
+где шрифты регистрируются один раз при старте процесса.
+
+Модуль `.pdf` (reportlab, регистрация шрифтов, стили) импортируется лениво —
+при первом рендере или в фоновом прогреве (warm_up_pdf_engine), а не при
+импорте приложения: иначе он задерживает старт воркера и первый /health.
+
+Число одновременно принятых задач ограничено (рендер + очередь), а в пул
+одновременно передаётся не больше pdf_workers задач, остальные ждут здесь.
+Если место не освободилось за pdf_queue_timeout_sec, бросается
+PdfRenderBusyError — роутер превращает её в 503 с заголовком Retry-After.
+Так же завершается рендер, не уложившийся в pdf_render_timeout_sec с момента,
+когда процесс взял задачу (PdfRenderTimeoutError), и рендер, процесс которого
+аварийно завершился (PdfRenderCrashedError). Зависший процесс останавливается
+один: multiprocessing.Pool сам заменяет выбывший процесс, а рендеры в
+остальных процессах продолжаются.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+import logging
+import multiprocessing
+from multiprocessing.pool import Pool
+import os
+from queue import Empty, Queue
+import signal
+from threading import BoundedSemaphore, Lock, Thread
+from time import monotonic, perf_counter
+from typing import Any, Callable, Sequence
+
+from .config import get_settings
+from .metrics import PDF_RENDER_DURATION
+from .models import DashboardItem, DashboardSummary
+from .singleflight import singleflight
+from .timing import span
+
+logger = logging.getLogger(__name__)
+
+# Как часто ожидающий поток проверяет, взята ли задача и жив ли её процесс
+_WORKER_CHECK_INTERVAL_SEC = 0.5
+
+
+class PdfRenderBusyError(RuntimeError):
+    """Очередь рендеринга PDF заполнена."""
+
+    def __init__(self, retry_after_sec: int) -> None:
+        super().__init__("Очередь формирования PDF заполнена, повторите позже")
+        self.retry_after_sec = retry_after_sec
+
+
+class PdfRenderTimeoutError(PdfRenderBusyError):
+    """Процесс пула не успел построить PDF за pdf_render_timeout_sec."""
+
+    def __init__(self, retry_after_sec: int) -> None:
+        super().__init__(retry_after_sec)
+        self.args = ("Формирование PDF заняло слишком много времени, повторите позже",)
+
+
+class PdfRenderCrashedError(PdfRenderBusyError):
+    """Процесс пула аварийно завершился во время рендера."""
+
+    def __init__(self, retry_after_sec: int) -> None:
+        super().__init__(retry_after_sec)
+        self.args = ("Формирование PDF прервалось, повторите позже",)
+
+
+class _RenderPool:
+    """Пул процессов и общий с ними массив pid по номерам мест.
+
+    Место (0..workers-1) занимает одна задача: процесс пишет в него свой pid,
+    когда берёт задачу, и обнуляет по завершении. Так известно, когда задача
+    началась и какой процесс остановить, если она зависла.
+    """
+
+    def __init__(self, workers: int) -> None:
+        # spawn: в родительском процессе уже работают потоки (пул БД,
+        # очередь визитов), fork их состояние копировать не должен
+        context = multiprocessing.get_context("spawn")
+        self.task_pids = context.RawArray("i", workers)
+        self.pool: Pool = context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self.task_pids,),
+        )
+        self.free_slots: Queue[int] = Queue()
+        for slot in range(workers):
+            self.free_slots.put(slot)
+
+
+_render_pool: _RenderPool | None = None
+_render_pool_lock = Lock()
+_slots: BoundedSemaphore | None = None
+
+# В процессе пула: массив pid, полученный от родителя при старте процесса
+_worker_task_pids: Any = None
+
+
+def _init_worker(task_pids: Any = None) -> None:
+    """Инициализация процесса пула: импорт модуля регистрирует шрифты."""
+
+    global _worker_task_pids
+    _worker_task_pids = task_pids
+    from . import pdf  # noqa: F401
+
+
+def _build_pdf(
+    month: date,
+    last_updated: datetime | None,
+    items: Sequence[DashboardItem],
+    summary: DashboardSummary | None,
+) -> bytes:
+    """Точка входа рендера: импортирует движок PDF только при первом вызове.
+
+    Функция модульного уровня, поэтому передаётся в пул процессов по имени.
+    """
+
+    from .pdf import build_dashboard_pdf
+
+    return build_dashboard_pdf(month, last_updated, items, summary)
+
+
+def _run_in_slot(slot: int, func: Callable[..., bytes], args: tuple[Any, ...]) -> bytes:
+    """Выполняется в процессе пула: отмечает место pid процесса на время задачи."""
+
+    _worker_task_pids[slot] = os.getpid()
+    try:
+        return func(*args)
+    finally:
+        _worker_task_pids[slot] = 0
+
+
+def _get_slots() -> BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _render_pool_lock:
+            if _slots is None:
+                settings = get_settings()
+                _slots = BoundedSemaphore(max(1, settings.pdf_workers) + settings.pdf_queue_size)
+    return _slots
+
+
+def _get_render_pool() -> _RenderPool | None:
+    global _render_pool
+    workers = get_settings().pdf_workers
+    if workers <= 0:
+        return None
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = _RenderPool(workers)
+    return _render_pool
+
+
+def _reset_render_pool(broken: _RenderPool) -> None:
+    """Останавливает все процессы пула; следующий отчёт создаст новый."""
+
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is broken:
+            _render_pool = None
+    broken.pool.terminate()
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _stop_worker(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        # Процесс уже завершился сам
+        pass
+
+
+def _render_in_pool(
+    render_pool: _RenderPool,
+    slot: int,
+    func: Callable[..., bytes],
+    args: tuple[Any, ...],
+) -> bytes:
+    """Выполняет func(*args) в пуле и ждёт результат с учётом таймаутов.
+
+    pdf_render_timeout_sec отсчитывается с момента, когда процесс взял
+    задачу. Если задача не взята за pdf_queue_timeout_sec (пул не смог
+    поднять процессы), пул пересоздаётся целиком.
+    """
+
+    settings = get_settings()
+    task_pids = render_pool.task_pids
+    task_pids[slot] = 0
+    result = render_pool.pool.apply_async(_run_in_slot, (slot, func, args))
+    pickup_deadline = monotonic() + max(settings.pdf_queue_timeout_sec, _WORKER_CHECK_INTERVAL_SEC)
+    render_deadline: float | None = None
+    pid = 0
+    while not result.ready():
+        now = monotonic()
+        if not pid:
+            pid = task_pids[slot]
+            if pid:
+                render_deadline = now + settings.pdf_render_timeout_sec
+        if render_deadline is None:
+            if now >= pickup_deadline:
+                logger.error(
+                    "Пул процессов PDF не взял задачу за %.0f с. Пересоздаю пул.",
+                    settings.pdf_queue_timeout_sec,
+                )
+                _reset_render_pool(render_pool)
+                raise PdfRenderBusyError(settings.pdf_retry_after_sec)
+            result.wait(min(pickup_deadline - now, _WORKER_CHECK_INTERVAL_SEC))
+            continue
+        if not _is_process_alive(pid):
+            if result.ready():
+                break
+            logger.error("Процесс PDF %s аварийно завершился. Пул заменит его новым.", pid)
+            task_pids[slot] = 0
+            raise PdfRenderCrashedError(settings.pdf_retry_after_sec)
+        if now >= render_deadline:
+            if result.ready():
+                break
+            logger.error(
+                "PDF не построен за %.0f с. Останавливаю процесс %s, пул заменит его новым.",
+                settings.pdf_render_timeout_sec,
+                pid,
+            )
+            _stop_worker(pid)
+            task_pids[slot] = 0
+            raise PdfRenderTimeoutError(settings.pdf_retry_after_sec)
+        result.wait(min(render_deadline - now, _WORKER_CHECK_INTERVAL_SEC))
+    return result.get()
+
+
+@singleflight(
+    key=lambda month, last_updated, *_args, **_kwargs: (month, last_updated),
+    label="render_dashboard_pdf",
+)
+def render_dashboard_pdf(
+    month: date,
+    last_updated: datetime | None,
+    items: Sequence[DashboardItem],
+    summary: DashboardSummary | None,
+) -> bytes:
+    """Строит PDF дашборда в пуле процессов с ограничением очереди.
+
+    При pdf_workers=0 рендерит в текущем потоке (ограничение очереди
+    сохраняется, ограничения по времени нет). В пул одновременно уходит не
+    больше pdf_workers задач, поэтому время в очереди не расходует
+    pdf_render_timeout_sec. Если процесс не ответил за это время, он один
+    останавливается и бросается PdfRenderTimeoutError; если процесс аварийно
+    завершился — PdfRenderCrashedError. Рендер в потоке запроса в этих
+    случаях не выполняется. Одновременные запросы одного отчёта (месяц и
+    водяной знак) ждут общий результат и не занимают очередь.
+    """
+
+    settings = get_settings()
+    queue_deadline = monotonic() + settings.pdf_queue_timeout_sec
+    slots = _get_slots()
+    with span("pdf_queue_wait"):
+        acquired = slots.acquire(timeout=settings.pdf_queue_timeout_sec)
+    if not acquired:
+        raise PdfRenderBusyError(settings.pdf_retry_after_sec)
+    try:
+        render_pool = _get_render_pool()
+        if render_pool is None:
+            return _build_pdf_inline(month, last_updated, items, summary)
+        try:
+            with span("pdf_worker_wait"):
+                slot = render_pool.free_slots.get(timeout=max(0.0, queue_deadline - monotonic()))
+        except Empty as exc:
+            raise PdfRenderBusyError(settings.pdf_retry_after_sec) from exc
+        try:
+            started = perf_counter()
+            with span("pdf_render"):
+                pdf_bytes = _render_in_pool(
+                    render_pool, slot, _build_pdf, (month, last_updated, list(items), summary)
+                )
+            PDF_RENDER_DURATION.observe(perf_counter() - started, "process")
+            return pdf_bytes
+        finally:
+            render_pool.free_slots.put(slot)
+    finally:
+        slots.release()
+
+
+def _build_pdf_inline(
+    month: date,
+    last_updated: datetime | None,
+    items: Sequence[DashboardItem],
+    summary: DashboardSummary | None,
+) -> bytes:
+    started = perf_counter()
+    pdf_bytes = _build_pdf(month, last_updated, items, summary)
+    PDF_RENDER_DURATION.observe(perf_counter() - started, "inline")
+    return pdf_bytes
+
+
+def _warm_up() -> None:
+    try:
+        render_pool = _get_render_pool()
+        if render_pool is None:
+            _init_worker()
+        else:
+            # Процессы пула стартуют сразу, а их initializer импортирует
+            # движок PDF и регистрирует шрифты; пустая задача дожидается этого
+            render_pool.pool.apply(os.getpid)
+    except Exception as exc:  # noqa: BLE001 - прогрев не должен ронять приложение
+        logger.warning("Не удалось прогреть движок PDF: %s", exc, exc_info=True)
+        return
+    logger.info("Движок PDF прогрет")
+
+
+def warm_up_pdf_engine() -> None:
+    """Подготавливает движок PDF в фоновом потоке, не задерживая старт.
+
+    Если прогрев не успел завершиться, первый /dashboard/pdf просто выполнит
+    ту же инициализацию сам.
+    """
+
+    Thread(target=_warm_up, name="pdf-warmup", daemon=True).start()
+
+
+def shutdown_pdf_executor() -> None:
+    """Останавливает пул процессов рендеринга (вызывается при завершении).
+
+    К этому моменту сервер уже дождался текущих запросов, поэтому процессы
+    останавливаются сразу: Pool.join ждал бы и задачи остановленных процессов.
+    """
+
+    global _render_pool
+    with _render_pool_lock:
+        render_pool, _render_pool = _render_pool, None
+    if render_pool is not None:
+        render_pool.pool.terminate()
+        render_pool.pool.join()
+
+
+__all__ = [
+    "PdfRenderBusyError",
+    "PdfRenderCrashedError",
+    "PdfRenderTimeoutError",
+    "render_dashboard_pdf",
+    "shutdown_pdf_executor",
+    "warm_up_pdf_engine",
+]
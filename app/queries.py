@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import logging
 import calendar
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_futures
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
+from itertools import chain
+from threading import Lock
+import sqlite3
+import time
 from decimal import Decimal
-from typing import Any, Callable, TypeVar, Iterable, Optional
+from typing import Any, Callable, TypeVar, Iterable, Iterator, Mapping, Optional, Sequence
 
-from psycopg2 import InterfaceError, OperationalError
+from psycopg2 import Error as PsycopgError, InterfaceError, OperationalError
 from psycopg2.extras import RealDictCursor
 
 from .constants import (
@@ -20,8 +27,13 @@ from .constants import (
     TABLE_PLAN_VS_FACT_MONTHLY,
     TABLE_RATES,
 )
-from .db import get_connection
+from .cache import LRUCache
+from .config import get_settings
+from .data_source import data_session
+from .db import get_connection, register_numeric_as_float, streaming_cursor
 from .retry import db_retry
+from .singleflight import singleflight
+from .timing import bind_context, span
 from .models import (
     DashboardItem,
     DashboardSummary,
@@ -29,15 +41,15 @@ from .models import (
     DailyReportResponse,
     DailyRevenue,
     DailyWorkVolume,
+    RangeCategoryTotal,
+    RangeMonthSummary,
 )
 from .query_builder import FactQueryBuilder
 from .utils import (
     to_float,
     normalize_string,
-    safe_get_from_dict,
     get_month_start,
     get_next_month_start,
-    extract_dict_strings,
 )
 
 logger = logging.getLogger(__name__)
@@ -53,8 +65,61 @@ _DB_RETRY_BACKOFF = 1.0  # Можно увеличить (>1.0) для эксп
 
 T = TypeVar("T")
 
+DashboardResult = tuple[list[DashboardItem], DashboardSummary | None, datetime | None]
 
-ITEMS_SQL = f"""
+# Пул потоков параллельного режима общий для всех запросов: его размер и есть
+# верхняя граница дополнительных соединений, которые режим берёт из пула БД.
+_query_executor: ThreadPoolExecutor | None = None
+_query_executor_lock = Lock()
+
+# Готовые ответы дашборда по ключу (месяц, водяной знак loaded_at, сегодняшняя дата).
+# Дата нужна потому, что среднедневная выручка текущего месяца зависит от «сегодня».
+_DASHBOARD_CACHE: LRUCache[tuple[date, datetime | None, date], DashboardResult] = LRUCache(
+    get_settings().dashboard_cache_size
+)
+
+# Последний успешно полученный результат по месяцу и время (time.time()), когда
+# он был получен или подтверждён. Отдаётся как устаревший, если БД не успевает
+# ответить (см. fetch_plan_vs_fact_for_month_or_stale).
+_LAST_GOOD_DASHBOARD: LRUCache[date, tuple[DashboardResult, float]] = LRUCache(
+    max(1, get_settings().dashboard_cache_size)
+)
+
+# Загрузки для stale-while-revalidate: отдельный пул, чтобы они не занимали
+# потоки параллельного режима, и не больше одной загрузки на месяц.
+_refresh_executor: ThreadPoolExecutor | None = None
+_refresh_lock = Lock()
+_refresh_futures: dict[date, Future[tuple[DashboardResult, float | None]]] = {}
+
+# Справочник расценок (нормализованное название работы -> коды смет) по водяному знаку
+RatesIndex = dict[str, tuple[Any, ...]]
+_RATES_CACHE: LRUCache[datetime, RatesIndex] = LRUCache(2)
+
+# Подневная расшифровка всех работ месяца (режим WORK_BREAKDOWN_MODE=cube):
+# нормализованное описание -> (описание как в БД, ((дата, объём, ед. изм., сумма), ...)).
+# Хранится кортежами, модели DailyWorkVolume создаются только для запрошенной работы.
+WorkBreakdownDays = tuple[tuple[date, float, str, float], ...]
+WorkBreakdownCube = dict[str, tuple[str, WorkBreakdownDays]]
+# Водяной знак loaded_at берётся из агрегатов, а куб читает skpdi_fact_with_money,
+# поэтому у записей есть ещё и срок жизни WORK_BREAKDOWN_CACHE_TTL_SEC. Рядом с
+# кубом хранятся его ключи по возрастанию — порядок страниц /work-breakdown/all.
+_WORK_BREAKDOWN_CACHE: LRUCache[
+    tuple[date, datetime | None], tuple[WorkBreakdownCube, tuple[str, ...]]
+] = LRUCache(
+    get_settings().work_breakdown_cache_size,
+    ttl_sec=get_settings().work_breakdown_cache_ttl_sec,
+)
+
+# Расшифровки нескольких работ сразу: название работы -> подневные объёмы
+WorkBreakdownBatch = dict[str, list[DailyWorkVolume]]
+
+# Помесячные итоги диапазона по (первый месяц, последний месяц, водяной знак)
+_DASHBOARD_RANGE_CACHE: LRUCache[tuple[date, date, datetime | None], list[RangeMonthSummary]] = LRUCache(
+    get_settings().dashboard_range_cache_size
+)
+
+
+_ITEMS_BASE_SQL = f"""
     SELECT
         pvf.*,
         rates.smeta_code AS category_code
@@ -62,9 +127,29 @@ ITEMS_SQL = f"""
     LEFT JOIN {TABLE_RATES} AS rates
         ON TRIM(LOWER(rates.work_name)) = TRIM(LOWER(pvf.description))
     WHERE pvf.month_start = %s
+"""
+
+ITEMS_SQL = f"""{_ITEMS_BASE_SQL}
+    ORDER BY ABS(COALESCE(pvf.delta_amount_done, 0)) DESC, pvf.description;
+"""
+
+# Режим DASHBOARD_RATES_LOOKUP=memory: строки без соединения с расценками,
+# код сметы подставляется в Python по нормализованному ключу из БД
+ITEMS_WITHOUT_RATES_SQL = f"""
+    SELECT
+        pvf.*,
+        TRIM(LOWER(pvf.description)) AS rates_key
+    FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+    WHERE pvf.month_start = %s
     ORDER BY ABS(COALESCE(pvf.delta_amount_done, 0)) DESC, pvf.description;
 """
 
+RATES_SQL = f"""
+    SELECT TRIM(LOWER(work_name)) AS rates_key, smeta_code
+    FROM {TABLE_RATES}
+    WHERE work_name IS NOT NULL;
+"""
+
 AVAILABLE_MONTHS_SQL = f"""
     SELECT DISTINCT month_start
     FROM {TABLE_PLAN_VS_FACT_MONTHLY}
@@ -73,26 +158,32 @@ AVAILABLE_MONTHS_SQL = f"""
     LIMIT %s;
 """
 
-LAST_UPDATED_SQL = f"""
+_LAST_UPDATED_BASE_SQL = f"""
     SELECT COALESCE(MAX(loaded_at), 'epoch'::timestamptz) AS last_updated
     FROM (
         SELECT loaded_at FROM {TABLE_FACT_AGG}
         UNION ALL
         SELECT loaded_at FROM {TABLE_PLAN_AGG}
-    ) AS loads;
+    ) AS loads
 """
 
-CONTRACT_TOTAL_SQL = f"""
+LAST_UPDATED_SQL = f"{_LAST_UPDATED_BASE_SQL};"
+
+_CONTRACT_TOTAL_BASE_SQL = f"""
     SELECT COALESCE(SUM(contract_amount), 0) AS contract_total
-    FROM {TABLE_CONTRACT_TOTAL};
+    FROM {TABLE_CONTRACT_TOTAL}
 """
 
-CONTRACT_EXECUTED_SQL = f"""
+CONTRACT_TOTAL_SQL = f"{_CONTRACT_TOTAL_BASE_SQL};"
+
+_CONTRACT_EXECUTED_BASE_SQL = f"""
     SELECT COALESCE(SUM(category_amount), 0) AS executed_total
-    FROM {TABLE_CONTRACT_EXECUTED};
+    FROM {TABLE_CONTRACT_EXECUTED}
 """
 
-SUMMARY_SQL = f"""
+CONTRACT_EXECUTED_SQL = f"{_CONTRACT_EXECUTED_BASE_SQL};"
+
+_SUMMARY_BASE_SQL = f"""
     WITH agg AS (
         SELECT
             SUM(CASE
@@ -109,7 +200,44 @@ SUMMARY_SQL = f"""
         fact_total,
         CASE WHEN planned_total <> 0 THEN fact_total / planned_total END AS completion_pct,
         fact_total - planned_total AS delta_amount
-    FROM agg;
+    FROM agg
+"""
+
+SUMMARY_SQL = f"{_SUMMARY_BASE_SQL};"
+
+# Все данные дашборда одним запросом: строки items, дневная выручка и
+# контрактные агрегаты сворачиваются в JSON, summary и водяной знак идут
+# обычными колонками. Плейсхолдер {daily_sql} подставляется из FactQueryBuilder.
+DASHBOARD_COMBINED_SQL_TEMPLATE = f"""
+    WITH items AS ({_ITEMS_BASE_SQL}),
+    summary AS ({_SUMMARY_BASE_SQL}),
+    daily AS ({{daily_sql}})
+    SELECT
+        summary.planned_total,
+        summary.fact_total,
+        summary.completion_pct,
+        summary.delta_amount,
+        (
+            SELECT COALESCE(
+                json_agg(items ORDER BY ABS(COALESCE(items.delta_amount_done, 0)) DESC, items.description),
+                '[]'::json
+            )
+            FROM items
+        ) AS items,
+        (
+            SELECT COALESCE(
+                json_agg(
+                    json_build_object('work_date', daily.work_date, 'fact_total', daily.fact_total)
+                    ORDER BY daily.work_date
+                ),
+                '[]'::json
+            )
+            FROM daily
+        ) AS daily_revenue,
+        ({_CONTRACT_TOTAL_BASE_SQL}) AS contract_total,
+        ({_CONTRACT_EXECUTED_BASE_SQL}) AS executed_total,
+        ({_LAST_UPDATED_BASE_SQL}) AS last_updated
+    FROM summary;
 """
 
 
@@ -124,7 +252,7 @@ SUMMARY_SQL = f"""
 
 
 # Функции _to_float, _safe_get_from_row и _extract_strings перенесены в utils.py
-# Используются: to_float, safe_get_from_dict, extract_dict_strings
+# Используются: to_float, normalize_string; строки items разбираются по позициям (_ItemColumns)
 
 
 def _calculate_vnr_plan(items: list["DashboardItem"]) -> float:
@@ -144,13 +272,6 @@ def _calculate_vnr_plan(items: list["DashboardItem"]) -> float:
     return float(base_total * _VNR_PLAN_SHARE)
 
 
-def _is_vnr_row(row: dict[str, Any]) -> bool:
-    smeta_code = normalize_string(
-        safe_get_from_dict(row, "smeta_code", "category_code", default="")
-    ).lower()
-    return smeta_code in _VNR_CATEGORY_CODES
-
-
 def _build_vnr_plan_item(plan_value: float, items: list["DashboardItem"]) -> "DashboardItem | None":
     if plan_value <= 0:
         return None
@@ -215,16 +336,81 @@ def _update_summary_with_vnr_plan(
     )
 
 
-def _aggregate_items_streaming(cursor) -> list[DashboardItem]:
-    """
-    Агрегирует строки запроса используя курсор напрямую (потоковая обработка).
-    Минимизирует использование памяти для больших результатов.
-    Cursor должен быть RealDictCursor и находиться в контексте транзакции.
+# Ключи колонок в порядке приоритета — те же, что у extract_dict_strings
+_CATEGORY_KEYS = ("category_code", "smeta")
+_SMETA_KEYS = ("smeta", "smeta_name", "smeta_title", "section")
+_WORK_KEYS = ("work_name", "work_title")
+_DESCRIPTION_KEYS = ("description",)
+_VNR_CODE_KEYS = ("smeta_code", "category_code")
+
+
+@dataclass(frozen=True)
+class _ItemColumns:
+    """Позиции колонок строки ITEMS_SQL, нужных для агрегации.
+
+    Строится один раз по cursor.description, после чего строки читаются как
+    кортежи по индексам — без словаря на каждую строку и перебора ключей.
+    Для полей с несколькими возможными колонками хранятся позиции только
+    реально присутствующих колонок, в порядке приоритета.
     """
+
+    category: tuple[int, ...]
+    smeta: tuple[int, ...]
+    work_name: tuple[int, ...]
+    description: tuple[int, ...]
+    vnr_code: tuple[int, ...]
+    planned_amount: int | None
+    fact_amount: int | None
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "_ItemColumns":
+        positions: dict[str, int] = {}
+        for index, name in enumerate(names):
+            # При повторе имени побеждает последняя колонка, как в RealDictCursor
+            positions[name] = index
+
+        def pick(keys: tuple[str, ...]) -> tuple[int, ...]:
+            return tuple(positions[key] for key in keys if key in positions)
+
+        return cls(
+            category=pick(_CATEGORY_KEYS),
+            smeta=pick(_SMETA_KEYS),
+            work_name=pick(_WORK_KEYS),
+            description=pick(_DESCRIPTION_KEYS),
+            vnr_code=pick(_VNR_CODE_KEYS),
+            planned_amount=positions.get("planned_amount"),
+            fact_amount=positions.get("fact_amount_done"),
+        )
+
+
+def _first_truthy(row: Sequence[Any], positions: tuple[int, ...], default: Any = None) -> Any:
+    """Первое непустое значение среди колонок (семантика safe_get_from_dict)."""
+    for position in positions:
+        value = row[position]
+        if value:
+            return value
+    return default
+
+
+def _row_float(row: Sequence[Any], position: int | None) -> float | None:
+    if position is None:
+        return None
+    value = row[position]
+    # NUMERIC уже декодирован во float (register_numeric_as_float)
+    if value is None or value.__class__ is float:
+        return value
+    return to_float(value)
+
+
+def _aggregate_item_rows(rows: Iterable[Sequence[Any]], columns: _ItemColumns) -> list[DashboardItem]:
+    """Суммирует план и факт по ключу (category, smeta, work_name, description)."""
     items_map: dict[tuple[str | None, str | None, str | None, str], dict[str, Any]] = {}
-    
-    for row in cursor:
-        category, smeta, work_name, description = extract_dict_strings(row)
+
+    for row in rows:
+        description = _first_truthy(row, columns.description, "")
+        category = _first_truthy(row, columns.category)
+        smeta = _first_truthy(row, columns.smeta)
+        work_name = _first_truthy(row, columns.work_name, description)
         key = (category, smeta, work_name, description)
 
         item = items_map.get(key)
@@ -239,11 +425,13 @@ def _aggregate_items_streaming(cursor) -> list[DashboardItem]:
             }
             items_map[key] = item
 
-        planned_value = None if _is_vnr_row(row) else to_float(row.get("planned_amount"))
-        if planned_value is not None:
-            item["planned_amount"] = (item["planned_amount"] or 0.0) + planned_value
+        vnr_code = normalize_string(_first_truthy(row, columns.vnr_code, "")).lower()
+        if vnr_code not in _VNR_CATEGORY_CODES:
+            planned_value = _row_float(row, columns.planned_amount)
+            if planned_value is not None:
+                item["planned_amount"] = (item["planned_amount"] or 0.0) + planned_value
 
-        fact_value = to_float(row.get("fact_amount_done"))
+        fact_value = _row_float(row, columns.fact_amount)
         if fact_value is not None:
             item["fact_amount"] = (item["fact_amount"] or 0.0) + fact_value
 
@@ -264,6 +452,262 @@ def _aggregate_items_streaming(cursor) -> list[DashboardItem]:
     return aggregated_items
 
 
+def _aggregate_items_streaming(cursor) -> list[DashboardItem]:
+    """
+    Агрегирует строки запроса используя курсор напрямую (потоковая обработка).
+    Cursor должен быть кортежным курсором после execute: колонки
+    сопоставляются по позициям из cursor.description. У серверного курсора
+    description появляется только после первой порции, поэтому первая
+    строка читается до построения карты колонок.
+    """
+    rows = iter(cursor)
+    first_row = next(rows, None)
+    if first_row is None:
+        return []
+    columns = _ItemColumns.from_names(column[0] for column in cursor.description)
+    return _aggregate_item_rows(chain((first_row,), rows), columns)
+
+
+def _aggregate_item_dicts(rows: list[dict[str, Any]]) -> list[DashboardItem]:
+    """Агрегирует строки items, пришедшие словарями (JSON объединённого запроса)."""
+    if not rows:
+        return []
+    names = list(rows[0])
+    columns = _ItemColumns.from_names(names)
+    return _aggregate_item_rows((tuple(row.get(name) for name in names) for row in rows), columns)
+
+
+def _fetch_items(
+    conn,
+    month_start: date,
+    watermark: datetime | None = None,
+) -> tuple[list[DashboardItem], float | None]:
+    """Читает строки items за месяц и агрегирует их.
+
+    Возвращает (items, план ВНР). План ВНР не None, только если его уже
+    посчитала БД (режим DASHBOARD_SQL_AGGREGATION), иначе он считается
+    в _assemble_dashboard.
+    """
+    settings = get_settings()
+    if settings.dashboard_sql_aggregation:
+        aggregated = _fetch_items_aggregated(conn, month_start)
+        if aggregated is not None:
+            return aggregated
+
+    if settings.dashboard_rates_lookup == "memory":
+        rates = _get_rates_index(conn, watermark)
+        with streaming_cursor(conn, "dashboard_items") as cur:
+            register_numeric_as_float(cur)
+            with span("items_query"):
+                cur.execute(ITEMS_WITHOUT_RATES_SQL, (month_start,))
+            with span("items_aggregate"):
+                return aggregate_items_with_rates(cur, rates), None
+
+    with streaming_cursor(conn, "dashboard_items") as cur:
+        register_numeric_as_float(cur)
+        with span("items_query"):
+            cur.execute(ITEMS_SQL, (month_start,))
+        # У серверного курсора чтение строк идёт порциями внутри агрегации
+        with span("items_aggregate"):
+            return _aggregate_items_streaming(cur), None
+
+
+def _load_rates_index(conn) -> RatesIndex:
+    """Читает справочник расценок: ключ TRIM(LOWER(work_name)) -> коды смет.
+
+    Ключ нормализуется в БД теми же функциями, что и в ITEMS_SQL, поэтому
+    сопоставление совпадает с соединением, включая дубли названий.
+    """
+    rates: dict[str, list[Any]] = {}
+    with span("rates_load"), conn.cursor() as cur:
+        cur.execute(RATES_SQL)
+        for rates_key, smeta_code in cur:
+            rates.setdefault(rates_key, []).append(smeta_code)
+    return {key: tuple(codes) for key, codes in rates.items()}
+
+
+def _get_rates_index(conn, watermark: datetime | None) -> RatesIndex:
+    """Справочник расценок, загруженный один раз на водяной знак."""
+    if watermark is None:
+        return _load_rates_index(conn)
+    rates = _RATES_CACHE.get(watermark)
+    if rates is None:
+        rates = _load_rates_index(conn)
+        _RATES_CACHE.put(watermark, rates)
+    return rates
+
+
+def aggregate_items_with_rates(cursor, rates: RatesIndex) -> list[DashboardItem]:
+    """Агрегирует строки ITEMS_WITHOUT_RATES_SQL, подставляя category_code из справочника.
+
+    Повторяет LEFT JOIN из ITEMS_SQL: строка без совпадения получает None,
+    строка с несколькими совпадениями размножается по числу кодов.
+    """
+    rows = iter(cursor)
+    first_row = next(rows, None)
+    if first_row is None:
+        return []
+    names = [column[0] for column in cursor.description]
+    key_position = names.index("rates_key")
+    columns = _ItemColumns.from_names([*names, "category_code"])
+    no_match = (None,)
+
+    def joined_rows() -> Iterator[tuple[Any, ...]]:
+        for row in chain((first_row,), rows):
+            for smeta_code in rates.get(row[key_position], no_match):
+                yield (*row, smeta_code)
+
+    return _aggregate_item_rows(joined_rows(), columns)
+
+
+# SQL агрегации items строится по фактическим колонкам представления
+# (pvf.* может меняться) и переиспользуется до первой ошибки.
+_items_aggregated_sql: str | None = None
+
+
+def _coalesce_columns(alias: str, names: Iterable[str], available: set[str]) -> list[str]:
+    """Выражения «непустое значение колонки» для присутствующих колонок."""
+    return [f"NULLIF({alias}.{name}::text, '')" for name in names if name in available]
+
+
+def _coalesce_sql(expressions: list[str], default: str | None = None) -> str:
+    if default is not None:
+        expressions = [*expressions, default]
+    if not expressions:
+        return "NULL::text"
+    if len(expressions) == 1:
+        # SQLite не принимает COALESCE с одним аргументом
+        return expressions[0]
+    return f"COALESCE({', '.join(expressions)})"
+
+
+def _build_items_aggregated_sql(view_columns: Iterable[str]) -> str:
+    """Строит запрос, который группирует строки items и считает план ВНР в БД.
+
+    Ключ группировки и правила выбора значений повторяют _ItemColumns:
+    первое непустое значение из колонок в порядке приоритета, при этом
+    category_code берётся из справочника расценок (как в ITEMS_SQL).
+    Порядок items — по первому появлению строки в порядке ITEMS_SQL.
+    """
+    available = set(view_columns)
+
+    def pvf_or_rates(keys: tuple[str, ...]) -> list[str]:
+        expressions = []
+        for key in keys:
+            if key == "category_code":
+                expressions.append("NULLIF(rates.smeta_code::text, '')")
+            elif key in available:
+                expressions.append(f"NULLIF(pvf.{key}::text, '')")
+        return expressions
+
+    description = _coalesce_sql(_coalesce_columns("pvf", _DESCRIPTION_KEYS, available), "''")
+    category = _coalesce_sql(pvf_or_rates(_CATEGORY_KEYS))
+    smeta = _coalesce_sql(_coalesce_columns("pvf", _SMETA_KEYS, available))
+    work_name = _coalesce_sql(_coalesce_columns("pvf", _WORK_KEYS, available), description)
+    vnr_code = _coalesce_sql(pvf_or_rates(_VNR_CODE_KEYS), "''")
+    planned = "pvf.planned_amount" if "planned_amount" in available else "NULL::numeric"
+    fact = "pvf.fact_amount_done" if "fact_amount_done" in available else "NULL::numeric"
+    delta_order = (
+        "ABS(COALESCE(pvf.delta_amount_done, 0)) DESC, "
+        if "delta_amount_done" in available
+        else ""
+    )
+
+    return f"""
+    WITH item_rows AS (
+        SELECT
+            {category} AS category,
+            {smeta} AS smeta,
+            {work_name} AS work_name,
+            {description} AS description,
+            CASE
+                WHEN LOWER(TRIM({vnr_code})) = ANY(%(vnr_codes)s) THEN NULL
+                ELSE {planned}
+            END AS planned_amount,
+            {fact} AS fact_amount,
+            ROW_NUMBER() OVER (ORDER BY {delta_order}pvf.description) AS row_order
+        FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+        LEFT JOIN {TABLE_RATES} AS rates
+            ON TRIM(LOWER(rates.work_name)) = TRIM(LOWER(pvf.description))
+        WHERE pvf.month_start = %(month_start)s
+    ),
+    items AS (
+        SELECT
+            category,
+            smeta,
+            work_name,
+            description,
+            SUM(planned_amount) AS planned_amount,
+            SUM(fact_amount) AS fact_amount,
+            MIN(row_order) AS row_order
+        FROM item_rows
+        GROUP BY category, smeta, work_name, description
+    )
+    SELECT
+        category,
+        smeta,
+        work_name,
+        description,
+        planned_amount::float8 AS planned_amount,
+        fact_amount::float8 AS fact_amount,
+        (GREATEST(COALESCE(SUM(planned_amount) FILTER (
+            WHERE LOWER(TRIM(COALESCE(category, ''))) = ANY(%(plan_base_categories)s)
+        ) OVER (), 0), 0) * %(vnr_share)s)::float8 AS vnr_plan_amount
+    FROM items
+    ORDER BY row_order;
+"""
+
+
+def _fetch_items_aggregated(conn, month_start: date) -> tuple[list[DashboardItem], float] | None:
+    """Загружает уже сгруппированные items и план ВНР одним запросом.
+
+    При ошибке запроса (кроме ошибок соединения) откатывает транзакцию и
+    возвращает None — вызывающий переходит на агрегацию в Python.
+    """
+    global _items_aggregated_sql
+    params = {
+        "month_start": month_start,
+        "vnr_codes": sorted(_VNR_CATEGORY_CODES),
+        "plan_base_categories": sorted(_PLAN_BASE_CATEGORIES),
+        "vnr_share": _VNR_PLAN_SHARE,
+    }
+    try:
+        with conn.cursor() as cur:
+            sql = _items_aggregated_sql
+            if sql is None:
+                cur.execute(f"SELECT * FROM {TABLE_PLAN_VS_FACT_MONTHLY} LIMIT 0")
+                sql = _build_items_aggregated_sql(column[0] for column in cur.description)
+            with span("items_sql_aggregate"):
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+    except _DB_RETRYABLE_ERRORS:
+        raise
+    except PsycopgError as exc:
+        logger.warning(
+            "SQL-агрегация items за %s завершилась ошибкой: %s. Агрегирую в Python.",
+            month_start,
+            exc,
+        )
+        conn.rollback()
+        _items_aggregated_sql = None
+        return None
+
+    _items_aggregated_sql = sql
+    items = [
+        DashboardItem(
+            category=category,
+            smeta=smeta,
+            work_name=work_name,
+            description=description,
+            planned_amount=planned_amount,
+            fact_amount=fact_amount,
+        )
+        for category, smeta, work_name, description, planned_amount, fact_amount, _ in rows
+    ]
+    vnr_plan_amount = rows[0][6] if rows else 0.0
+    return items, vnr_plan_amount
+
+
 def _fetch_dates(
     conn,
     sql: str,
@@ -283,32 +727,42 @@ def _fetch_dates(
     return [row[0] for row in rows if row and row[0] is not None]
 
 
+def _daily_fact_totals_query(month_start: date) -> tuple[str, tuple[object, ...]]:
+    """Строит запрос дневных сумм факта за месяц."""
+    return (
+        FactQueryBuilder()
+        .select(
+            "date_done::date AS work_date",
+            "SUM(total_amount) AS fact_total",
+        )
+        .month_start(month_start)
+        .status()
+        .group_by("work_date")
+        .having("SUM(total_amount) IS NOT NULL")
+        .order_by("work_date")
+        .build()
+    )
+
+
+def build_daily_revenue(rows: Iterable[dict[str, Any]]) -> list[DailyRevenue]:
+    """Преобразует строки с полями work_date и fact_total в DailyRevenue."""
+    daily_rows: list[DailyRevenue] = []
+    for row in rows:
+        amount = to_float(row.get("fact_total"))
+        work_date = row.get("work_date")
+        if amount is None or work_date is None:
+            continue
+        daily_rows.append(DailyRevenue(date=work_date, amount=amount))
+    return daily_rows
+
+
 def _fetch_daily_fact_totals(conn, month_start: date) -> list[DailyRevenue]:
     """Извлекает дневные суммы фактических работ используя билдер."""
-    daily_rows: list[DailyRevenue] = []
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with span("daily_revenue"), conn.cursor(cursor_factory=RealDictCursor) as cur:
         try:
-            sql, params = (
-                FactQueryBuilder()
-                .select(
-                    "date_done::date AS work_date",
-                    "SUM(total_amount) AS fact_total",
-                )
-                .month_start(month_start)
-                .status()
-                .group_by("work_date")
-                .having("SUM(total_amount) IS NOT NULL")
-                .order_by("work_date")
-                .build()
-            )
+            sql, params = _daily_fact_totals_query(month_start)
             cur.execute(sql, params)
-            rows = cur.fetchall() or []
-            for row in rows:
-                amount = to_float(row.get("fact_total"))
-                work_date = row.get("work_date")
-                if amount is None or work_date is None:
-                    continue
-                daily_rows.append(DailyRevenue(date=work_date, amount=amount))
+            daily_rows = build_daily_revenue(cur.fetchall() or [])
         except Exception as exc:  # noqa: BLE001
             logger.warning(
                 "Не удалось загрузить дневные суммы за %s: %s. Используется пустой список.",
@@ -325,77 +779,506 @@ def _fetch_daily_fact_totals(conn, month_start: date) -> list[DailyRevenue]:
  
 
 
-@db_retry(
-    retries=1,
-    delay_sec=_DB_RETRY_DELAY_SEC,
-    backoff=_DB_RETRY_BACKOFF,
-    exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_work_daily_breakdown",
-)
+def build_work_volumes(rows: Iterable[Mapping[str, Any]]) -> list[DailyWorkVolume]:
+    """Преобразует строки work_date, total_volume, unit, total_amount в DailyWorkVolume."""
+    volumes: list[DailyWorkVolume] = []
+    for row in rows:
+        work_date = row.get("work_date")
+        vol = to_float(row.get("total_volume"))
+        if work_date is None or vol is None:
+            continue
+        volumes.append(
+            DailyWorkVolume(
+                date=work_date,
+                amount=vol,
+                unit=normalize_string(row.get("unit")),
+                total_amount=to_float(row.get("total_amount")),
+            )
+        )
+    return volumes
+
+
+def _fetch_work_daily_breakdown(conn, month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
+    """Подневные объёмы работ за месяц, описание которых содержит work_identifier (ILIKE)."""
+    next_month_start = get_next_month_start(month_start)
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            work_param = f"%{work_identifier.strip()}%"
+            sql, params = (
+                FactQueryBuilder()
+                .select(
+                    "date_done::date AS work_date",
+                    "SUM(COALESCE(total_volume, 0)) AS total_volume",
+                    "MAX(COALESCE(unit::text, '')) AS unit",
+                    "SUM(COALESCE(total_amount, 0)) AS total_amount",
+                )
+                .date_range(month_start, next_month_start)
+                .status()
+                .ilike_description(work_param)
+                .group_by("work_date")
+                .order_by("work_date")
+                .build()
+            )
+            with span("work_breakdown_query"):
+                cur.execute(sql, params)
+                fetched = cur.fetchall() or []
+            return build_work_volumes(fetched)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(
+            "Не удалось загрузить подневную расшифровку для '%s' за %s: %s",
+            work_identifier,
+            month_start,
+            exc,
+            exc_info=True,
+        )
+        conn.rollback()
+        return []
+
+
 def fetch_work_daily_breakdown(month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
     """Возвращает список по-дневных объёмов (total_volume) для указанной строки работ за месяц.
 
     В результате возвращается список объектов с полями `date`, `amount` и `unit`.
-    Поиск выполняется по полю `description` с приведением к нижнему регистру (ILIKE).
+    По умолчанию поиск выполняется по полю `description` с приведением к нижнему
+    регистру (ILIKE). В режиме WORK_BREAKDOWN_MODE=cube расшифровка берётся из
+    куба всех работ месяца по точному совпадению описания (без учёта регистра
+    и пробелов по краям); если такой работы в кубе нет (например, передана
+    часть названия), выполняется прежний поиск по подстроке.
     """
 
-    results: list[DailyWorkVolume] = []
     if not work_identifier:
-        return results
+        return []
 
     # На фронтенд может прийти любая дата внутри месяца, поэтому нормализуем
     # значение к первому дню месяца, чтобы захватывать весь период.
     month_start = get_month_start(month_start)
 
-    rows: list[DailyWorkVolume] = []
-    next_month_start = get_next_month_start(month_start)
-    with get_connection() as conn:
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                work_param = f"%{work_identifier.strip()}%"
-                sql, params = (
-                    FactQueryBuilder()
-                    .select(
-                        "date_done::date AS work_date",
-                        "SUM(COALESCE(total_volume, 0)) AS total_volume",
-                        "MAX(COALESCE(unit::text, '')) AS unit",
-                        "SUM(COALESCE(total_amount, 0)) AS total_amount",
-                    )
-                    .date_range(month_start, next_month_start)
-                    .status()
-                    .ilike_description(work_param)
-                    .group_by("work_date")
-                    .order_by("work_date")
-                    .build()
-                )
-                cur.execute(sql, params)
-                fetched = cur.fetchall() or []
-                for row in fetched:
-                    work_date = row.get("work_date")
-                    vol = to_float(row.get("total_volume"))
-                    unit = normalize_string(row.get("unit"))
-                    total_amount = to_float(row.get("total_amount"))
-                    if work_date is None or vol is None:
-                        continue
-                    rows.append(
-                        DailyWorkVolume(
-                            date=work_date,
-                            amount=vol,
-                            unit=unit,
-                            total_amount=total_amount,
-                        )
+    if get_settings().work_breakdown_mode == "cube":
+        cube = fetch_work_breakdown_cube(month_start)
+        entry = cube.get(_work_key(work_identifier))
+        if entry is not None:
+            return _cube_work_volumes(entry[1])
+    return _search_work_daily_breakdown(month_start, work_identifier)
+
+
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_work_daily_breakdown",
+)
+def _search_work_daily_breakdown(month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
+    with data_session() as session:
+        return session.work_daily_breakdown(month_start, work_identifier)
+
+
+def _work_key(description: str | None) -> str:
+    """Ключ работы в кубе: описание без пробелов по краям в нижнем регистре."""
+    return (description or "").strip().lower()
+
+
+def _cube_work_volumes(days: WorkBreakdownDays) -> list[DailyWorkVolume]:
+    return [
+        DailyWorkVolume(date=work_date, amount=volume, unit=unit, total_amount=amount)
+        for work_date, volume, unit, amount in days
+    ]
+
+
+def build_work_breakdown_cube(rows: Iterable[Sequence[Any]]) -> WorkBreakdownCube:
+    """Строит куб из строк (description, work_date, total_volume, unit, total_amount).
+
+    Описания, отличающиеся только регистром или пробелами по краям, сводятся
+    к одной работе: объёмы и суммы за день складываются.
+    """
+    descriptions: dict[str, str] = {}
+    days_by_work: dict[str, dict[date, tuple[float, str, float]]] = {}
+    for description, work_date, volume, unit, amount in rows:
+        if work_date is None:
+            continue
+        key = _work_key(description)
+        descriptions.setdefault(key, description or "")
+        days = days_by_work.setdefault(key, {})
+        entry = (to_float(volume) or 0.0, normalize_string(unit), to_float(amount) or 0.0)
+        previous = days.get(work_date)
+        if previous is not None:
+            entry = (previous[0] + entry[0], max(previous[1], entry[1]), previous[2] + entry[2])
+        days[work_date] = entry
+    return {
+        key: (descriptions[key], tuple((work_date, *values) for work_date, values in sorted(days.items())))
+        for key, days in days_by_work.items()
+    }
+
+
+def _work_breakdown_cube_query(month_start: date) -> tuple[str, tuple[object, ...]]:
+    """Подневные объёмы и суммы всех работ месяца одним GROUP BY (description, work_date)."""
+    return (
+        FactQueryBuilder()
+        .select(
+            "COALESCE(description::text, '') AS description",
+            "date_done::date AS work_date",
+            "SUM(COALESCE(total_volume, 0)) AS total_volume",
+            "MAX(COALESCE(unit::text, '')) AS unit",
+            "SUM(COALESCE(total_amount, 0)) AS total_amount",
+        )
+        .date_range(month_start, get_next_month_start(month_start))
+        .status()
+        .group_by("description", "work_date")
+        .build()
+    )
+
+
+def _fetch_work_breakdown_cube(conn, month_start: date) -> WorkBreakdownCube:
+    sql, params = _work_breakdown_cube_query(month_start)
+    with streaming_cursor(conn, "work_breakdown_cube") as cur:
+        register_numeric_as_float(cur)
+        with span("work_breakdown_cube_query"):
+            cur.execute(sql, params)
+            return build_work_breakdown_cube(cur)
+
+
+@singleflight(label="fetch_work_breakdown_cube")
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_work_breakdown_cube",
+)
+def _load_work_breakdown_cube(month_start: date) -> tuple[WorkBreakdownCube, tuple[str, ...]]:
+    """Куб работ месяца и его ключи по возрастанию, из кэша или из источника."""
+    with data_session() as session:
+        watermark = session.last_updated()
+        cache_key = (month_start, watermark)
+        entry = _WORK_BREAKDOWN_CACHE.get(cache_key)
+        if entry is None:
+            cube = session.work_breakdown_cube(month_start)
+            entry = (cube, tuple(sorted(cube)))
+            if session.fallback_age_sec is None:
+                _WORK_BREAKDOWN_CACHE.put(cache_key, entry)
+    return entry
+
+
+def fetch_work_breakdown_cube(month_start: date) -> WorkBreakdownCube:
+    """Подневная расшифровка всех работ месяца (month_start — первый день месяца).
+
+    Куб строится одним запросом и кэшируется по (месяц, водяной знак) не
+    дольше WORK_BREAKDOWN_CACHE_TTL_SEC, так что клик по любой строке
+    дашборда стоит одной проверки водяного знака и поиска в словаре.
+    Результат общий для всех вызывающих и не должен изменяться.
+    """
+    return _load_work_breakdown_cube(month_start)[0]
+
+
+def fetch_work_breakdown_page(
+    month_start: date,
+    offset: int,
+    limit: int,
+) -> tuple[int, list[tuple[str, WorkBreakdownDays]]]:
+    """Страница куба работ месяца в порядке ключей (описаний в нижнем регистре).
+
+    Возвращает число работ за месяц и пары (описание как в БД, подневные
+    данные) для работ с offset по offset + limit. Ключи сортируются один раз
+    при построении куба и кэшируются вместе с ним.
+    """
+    cube, keys = _load_work_breakdown_cube(month_start)
+    return len(keys), [cube[key] for key in keys[offset : offset + limit]]
+
+
+def _work_breakdown_batch_query(months: Sequence[date], works: Sequence[str]) -> tuple[str, tuple[object, ...]]:
+    """Подневные объёмы выбранных работ за выбранные месяцы одним запросом (description = ANY)."""
+    builder = (
+        FactQueryBuilder()
+        .select(
+            "description::text AS description",
+            "date_done::date AS work_date",
+            "SUM(COALESCE(total_volume, 0)) AS total_volume",
+            "MAX(COALESCE(unit::text, '')) AS unit",
+            "SUM(COALESCE(total_amount, 0)) AS total_amount",
+        )
+        .date_range(months[0], get_next_month_start(months[-1]))
+    )
+    if len(months) > 1:
+        # Границы диапазона оставляют индекс по date_done, а список отсекает
+        # месяцы-пропуски между выбранными
+        builder.months_in(months)
+    return (
+        builder.status()
+        .description_in(works)
+        .group_by("description", "work_date")
+        .order_by("work_date")
+        .build()
+    )
+
+
+def build_work_breakdown_batch(rows: Iterable[Mapping[str, Any]], works: Sequence[str]) -> WorkBreakdownBatch:
+    """Раскладывает строки с колонкой description по запрошенным работам."""
+    rows_by_work: dict[str, list[Mapping[str, Any]]] = {}
+    for row in rows:
+        rows_by_work.setdefault(row.get("description") or "", []).append(row)
+    return {work: build_work_volumes(rows_by_work.get(work, ())) for work in works}
+
+
+def _fetch_work_breakdown_batch(conn, months: Sequence[date], works: Sequence[str]) -> WorkBreakdownBatch:
+    sql, params = _work_breakdown_batch_query(months, works)
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with span("work_breakdown_batch_query"):
+            cur.execute(sql, params)
+            fetched = cur.fetchall() or []
+    return build_work_breakdown_batch(fetched, works)
+
+
+def fetch_work_breakdown_batch(months: Iterable[date], works: Iterable[str]) -> WorkBreakdownBatch:
+    """Подневные расшифровки нескольких работ за один или несколько месяцев.
+
+    Работы сопоставляются с описанием точно (description = ANY), а не по
+    подстроке, как в fetch_work_daily_breakdown. Результат — словарь по
+    названиям работ (без пробелов по краям, в порядке запроса); дни всех
+    месяцев идут одним списком по возрастанию даты. В режиме
+    WORK_BREAKDOWN_MODE=cube ответ собирается из кубов месяцев без отдельного
+    запроса, сравнение описаний тогда без учёта регистра.
+    """
+
+    month_list = sorted({get_month_start(month) for month in months})
+    work_list = list(dict.fromkeys(work.strip() for work in works if work and work.strip()))
+    if not month_list or not work_list:
+        return {work: [] for work in work_list}
+
+    if get_settings().work_breakdown_mode == "cube":
+        result: WorkBreakdownBatch = {work: [] for work in work_list}
+        for month_start in month_list:
+            cube = fetch_work_breakdown_cube(month_start)
+            for work in work_list:
+                entry = cube.get(_work_key(work))
+                if entry:
+                    result[work].extend(_cube_work_volumes(entry[1]))
+        return result
+    return _query_work_breakdown_batch(tuple(month_list), tuple(work_list))
+
+
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_work_breakdown_batch",
+)
+def _query_work_breakdown_batch(months: tuple[date, ...], works: tuple[str, ...]) -> WorkBreakdownBatch:
+    with data_session() as session:
+        return session.work_breakdown_batch(months, works)
+
+
+def _range_totals(planned: float, fact: float) -> tuple[float, float | None]:
+    """Отклонение и доля выполнения, как в summary дашборда."""
+    return fact - planned, (fact / planned if planned else None)
+
+
+def _range_category(category: str, planned: float, fact: float) -> RangeCategoryTotal:
+    delta_amount, completion_pct = _range_totals(planned, fact)
+    return RangeCategoryTotal(
+        category=category,
+        planned_amount=planned,
+        fact_amount=fact,
+        delta_amount=delta_amount,
+        completion_pct=completion_pct,
+    )
+
+
+def build_dashboard_range(
+    rows: Iterable[Sequence[Any]],
+    start: date,
+    end: date,
+) -> list[RangeMonthSummary]:
+    """Собирает помесячные итоги из строк build_dashboard_range_sql.
+
+    План каждого месяца дополняется планом ВНР (43% плана смет лето и зима),
+    как в _assemble_dashboard. В категориях коды внерегламента сводятся в одну
+    категорию «внерегламент», плановая часть которой и есть план ВНР; коды
+    сравниваются без учёта регистра и пробелов, как в _calculate_vnr_plan,
+    остальные категории подписываются так же, как в items. Месяцы без данных
+    тоже попадают в ответ, с has_data=False.
+    """
+    totals: dict[date, tuple[float | None, float | None]] = {}
+    categories: dict[date, dict[str, tuple[float | None, float | None]]] = {}
+    for month_start, planned_total, fact_total, category, planned, fact in rows:
+        totals[month_start] = (to_float(planned_total), to_float(fact_total))
+        if category is not None:
+            categories.setdefault(month_start, {})[category] = (to_float(planned), to_float(fact))
+
+    result: list[RangeMonthSummary] = []
+    month_start = start
+    while month_start <= end:
+        planned_total, fact_total = totals.get(month_start, (None, None))
+        month_categories = categories.get(month_start, {})
+
+        base_total = Decimal(0)
+        for category, (planned, _) in month_categories.items():
+            if planned is not None and category.strip().lower() in _PLAN_BASE_CATEGORIES:
+                base_total += Decimal(str(planned))
+        vnr_plan_amount = float(base_total * _VNR_PLAN_SHARE) if base_total > 0 else 0.0
+
+        category_totals: dict[str, list[float]] = {}
+        for category, (planned, fact) in month_categories.items():
+            key = CATEGORY_VNR_LABEL if category.strip().lower() in _VNR_CATEGORY_CODES else category
+            entry = category_totals.setdefault(key, [0.0, 0.0])
+            entry[0] += planned or 0.0
+            entry[1] += fact or 0.0
+        if vnr_plan_amount > 0:
+            category_totals.setdefault(CATEGORY_VNR_LABEL, [0.0, 0.0])[0] += vnr_plan_amount
+
+        planned_amount = (planned_total or 0.0) + vnr_plan_amount
+        fact_amount = fact_total or 0.0
+        delta_amount, completion_pct = _range_totals(planned_amount, fact_amount)
+        result.append(
+            RangeMonthSummary(
+                month=month_start,
+                planned_amount=planned_amount,
+                fact_amount=fact_amount,
+                delta_amount=delta_amount,
+                completion_pct=completion_pct,
+                has_data=planned_total is not None or fact_total is not None,
+                categories=[
+                    _range_category(category, planned, fact)
+                    for category, (planned, fact) in sorted(
+                        category_totals.items(), key=lambda entry: (-entry[1][0], entry[0])
                     )
-        except Exception as exc:  # noqa: BLE001
-            logger.warning(
-                "Не удалось загрузить подневную расшифровку для '%s' за %s: %s",
-                work_identifier,
-                month_start,
-                exc,
-                exc_info=True,
+                ],
             )
-            conn.rollback()
-            return []
-    return rows
+        )
+        month_start = get_next_month_start(month_start)
+    return result
+
+
+_VNR_CODES_SQL_LIST = ", ".join(f"'{code}'" for code in sorted(CATEGORY_VNR_CODES))
+
+# SQL помесячных итогов, как и SQL агрегации items, строится по фактическим
+# колонкам представления и переиспользуется до первой ошибки.
+_dashboard_range_sql: str | None = None
+
+
+def _nonempty_text(expression: str) -> str:
+    """Переносимое «непустое текстовое значение»: без ::text, работает и в SQLite."""
+    return f"NULLIF(CAST({expression} AS TEXT), '')"
+
+
+def build_dashboard_range_sql(view_columns: Iterable[str]) -> str:
+    """Строит запрос помесячных итогов диапазона по колонкам представления.
+
+    totals повторяет SUMMARY_SQL, categories — суммы items по категориям с
+    тем же выбором категории, что у _ItemColumns (код сметы из расценок,
+    затем смета), и тем же исключением плана внерегламента. Отсутствующие в
+    представлении колонки пропускаются. Категория возвращается как есть,
+    без смены регистра, — как в items дашборда. Только переносимый SQL:
+    запрос без изменений выполняется и на снимке SQLite.
+    """
+    available = set(view_columns)
+
+    def pvf_or_rates(keys: tuple[str, ...]) -> list[str]:
+        expressions = []
+        for key in keys:
+            if key == "category_code":
+                expressions.append(_nonempty_text("rates.smeta_code"))
+            elif key in available:
+                expressions.append(_nonempty_text(f"pvf.{key}"))
+        return expressions
+
+    category = _coalesce_sql(pvf_or_rates(_CATEGORY_KEYS))
+    vnr_code = _coalesce_sql(pvf_or_rates(_VNR_CODE_KEYS), "''")
+    totals_vnr_code = _coalesce_sql(
+        [_nonempty_text("pvf.smeta_code")] if "smeta_code" in available else [], "''"
+    )
+    planned = "pvf.planned_amount" if "planned_amount" in available else "NULL"
+    fact = "pvf.fact_amount_done" if "fact_amount_done" in available else "NULL"
+
+    return f"""
+    WITH totals AS (
+        SELECT
+            pvf.month_start,
+            SUM(CASE
+                    WHEN LOWER(TRIM({totals_vnr_code})) IN ({_VNR_CODES_SQL_LIST})
+                        THEN 0
+                    ELSE {planned}
+                END) AS planned_total,
+            SUM({fact}) AS fact_total
+        FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+        WHERE pvf.month_start >= %s AND pvf.month_start <= %s
+        GROUP BY pvf.month_start
+    ),
+    categories AS (
+        SELECT
+            pvf.month_start,
+            {category} AS category,
+            SUM(CASE
+                    WHEN LOWER(TRIM({vnr_code})) IN ({_VNR_CODES_SQL_LIST})
+                        THEN NULL
+                    ELSE {planned}
+                END) AS planned_amount,
+            SUM({fact}) AS fact_amount
+        FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+        LEFT JOIN {TABLE_RATES} AS rates
+            ON TRIM(LOWER(rates.work_name)) = TRIM(LOWER(pvf.description))
+        WHERE pvf.month_start >= %s AND pvf.month_start <= %s
+        GROUP BY 1, 2
+    )
+    SELECT
+        totals.month_start,
+        totals.planned_total,
+        totals.fact_total,
+        categories.category,
+        categories.planned_amount,
+        categories.fact_amount
+    FROM totals
+    LEFT JOIN categories ON categories.month_start = totals.month_start
+    ORDER BY totals.month_start, categories.category;
+"""
+
+
+def _fetch_dashboard_range(conn, start: date, end: date) -> list[RangeMonthSummary]:
+    global _dashboard_range_sql
+    try:
+        with conn.cursor() as cur:
+            sql = _dashboard_range_sql
+            if sql is None:
+                cur.execute(f"SELECT * FROM {TABLE_PLAN_VS_FACT_MONTHLY} LIMIT 0")
+                sql = build_dashboard_range_sql(column[0] for column in cur.description)
+            with span("dashboard_range_query"):
+                cur.execute(sql, (start, end, start, end))
+                rows = cur.fetchall()
+    except PsycopgError:
+        # Представление могло смениться — при следующем вызове колонки проверятся заново
+        _dashboard_range_sql = None
+        raise
+    _dashboard_range_sql = sql
+    return build_dashboard_range(rows, start, end)
+
+
+@singleflight(label="fetch_dashboard_range")
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_dashboard_range",
+)
+def fetch_dashboard_range(start: date, end: date) -> tuple[list[RangeMonthSummary], datetime | None]:
+    """Помесячные итоги плана и факта за месяцы с start по end включительно.
+
+    Вместо полного дашборда на каждый месяц — один сгруппированный запрос к
+    skpdi_plan_vs_fact_monthly; результат кэшируется по водяному знаку.
+    Возвращает итоги (всегда с категориями, общие для всех вызывающих — не
+    изменять) и водяной знак.
+    """
+    start = get_month_start(start)
+    end = get_month_start(end)
+    with data_session() as session:
+        watermark = session.last_updated()
+        cache_key = (start, end, watermark)
+        months = _DASHBOARD_RANGE_CACHE.get(cache_key)
+        if months is None:
+            months = session.dashboard_range(start, end)
+            if session.fallback_age_sec is None:
+                _DASHBOARD_RANGE_CACHE.put(cache_key, months)
+    return months, watermark
 
 
 def _fetch_contract_progress(conn, _selected_month: date) -> dict[str, float] | None:
@@ -406,12 +1289,12 @@ def _fetch_contract_progress(conn, _selected_month: date) -> dict[str, float] |
     # а не выбранного пользователем периода. Поэтому месяц получения данных
     # вычисляем от сегодняшней даты.
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with span("contract"), conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(CONTRACT_TOTAL_SQL)
             contract_row = cur.fetchone() or {}
             contract_total = to_float(contract_row.get("contract_total")) or 0.0
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with span("contract"), conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(CONTRACT_EXECUTED_SQL)
             executed_row = cur.fetchone() or {}
             executed_total = to_float(executed_row.get("executed_total")) or 0.0
@@ -465,6 +1348,24 @@ def _calculate_daily_average(
     return sum(past_days_amounts) / len(past_days_amounts)
 
 
+def fetch_plan_vs_fact_for_month(
+    month_start: date,
+) -> tuple[list[DashboardItem], DashboardSummary | None, datetime | None]:
+    """
+    Читает данные из view skpdi_plan_vs_fact_monthly для конкретного месяца
+    и собирает summary. Использует потоковую обработку для оптимизации памяти.
+
+    Результат кэшируется по водяному знаку `loaded_at`: пока новая загрузка
+    не появилась, запрос стоит одного дешёвого обращения к LAST_UPDATED_SQL.
+    Одновременные запросы одного месяца объединяются (single-flight).
+    Возвращаемые модели разделяются между запросами и не должны изменяться.
+    Возвращает: (items, summary, last_updated)
+    """
+    (items, summary, last_updated), _ = _load_plan_vs_fact_for_month(month_start)
+    return list(items), summary, last_updated
+
+
+@singleflight(label="fetch_plan_vs_fact_for_month")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
@@ -472,87 +1373,440 @@ def _calculate_daily_average(
     exceptions=_DB_RETRYABLE_ERRORS,
     label="fetch_plan_vs_fact_for_month",
 )
-def fetch_plan_vs_fact_for_month(
+def _load_plan_vs_fact_for_month(month_start: date) -> tuple[DashboardResult, float | None]:
+    """Возвращает данные дашборда из кэша или собирает их из БД (общий для вызывающих результат).
+
+    Второй элемент — возраст данных, если БД была подменена снимком
+    (см. data_session), иначе None. Результат из снимка не кэшируется и не
+    становится «последним удачным»: это не подтверждение живых данных.
+    """
+    with data_session() as session:
+        last_updated = session.last_updated()
+        fallback_age_sec = session.fallback_age_sec
+        cache_key = (month_start, last_updated, date.today())
+        if fallback_age_sec is None:
+            cached = _DASHBOARD_CACHE.get(cache_key)
+            if cached is not None:
+                _LAST_GOOD_DASHBOARD.put(month_start, (cached, time.time()))
+                return cached, None
+
+        data = session.dashboard_data(month_start, last_updated)
+
+    with span("assemble"):
+        items, summary = _assemble_dashboard(month_start, data)
+    if data.last_updated is not None:
+        last_updated = data.last_updated
+
+    result = (items, summary, last_updated)
+    if fallback_age_sec is None:
+        _DASHBOARD_CACHE.put(cache_key, result)
+        _LAST_GOOD_DASHBOARD.put(month_start, (result, time.time()))
+    return result, fallback_age_sec
+
+
+def fetch_plan_vs_fact_for_month_or_stale(
     month_start: date,
-) -> tuple[list[DashboardItem], DashboardSummary | None, datetime | None]:
+    watermark: datetime | None = None,
+) -> tuple[list[DashboardItem], DashboardSummary | None, datetime | None, float | None]:
+    """То же, что fetch_plan_vs_fact_for_month, но с stale-while-revalidate.
+
+    watermark — уже известный вызывающему водяной знак: если ответ для него
+    есть в кэше, он отдаётся сразу, без фоновой загрузки. Иначе, если для
+    месяца есть результат не старше DASHBOARD_STALE_WINDOW_SEC, свежие
+    данные ждутся не дольше DASHBOARD_FRESH_TIMEOUT_SEC. Если БД не успела
+    ответить или вернула ошибку, отдаётся последний удачный результат, а
+    обновление продолжается в фоне и заменит его, когда завершится. Прочие
+    исключения (ошибки в коде сборки) пробрасываются. Четвёртый элемент —
+    возраст отданных данных в секундах, если они устаревшие, иначе None.
     """
-    Читает данные из view skpdi_plan_vs_fact_monthly для конкретного месяца
-    и собирает summary. Использует потоковую обработку для оптимизации памяти.
-    Возвращает: (items, summary, last_updated)
+    if watermark is not None:
+        cached = _DASHBOARD_CACHE.get((month_start, watermark, date.today()))
+        if cached is not None:
+            _LAST_GOOD_DASHBOARD.put(month_start, (cached, time.time()))
+            items, summary, last_updated = cached
+            return list(items), summary, last_updated, None
+
+    last_good = _get_last_good_dashboard(month_start)
+    if last_good is None:
+        (items, summary, last_updated), fallback_age_sec = _load_plan_vs_fact_for_month(month_start)
+        return list(items), summary, last_updated, fallback_age_sec
+
+    settings = get_settings()
+    future = _submit_dashboard_refresh(month_start)
+    try:
+        (items, summary, last_updated), fallback_age_sec = future.result(
+            timeout=settings.dashboard_fresh_timeout_sec
+        )
+        return list(items), summary, last_updated, fallback_age_sec
+    except FutureTimeoutError:
+        reason = "таймаут"
+    except (PsycopgError, sqlite3.Error) as exc:
+        # Сюда же попадают исчерпание пула (PoolTimeout) и обрывы соединения
+        reason = str(exc)
+
+    (items, summary, last_updated), loaded_at = last_good
+    age_sec = max(0.0, time.time() - loaded_at)
+    logger.warning(
+        "Дашборд за %s отдан из устаревшего кэша (возраст %.0f с): %s",
+        month_start,
+        age_sec,
+        reason,
+    )
+    return list(items), summary, last_updated, age_sec
+
+
+def has_last_good_dashboard(month_start: date) -> bool:
+    """Есть ли для месяца последний удачный результат, который можно отдать при сбое БД.
+
+    Если есть, вызывающему не нужно заранее ходить в БД за водяным знаком:
+    fetch_plan_vs_fact_for_month_or_stale получит его в фоновой загрузке,
+    ограниченной DASHBOARD_FRESH_TIMEOUT_SEC.
     """
+    return _get_last_good_dashboard(month_start) is not None
+
+
+def _get_last_good_dashboard(month_start: date) -> tuple[DashboardResult, float] | None:
+    settings = get_settings()
+    if settings.dashboard_stale_window_sec <= 0:
+        return None
+    last_good = _LAST_GOOD_DASHBOARD.get(month_start)
+    if last_good is not None and time.time() - last_good[1] > settings.dashboard_stale_window_sec:
+        return None
+    return last_good
+
+
+def _submit_dashboard_refresh(month_start: date) -> Future[tuple[DashboardResult, float | None]]:
+    """Запускает фоновую загрузку месяца или возвращает уже идущую."""
+    global _refresh_executor
+    with _refresh_lock:
+        future = _refresh_futures.get(month_start)
+        if future is not None and not future.done():
+            return future
+        if _refresh_executor is None:
+            # Каждая загрузка держит соединение, а в режиме parallel подзапросы
+            # берут ещё до DASHBOARD_PARALLEL_WORKERS соединений из того же
+            # пула — загрузкам остаётся его размер за вычетом этой доли
+            settings = get_settings()
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.db_pool_size - settings.dashboard_parallel_workers),
+                thread_name_prefix="dashboard-refresh",
+            )
+        future = _refresh_executor.submit(bind_context(_load_plan_vs_fact_for_month), month_start)
+        _refresh_futures[month_start] = future
+        return future
+
+
+@dataclass
+class DashboardData:
+    """Сырые данные дашборда, полученные из БД любым из режимов загрузки."""
+
     items: list[DashboardItem]
-    summary: DashboardSummary | None = None
+    # План ВНР, если его посчитала БД вместе с items; иначе считается по items
+    vnr_plan_amount: float | None = None
+    summary_row: dict[str, Any] = field(default_factory=dict)
+    daily_revenue: list[DailyRevenue] = field(default_factory=list)
+    contract_progress: dict[str, float] | None = None
     last_updated: datetime | None = None
 
+
+def _build_dashboard(
+    conn,
+    month_start: date,
+    *,
+    mode: str | None = None,
+    watermark: datetime | None = None,
+) -> DashboardResult:
+    """Загружает данные дашборда в выбранном режиме и собирает items и summary.
+
+    Режим берётся из настройки DASHBOARD_QUERY_MODE, если не передан явно.
+    Рабочие запросы идут через data_session, а эта функция сравнивает режимы
+    на одном соединении: benchmarks/run_suite.py --dashboard-month и
+    tests/test_aggregation.py. Третий элемент — водяной знак, если режим
+    получил его вместе с данными, иначе None. Переданный watermark служит
+    ключом кэша справочника расценок.
+    """
+    data = _load_dashboard_data(conn, month_start, mode=mode, watermark=watermark)
+    with span("assemble"):
+        items, summary = _assemble_dashboard(month_start, data)
+    return items, summary, data.last_updated
+
+
+def _load_dashboard_data(
+    conn,
+    month_start: date,
+    *,
+    mode: str | None = None,
+    watermark: datetime | None = None,
+    release_connection: Callable[[BaseException | None], None] | None = None,
+) -> DashboardData:
+    """Загружает сырые данные дашборда из PostgreSQL в режиме DASHBOARD_QUERY_MODE.
+
+    release_connection передаётся режиму parallel (см. _load_dashboard_parallel).
+    """
+    mode = mode or get_settings().dashboard_query_mode
+    if mode == "combined":
+        return _load_dashboard_combined(conn, month_start, watermark)
+    if mode == "parallel":
+        return _load_dashboard_parallel(conn, month_start, watermark, release_connection=release_connection)
+    return _load_dashboard_multi(conn, month_start, watermark)
+
+
+def _load_dashboard_multi(
+    conn,
+    month_start: date,
+    watermark: datetime | None = None,
+) -> DashboardData:
+    """Загружает данные дашборда последовательными запросами на одном соединении."""
+    items, vnr_plan_amount = _fetch_items(conn, month_start, watermark)
+    daily_revenue = _fetch_daily_fact_totals(conn, month_start)
+    contract_progress = _fetch_contract_progress(conn, month_start)
+    summary_row = _fetch_summary_row(conn, month_start)
+
+    return DashboardData(
+        items=items,
+        vnr_plan_amount=vnr_plan_amount,
+        summary_row=summary_row,
+        daily_revenue=daily_revenue,
+        contract_progress=contract_progress,
+    )
+
+
+def _load_dashboard_parallel(
+    conn,
+    month_start: date,
+    watermark: datetime | None = None,
+    *,
+    release_connection: Callable[[BaseException | None], None] | None = None,
+) -> DashboardData:
+    """Загружает данные дашборда, выполняя независимые подзапросы одновременно.
+
+    Строки items читаются на уже полученном соединении, остальные подзапросы
+    уходят в общий пул потоков и берут собственные соединения из пула БД.
+    Время ответа определяется самым медленным запросом, а не их суммой.
+
+    Поток, который держит соединение и ждёт подзапросы, которым нужны
+    соединения того же пула, при нескольких одновременных запросах исчерпал
+    бы пул. Поэтому после items соединение conn возвращается в пул через
+    release_connection (ему передаётся ошибка чтения items или None) ещё до
+    ожидания подзапросов. Без release_connection (бенчмарки на одном
+    соединении) пул должен вмещать DB_POOL_MAX_SIZE >= одновременные
+    загрузки × (DASHBOARD_PARALLEL_WORKERS + 1).
+    """
+    executor = _get_query_executor()
+    daily_future = executor.submit(
+        bind_context(_run_on_new_connection), _fetch_daily_fact_totals, month_start
+    )
+    contract_future = executor.submit(
+        bind_context(_run_on_new_connection), _fetch_contract_progress, month_start
+    )
+    summary_future = executor.submit(
+        bind_context(_run_on_new_connection), _fetch_summary_row, month_start
+    )
+
+    items_error: BaseException | None = None
+    try:
+        items, vnr_plan_amount = _fetch_items(conn, month_start, watermark)
+    except BaseException as exc:
+        items_error = exc
+        raise
+    finally:
+        if release_connection is not None:
+            release_connection(items_error)
+        # Даже при ошибке дожидаемся подзапросов, чтобы они вернули соединения в пул
+        wait_futures((daily_future, contract_future, summary_future))
+
+    daily_revenue = daily_future.result()
+    contract_progress = contract_future.result()
+    summary_row = summary_future.result()
+    return DashboardData(
+        items=items,
+        vnr_plan_amount=vnr_plan_amount,
+        summary_row=summary_row,
+        daily_revenue=daily_revenue,
+        contract_progress=contract_progress,
+    )
+
+
+def _get_query_executor() -> ThreadPoolExecutor:
+    global _query_executor
+    if _query_executor is None:
+        with _query_executor_lock:
+            if _query_executor is None:
+                _query_executor = ThreadPoolExecutor(
+                    max_workers=get_settings().dashboard_parallel_workers,
+                    thread_name_prefix="dashboard-query",
+                )
+    return _query_executor
+
+
+def cache_stats() -> dict[str, tuple[int, int]]:
+    """Попадания и промахи кэшей этого модуля: имя кэша -> (hits, misses)."""
+    return {
+        "dashboard": (_DASHBOARD_CACHE.hits, _DASHBOARD_CACHE.misses),
+        "dashboard_last_good": (_LAST_GOOD_DASHBOARD.hits, _LAST_GOOD_DASHBOARD.misses),
+        "dashboard_range": (_DASHBOARD_RANGE_CACHE.hits, _DASHBOARD_RANGE_CACHE.misses),
+        "rates": (_RATES_CACHE.hits, _RATES_CACHE.misses),
+        "work_breakdown": (_WORK_BREAKDOWN_CACHE.hits, _WORK_BREAKDOWN_CACHE.misses),
+    }
+
+
+def shutdown_query_executor() -> None:
+    """Останавливает пулы потоков параллельного режима и фоновых обновлений."""
+    global _query_executor, _refresh_executor
+    with _query_executor_lock:
+        if _query_executor is not None:
+            _query_executor.shutdown(wait=True)
+            _query_executor = None
+    with _refresh_lock:
+        refresh_executor, _refresh_executor = _refresh_executor, None
+        _refresh_futures.clear()
+    if refresh_executor is not None:
+        # Обновление может висеть на недоступной БД — не задерживаем остановку
+        refresh_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_on_new_connection(func: Callable[..., T], *args: Any) -> T:
+    """Выполняет функцию вида func(conn, *args) на отдельном соединении из пула."""
     with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(ITEMS_SQL, (month_start,))
-            items = _aggregate_items_streaming(cur)
+        return func(conn, *args)
 
-        vnr_plan_amount = _calculate_vnr_plan(items)
-        vnr_plan_item = _build_vnr_plan_item(vnr_plan_amount, items)
-        if vnr_plan_item:
-            items.append(vnr_plan_item)
 
-        month_fact_total = sum(item.fact_amount or 0.0 for item in items if item.fact_amount is not None)
+def _fetch_summary_row(conn, month_start: date) -> dict[str, Any]:
+    """Возвращает итоговые суммы плана и факта за месяц (SUMMARY_SQL)."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with span("summary"):
+            cur.execute(SUMMARY_SQL, (month_start,))
+        return dict(cur.fetchone() or {})
+
+
+def _load_dashboard_combined(
+    conn,
+    month_start: date,
+    watermark: datetime | None = None,
+) -> DashboardData:
+    """Загружает все данные дашборда одним запросом (один сетевой round trip).
+
+    Если объединённый запрос падает не из-за соединения (например, нет одной
+    из таблиц контракта), откатывает транзакцию и переходит на режим multi,
+    в котором такие ошибки обрабатываются по отдельности.
+    """
+    daily_sql, daily_params = _daily_fact_totals_query(month_start)
+    sql = DASHBOARD_COMBINED_SQL_TEMPLATE.format(daily_sql=daily_sql.rstrip(";"))
+    params = (month_start, month_start, *daily_params)
 
-        daily_revenue = _fetch_daily_fact_totals(conn, month_start)
-        average_daily_revenue = _calculate_daily_average(
+    try:
+        with span("combined_query"), conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone() or {}
+    except _DB_RETRYABLE_ERRORS:
+        raise
+    except PsycopgError as exc:
+        logger.warning(
+            "Объединённый запрос дашборда за %s завершился ошибкой: %s. "
+            "Переключаюсь на последовательные запросы.",
             month_start,
-            daily_revenue,
-            month_fact_total,
+            exc,
         )
+        conn.rollback()
+        return _load_dashboard_multi(conn, month_start, watermark)
+
+    return DashboardData(
+        items=_aggregate_item_dicts(row.get("items") or []),
+        summary_row={
+            key: row.get(key)
+            for key in ("planned_total", "fact_total", "completion_pct", "delta_amount")
+        },
+        daily_revenue=build_daily_revenue(row.get("daily_revenue") or []),
+        contract_progress={
+            "contract_total": to_float(row.get("contract_total")) or 0.0,
+            "executed_total": to_float(row.get("executed_total")) or 0.0,
+        },
+        last_updated=row.get("last_updated"),
+    )
 
-        contract_progress = _fetch_contract_progress(conn, month_start)
 
-        last_updated = _fetch_last_updated(conn)
+def _assemble_dashboard(
+    month_start: date,
+    data: DashboardData,
+) -> tuple[list[DashboardItem], DashboardSummary | None]:
+    """Собирает items и summary из сырых данных: план ВНР, среднее, контракт."""
+    items = data.items
+    summary: DashboardSummary | None = None
+    summary_row = data.summary_row
+    daily_revenue = data.daily_revenue
+    contract_progress = data.contract_progress
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(SUMMARY_SQL, (month_start,))
-            summary_row = cur.fetchone() or {}
-            has_financial_data = (
-                summary_row.get("planned_total") is not None
-                or summary_row.get("fact_total") is not None
-                or bool(daily_revenue)
-            )
-            if has_financial_data:
-                summary = DashboardSummary(
-                    planned_amount=to_float(summary_row.get("planned_total")) or 0.0,
-                    fact_amount=to_float(summary_row.get("fact_total")) or 0.0,
-                    completion_pct=to_float(summary_row.get("completion_pct")),
-                    delta_amount=to_float(summary_row.get("delta_amount")) or 0.0,
-                    average_daily_revenue=average_daily_revenue,
-                    daily_revenue=daily_revenue,
-                )
+    vnr_plan_amount = data.vnr_plan_amount
+    if vnr_plan_amount is None:
+        vnr_plan_amount = _calculate_vnr_plan(items)
+    vnr_plan_item = _build_vnr_plan_item(vnr_plan_amount, items)
+    if vnr_plan_item:
+        items.append(vnr_plan_item)
 
-        if summary is None and contract_progress is not None:
-            summary = DashboardSummary(
-                planned_amount=0.0,
-                fact_amount=0.0,
-                completion_pct=None,
-                delta_amount=0.0,
-                contract_amount=contract_progress.get("contract_total"),
-                contract_executed=contract_progress.get("executed_total"),
-                contract_completion_pct=None,
-                average_daily_revenue=average_daily_revenue,
-                daily_revenue=daily_revenue,
-            )
+    month_fact_total = sum(item.fact_amount or 0.0 for item in items if item.fact_amount is not None)
 
-        if summary and contract_progress is not None:
-            summary.contract_amount = contract_progress.get("contract_total")
-            summary.contract_executed = contract_progress.get("executed_total")
-            if summary.contract_amount:
-                summary.contract_completion_pct = summary.contract_executed / summary.contract_amount
+    average_daily_revenue = _calculate_daily_average(
+        month_start,
+        daily_revenue,
+        month_fact_total,
+    )
+
+    has_financial_data = (
+        summary_row.get("planned_total") is not None
+        or summary_row.get("fact_total") is not None
+        or bool(daily_revenue)
+    )
+    if has_financial_data:
+        summary = DashboardSummary(
+            planned_amount=to_float(summary_row.get("planned_total")) or 0.0,
+            fact_amount=to_float(summary_row.get("fact_total")) or 0.0,
+            completion_pct=to_float(summary_row.get("completion_pct")),
+            delta_amount=to_float(summary_row.get("delta_amount")) or 0.0,
+            average_daily_revenue=average_daily_revenue,
+            daily_revenue=daily_revenue,
+        )
 
-        summary = _update_summary_with_vnr_plan(
-            summary=summary,
-            plan_adjustment=vnr_plan_amount,
-            items=items,
+    if summary is None and contract_progress is not None:
+        summary = DashboardSummary(
+            planned_amount=0.0,
+            fact_amount=0.0,
+            completion_pct=None,
+            delta_amount=0.0,
+            contract_amount=contract_progress.get("contract_total"),
+            contract_executed=contract_progress.get("executed_total"),
+            contract_completion_pct=None,
             average_daily_revenue=average_daily_revenue,
             daily_revenue=daily_revenue,
         )
 
-    return items, summary, last_updated
+    if summary and contract_progress is not None:
+        summary.contract_amount = contract_progress.get("contract_total")
+        summary.contract_executed = contract_progress.get("executed_total")
+        if summary.contract_amount:
+            summary.contract_completion_pct = summary.contract_executed / summary.contract_amount
+
+    summary = _update_summary_with_vnr_plan(
+        summary=summary,
+        plan_adjustment=vnr_plan_amount,
+        items=items,
+        average_daily_revenue=average_daily_revenue,
+        daily_revenue=daily_revenue,
+    )
+
+    return items, summary
+
+
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_last_updated",
+)
+def fetch_last_updated() -> datetime | None:
+    """Возвращает водяной знак последней загрузки (MAX(loaded_at)) одним лёгким запросом."""
+    with data_session() as session:
+        return session.last_updated()
 
 
 @db_retry(
@@ -564,8 +1818,8 @@ def fetch_plan_vs_fact_for_month(
 )
 def fetch_available_months(limit: int = 12) -> list[date]:
     """Возвращает список месяцев, за которые есть данные."""
-    with get_connection() as conn:
-        return _fetch_dates(conn, AVAILABLE_MONTHS_SQL, (limit,))
+    with data_session() as session:
+        return session.available_months(limit)
 
 
 @db_retry(
@@ -577,19 +1831,11 @@ def fetch_available_months(limit: int = 12) -> list[date]:
 )
 def fetch_available_days() -> list[date]:
     """Возвращает список дат текущего месяца (через билдер), по которым есть фактические данные."""
-    with get_connection() as conn:
-        sql, params = (
-            FactQueryBuilder()
-            .distinct()
-            .select("date_done::date AS work_date")
-            .current_month()
-            .status()
-            .order_by("work_date DESC")
-            .build()
-        )
-        return _fetch_dates(conn, sql, params)
+    with data_session() as session:
+        return session.available_days()
 
 
+@singleflight(label="fetch_daily_report")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
@@ -598,44 +1844,16 @@ def fetch_available_days() -> list[date]:
     label="fetch_daily_report",
 )
 def fetch_daily_report(target_date: date) -> DailyReportResponse:
-    """Возвращает детализацию фактических работ за выбранный день, используя билдер."""
-    target_date = target_date or date.today()
-
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            sql, params = (
-                FactQueryBuilder()
-                .select(
-                    "COALESCE(smeta_code, '') AS smeta_code",
-                    "COALESCE(smeta_section, '') AS smeta_section",
-                    "COALESCE(description, '') AS description",
-                    "unit",
-                    "SUM(total_volume) AS total_volume",
-                    "SUM(total_amount) AS total_amount",
-                )
-                .date_equals(target_date)
-                .status()
-                .group_by("smeta_code", "smeta_section", "description", "unit")
-                .order_by("total_amount DESC NULLS LAST", "description")
-                .build()
-            )
-            cur.execute(sql, params)
-            rows = cur.fetchall() or []
+    """Возвращает детализацию фактических работ за выбранный день, используя билдер.
 
-        last_updated = _fetch_last_updated(conn)
+    Одновременные запросы одной даты объединяются (single-flight), поэтому
+    ответ разделяется между ними и не должен изменяться.
+    """
+    target_date = target_date or date.today()
 
-    items: list[DailyReportItem] = []
-    for row in rows:
-        items.append(
-            DailyReportItem(
-                smeta=normalize_string(row.get("smeta_code")) or None,
-                work_type=normalize_string(row.get("smeta_section")) or None,
-                description=normalize_string(row.get("description"), default="Без названия"),
-                unit=normalize_string(row.get("unit")) or None,
-                total_volume=to_float(row.get("total_volume")),
-                total_amount=to_float(row.get("total_amount")),
-            )
-        )
+    with data_session() as session:
+        items = session.daily_report_items(target_date)
+        last_updated = session.last_updated()
 
     return DailyReportResponse(
         date=target_date,
@@ -645,12 +1863,154 @@ def fetch_daily_report(target_date: date) -> DailyReportResponse:
     )
 
 
+def build_daily_report_item(row: Mapping[str, Any]) -> DailyReportItem:
+    """Строка отчёта за день из полей smeta_code, smeta_section, description, unit и сумм."""
+    return DailyReportItem(
+        smeta=normalize_string(row.get("smeta_code")) or None,
+        work_type=normalize_string(row.get("smeta_section")) or None,
+        description=normalize_string(row.get("description"), default="Без названия"),
+        unit=normalize_string(row.get("unit")) or None,
+        total_volume=to_float(row.get("total_volume")),
+        total_amount=to_float(row.get("total_amount")),
+    )
+
+
+def _fetch_daily_report_items(conn, target_date: date) -> list[DailyReportItem]:
+    """Детализация фактических работ за день, сгруппированная по смете и работе."""
+    sql, params = (
+        FactQueryBuilder()
+        .select(
+            "COALESCE(smeta_code, '') AS smeta_code",
+            "COALESCE(smeta_section, '') AS smeta_section",
+            "COALESCE(description, '') AS description",
+            "unit",
+            "SUM(total_volume) AS total_volume",
+            "SUM(total_amount) AS total_amount",
+        )
+        .date_equals(target_date)
+        .status()
+        .group_by("smeta_code", "smeta_section", "description", "unit")
+        .order_by("total_amount DESC NULLS LAST", "description")
+        .build()
+    )
+
+    # Строки читаются порциями серверного курсора и сразу превращаются в модели
+    with span("daily_report_query"), streaming_cursor(
+        conn, "daily_report", cursor_factory=RealDictCursor
+    ) as cur:
+        cur.execute(sql, params)
+        return [build_daily_report_item(row) for row in cur]
+
+
 def _fetch_last_updated(conn) -> datetime | None:
     """Возвращает максимальный loaded_at из агрегаций или None."""
 
     with conn.cursor() as cur:
-        cur.execute(LAST_UPDATED_SQL)
+        with span("db_watermark"):
+            cur.execute(LAST_UPDATED_SQL)
         res = cur.fetchone()
         if not res:
             return None
         return res[0]
+
+
+def _fetch_available_days(conn) -> list[date]:
+    sql, params = (
+        FactQueryBuilder()
+        .distinct()
+        .select("date_done::date AS work_date")
+        .current_month()
+        .status()
+        .order_by("work_date DESC")
+        .build()
+    )
+    return _fetch_dates(conn, sql, params)
+
+
+class _PostgresSession:
+    """Сессия основного источника: все чтения идут по одному соединению из пула.
+
+    Соединение можно вернуть в пул до конца сессии (release_connection);
+    следующее чтение возьмёт новое.
+    """
+
+    source_name = "postgres"
+    fallback_age_sec: float | None = None
+
+    def __init__(self) -> None:
+        self._connection: AbstractContextManager | None = None
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            return self.acquire_connection()
+        return self._conn
+
+    def acquire_connection(self):
+        """Берёт соединение из пула (PoolTimeout, если пул его не выдал)."""
+        connection = get_connection()
+        self._conn = connection.__enter__()
+        self._connection = connection
+        return self._conn
+
+    def release_connection(self, error: BaseException | None = None) -> None:
+        """Возвращает соединение в пул; при ошибке пул сам решает, закрыть ли его."""
+        connection, self._connection, self._conn = self._connection, None, None
+        if connection is None:
+            return
+        if error is None:
+            connection.__exit__(None, None, None)
+        else:
+            connection.__exit__(type(error), error, error.__traceback__)
+
+    def last_updated(self) -> datetime | None:
+        return _fetch_last_updated(self.conn)
+
+    def dashboard_data(self, month_start: date, watermark: datetime | None) -> DashboardData:
+        return _load_dashboard_data(
+            self.conn,
+            month_start,
+            watermark=watermark,
+            release_connection=self.release_connection,
+        )
+
+    def available_months(self, limit: int) -> list[date]:
+        return _fetch_dates(self.conn, AVAILABLE_MONTHS_SQL, (limit,))
+
+    def available_days(self) -> list[date]:
+        return _fetch_available_days(self.conn)
+
+    def daily_report_items(self, target_date: date) -> list[DailyReportItem]:
+        return _fetch_daily_report_items(self.conn, target_date)
+
+    def work_daily_breakdown(self, month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
+        return _fetch_work_daily_breakdown(self.conn, month_start, work_identifier)
+
+    def work_breakdown_cube(self, month_start: date) -> WorkBreakdownCube:
+        return _fetch_work_breakdown_cube(self.conn, month_start)
+
+    def work_breakdown_batch(self, months: Sequence[date], works: Sequence[str]) -> WorkBreakdownBatch:
+        return _fetch_work_breakdown_batch(self.conn, months, works)
+
+    def dashboard_range(self, start: date, end: date) -> list[RangeMonthSummary]:
+        return _fetch_dashboard_range(self.conn, start, end)
+
+
+class PostgresDataSource:
+    """Основной источник данных: рабочая БД через пул соединений (app/db.py)."""
+
+    name = "postgres"
+
+    @contextmanager
+    def session(self) -> Iterator[_PostgresSession]:
+        session = _PostgresSession()
+        # Соединение берётся сразу: если пул его не выдал, data_session
+        # перейдёт на снимок ещё до первого чтения
+        session.acquire_connection()
+        try:
+            yield session
+        except BaseException as exc:
+            session.release_connection(exc)
+            raise
+        session.release_connection()
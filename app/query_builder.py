@@ -11,6 +11,8 @@ from __future__ import annotations
 
 from typing import List, Tuple
 
+from .constants import TABLE_FACT_WITH_MONEY
+
 
 class FactQueryBuilder:
     """Fluent-билдер для запросов к `skpdi_fact_with_money`.
@@ -29,7 +31,7 @@ class FactQueryBuilder:
         )
     """
 
-    TABLE = "skpdi_fact_with_money"
+    TABLE = TABLE_FACT_WITH_MONEY
 
     def __init__(self) -> None:
         self._select: List[str] = []
@@ -80,6 +82,16 @@ class FactQueryBuilder:
         self._params.append(pattern)
         return self
 
+    def description_in(self, values) -> "FactQueryBuilder":
+        self._where.append("description::text = ANY(%s)")
+        self._params.append(list(values))
+        return self
+
+    def months_in(self, months) -> "FactQueryBuilder":
+        self._where.append("date_trunc('month', date_done)::date = ANY(%s)")
+        self._params.append(list(months))
+        return self
+
     def raw_where(self, clause: str) -> "FactQueryBuilder":
         if clause:
             self._where.append(clause)
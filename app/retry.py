@@ -8,6 +8,8 @@ from typing import Any, Callable, TypeVar
 
 from psycopg2 import InterfaceError, OperationalError
 
+from .metrics import DB_RETRY_ATTEMPTS, DB_RETRY_EXHAUSTED
+
 T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
@@ -45,11 +47,13 @@ def db_retry(
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         is_async = asyncio.iscoroutinefunction(func)
+        operation = label or func.__name__
 
         def _log_retry(attempt: int, current_delay: float, total: int, exc: Exception) -> None:
+            DB_RETRY_ATTEMPTS.inc(operation)
             log.warning(
                 "Ошибка при выполнении %s, повтор через %.2f с (попытка %d/%d): %s",
-                label or func.__name__,
+                operation,
                 current_delay,
                 attempt,
                 total,
@@ -68,6 +72,7 @@ def db_retry(
                         return await func(*args, **kwargs)
                     except exceptions as exc:  # noqa: BLE001
                         if attempt >= retries:
+                            DB_RETRY_EXHAUSTED.inc(operation)
                             raise
                         attempt += 1
                         _log_retry(attempt, current_delay, total_attempts, exc)
@@ -86,6 +91,7 @@ def db_retry(
                     return func(*args, **kwargs)
                 except exceptions as exc:  # noqa: BLE001
                     if attempt >= retries:
+                        DB_RETRY_EXHAUSTED.inc(operation)
                         raise
                     attempt += 1
                     _log_retry(attempt, current_delay, total_attempts, exc)
@@ -1,21 +1,38 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import Annotated
+from datetime import date, datetime
+import hashlib
+import logging
+import sqlite3
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Query, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.responses import Response
+from psycopg2 import Error as PsycopgError
+from pydantic import BaseModel
 
-from ..models import DashboardResponse
+from .. import __version__
+from ..models import DashboardRangeResponse, DashboardResponse
 from ..visit_logger import VisitLogRequest, log_dashboard_visit
-from ..pdf import build_dashboard_pdf
+from ..pdf_cache import get_pdf_cache
+from ..pdf_renderer import PdfRenderBusyError, render_dashboard_pdf
+from ..timing import span
 from ..queries import (
     fetch_available_days,
     fetch_available_months,
+    fetch_dashboard_range,
     fetch_daily_report,
+    fetch_last_updated,
     fetch_plan_vs_fact_for_month,
+    fetch_plan_vs_fact_for_month_or_stale,
+    fetch_work_breakdown_batch,
+    fetch_work_breakdown_page,
     fetch_work_daily_breakdown,
+    has_last_good_dashboard,
 )
+from ..utils import get_month_start
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -29,49 +46,241 @@ DayQuery = Annotated[
     Query(..., description="Дата в формате 2025-11-15"),
 ]
 
+# Самый длинный диапазон /dashboard/range — два года помесячно
+DASHBOARD_RANGE_MAX_MONTHS = 24
+
+# Страница /dashboard/work-breakdown/all: число работ по умолчанию и максимум
+WORK_BREAKDOWN_ALL_DEFAULT_LIMIT = 200
+WORK_BREAKDOWN_ALL_MAX_LIMIT = 1000
+
+# Ограничения пакетной расшифровки: один запрос не должен читать весь факт за годы
+WORK_BREAKDOWN_BATCH_MAX_WORKS = 50
+WORK_BREAKDOWN_BATCH_MAX_MONTHS = 12
+
+# Ответы можно хранить, но перед использованием браузер обязан их перепроверить
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Помечает ответ, собранный из последних удачных данных, пока БД не отвечает;
+# возраст таких данных передаётся в стандартном заголовке Age
+STALE_HEADER = "X-Data-Stale"
+
+
+def _make_etag(last_updated: datetime | None, *parts: Any) -> str:
+    """Строгий ETag из водяного знака загрузки, версии приложения и параметров запроса."""
+
+    watermark = last_updated.isoformat() if last_updated else "none"
+    raw = "|".join([__version__, watermark, *(str(part) for part in parts)])
+    return f'"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+
+def _mark_stale(response: Response, age_sec: float | None) -> None:
+    if age_sec is None:
+        return
+    response.headers[STALE_HEADER] = "1"
+    response.headers["Age"] = str(int(age_sec))
+
+
+def _json_response(payload: BaseModel, response: Response) -> Response:
+    """Сериализует модель явно (замер serialize) и переносит заголовки из response.
+
+    FastAPI сериализует возвращённую модель уже после выхода из обработчика,
+    вне замеров; готовый Response отдаётся как есть.
+    """
+
+    with span("serialize"):
+        body = payload.model_dump_json()
+    result = Response(content=body, media_type="application/json")
+    result.headers.raw.extend(response.headers.raw)
+    return result
+
+
+def _log_visit(request: Request) -> None:
+    with span("visit_log"):
+        log_dashboard_visit(request=request, endpoint=str(request.url.path))
+
+
+def _check_not_modified(request: Request, *parts: Any) -> tuple[str, Response | None]:
+    """Вычисляет текущий ETag и готовит ответ 304, если клиентская копия актуальна.
+
+    Проверка стоит одного лёгкого запроса водяного знака; при совпадении
+    ETag тяжёлые запросы не выполняются вовсе.
+    """
+
+    etag = _make_etag(fetch_last_updated(), request.url.path, *parts)
+    if not _etag_matches(request, etag):
+        return etag, None
+    not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    _set_etag(not_modified, etag)
+    return etag, not_modified
+
 
 @router.get("/dashboard", response_model=DashboardResponse)
-def get_dashboard(month: MonthQuery, request: Request) -> DashboardResponse:
-    """Основной эндпоинт для дашборда."""
+def get_dashboard(month: MonthQuery, request: Request, response: Response) -> Any:
+    """Основной эндпоинт для дашборда.
 
-    items, summary, last_updated = fetch_plan_vs_fact_for_month(month)
+    Поддерживает If-None-Match: среднедневная выручка текущего месяца зависит
+    от сегодняшней даты, поэтому она тоже входит в ETag. Если для месяца
+    есть последние удачные данные, запрос сразу идёт в stale-while-revalidate:
+    водяной знак читается в фоновой загрузке, а при медленной или
+    недоступной БД через DASHBOARD_FRESH_TIMEOUT_SEC отдаются эти данные
+    с заголовками X-Data-Stale и Age. Без них ETag сначала сверяется по
+    одному лёгкому запросу водяного знака, и 304 отдаётся без тяжёлых
+    запросов. В обоих случаях тяжёлые запросы при неизменном водяном знаке
+    не выполняются: результат берётся из кэша.
+    """
+
+    today = date.today()
+    watermark: datetime | None = None
+    # При наличии последних удачных данных ожидание пула и повтор db_retry
+    # здесь задержали бы устаревший ответ — водяной знак читает фоновая загрузка
+    if not has_last_good_dashboard(month):
+        try:
+            watermark = fetch_last_updated()
+        except (PsycopgError, sqlite3.Error) as exc:
+            logger.warning("Не удалось получить водяной знак для ETag дашборда: %s", exc)
+        else:
+            etag = _make_etag(watermark, request.url.path, month, today)
+            if _etag_matches(request, etag):
+                _log_visit(request)
+                not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+                _set_etag(not_modified, etag)
+                return not_modified
+
+    items, summary, last_updated, stale_age_sec = fetch_plan_vs_fact_for_month_or_stale(month, watermark)
+
+    _log_visit(request)
 
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
+    etag = _make_etag(last_updated, request.url.path, month, today)
+    if _etag_matches(request, etag):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        _set_etag(not_modified, etag)
+        _mark_stale(not_modified, stale_age_sec)
+        return not_modified
 
-    return DashboardResponse(
+    _set_etag(response, etag)
+    _mark_stale(response, stale_age_sec)
+    payload = DashboardResponse(
         month=month,
         last_updated=last_updated,
         summary=summary,
         items=items,
         has_data=bool(items),
     )
+    return _json_response(payload, response)
+
+
+@router.get("/dashboard/range", response_model=DashboardRangeResponse)
+def get_dashboard_range(
+    start: MonthQuery,
+    end: MonthQuery,
+    request: Request,
+    response: Response,
+    categories: Annotated[bool, Query(description="Добавить итоги по категориям")] = False,
+) -> Any:
+    """Помесячные итоги плана и факта за диапазон месяцев (start и end включительно).
+
+    Для графиков динамики: один сгруппированный запрос вместо полного
+    /dashboard на каждый месяц. План включает план внерегламента, как в
+    summary дашборда. Поддерживает If-None-Match.
+    """
+    start = get_month_start(start)
+    end = get_month_start(end)
+    months_count = (end.year - start.year) * 12 + end.month - start.month + 1
+    if months_count < 1 or months_count > DASHBOARD_RANGE_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Диапазон должен содержать от 1 до {DASHBOARD_RANGE_MAX_MONTHS} месяцев",
+        )
+
+    etag, not_modified = _check_not_modified(request, start, end, categories)
+    if not_modified is not None:
+        return not_modified
+
+    months, last_updated = fetch_dashboard_range(start, end)
+    if not categories:
+        months = [month.model_copy(update={"categories": None}) for month in months]
+    _set_etag(response, etag)
+    payload = DashboardRangeResponse(start=start, end=end, last_updated=last_updated, months=months)
+    return _json_response(payload, response)
 
 
 @router.get("/dashboard/pdf")
 def get_dashboard_pdf(month: MonthQuery, request: Request) -> Response:
-    """Отдаёт тот же отчёт, но сразу в формате PDF."""
+    """Отдаёт тот же отчёт, но сразу в формате PDF.
 
-    items, summary, last_updated = fetch_plan_vs_fact_for_month(month)
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
-    pdf_bytes = build_dashboard_pdf(month, last_updated, items, summary)
+    Готовые файлы кэшируются на диске по водяному знаку загрузки: повторная
+    выгрузка того же месяца стоит одного лёгкого запроса и чтения файла.
+    """
+
+    _log_visit(request)
     file_name = f"mad-podolsk-otchet-{month.strftime('%Y-%m')}.pdf"
     headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+
+    pdf_cache = get_pdf_cache()
+    if pdf_cache.enabled:
+        last_updated = fetch_last_updated()
+        with span("pdf_cache_read"):
+            cached_pdf = pdf_cache.get(pdf_cache.make_key(month, last_updated))
+        if cached_pdf is not None:
+            return Response(content=cached_pdf, media_type="application/pdf", headers=headers)
+
+    items, summary, last_updated = fetch_plan_vs_fact_for_month(month)
+    try:
+        pdf_bytes = render_dashboard_pdf(month, last_updated, items, summary)
+    except PdfRenderBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_sec)},
+        ) from exc
+    with span("pdf_cache_write"):
+        pdf_cache.put(pdf_cache.make_key(month, last_updated), pdf_bytes)
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
 
 
 @router.get("/dashboard/months")
-def get_available_months(limit: Annotated[int | None, Query(gt=0, le=24)] = 12) -> dict[str, list[date]]:
+def get_available_months(
+    request: Request,
+    response: Response,
+    limit: Annotated[int | None, Query(gt=0, le=24)] = 12,
+) -> Any:
     """Возвращает список месяцев, для которых есть данные."""
 
-    months = fetch_available_months(limit=limit or 12)
+    limit = limit or 12
+    etag, not_modified = _check_not_modified(request, limit)
+    if not_modified is not None:
+        return not_modified
+
+    months = fetch_available_months(limit=limit)
+    _set_etag(response, etag)
     return {"months": months}
 
 
 @router.get("/dashboard/days")
-def get_available_days() -> dict[str, list[date]]:
+def get_available_days(request: Request, response: Response) -> Any:
     """Возвращает дни текущего месяца, для которых есть данные факта."""
 
+    # Набор дней привязан к текущему месяцу, поэтому сегодняшняя дата входит в ETag
+    today = date.today()
+    etag, not_modified = _check_not_modified(request, today)
+    if not_modified is not None:
+        return not_modified
+
     days = fetch_available_days()
+    _set_etag(response, etag)
     return {"days": days}
 
 
@@ -95,20 +304,20 @@ def log_dashboard_visit_endpoint(payload: VisitLogRequest, request: Request) ->
 
 
 @router.get("/dashboard/daily")
-def get_daily_report(day: DayQuery, request: Request):
+def get_daily_report(day: DayQuery, request: Request, response: Response):
     """Возвращает детализацию принятых работ за конкретный день."""
 
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
-    return fetch_daily_report(day)
+    _log_visit(request)
+    _, not_modified = _check_not_modified(request, day)
+    if not_modified is not None:
+        return not_modified
 
+    report = fetch_daily_report(day)
+    _set_etag(response, _make_etag(report.last_updated, request.url.path, day))
+    return _json_response(report, response)
 
-@router.get("/dashboard/work-breakdown")
-def get_work_breakdown(month: MonthQuery, work: Annotated[str, Query(..., description="Название вида работы")]) -> list[dict]:
-    """Возвращает подневную расшифровку объёмов (`total_volume`) по указанной работе за месяц.
 
-    Возвращает массив объектов с полями `date`, `amount` и `unit`.
-    """
-    rows = fetch_work_daily_breakdown(month, work)
+def _work_breakdown_rows(rows) -> list[dict]:
     return [
         {
             "date": r.date.isoformat(),
@@ -118,3 +327,91 @@ def get_work_breakdown(month: MonthQuery, work: Annotated[str, Query(..., descri
         }
         for r in rows
     ]
+
+
+@router.get("/dashboard/work-breakdown")
+def get_work_breakdown(month: MonthQuery, work: Annotated[str, Query(..., description="Название вида работы")]) -> list[dict]:
+    """Возвращает подневную расшифровку объёмов (`total_volume`) по указанной работе за месяц.
+
+    Возвращает массив объектов с полями `date`, `amount` и `unit`.
+    """
+    rows = fetch_work_daily_breakdown(month, work)
+    return _work_breakdown_rows(rows)
+
+
+@router.get("/dashboard/work-breakdown/batch")
+def get_work_breakdown_batch(
+    request: Request,
+    response: Response,
+    work: Annotated[
+        list[str],
+        Query(
+            min_length=1,
+            max_length=WORK_BREAKDOWN_BATCH_MAX_WORKS,
+            description="Названия работ (параметр повторяется)",
+        ),
+    ],
+    month: Annotated[
+        list[date] | None,
+        Query(
+            max_length=WORK_BREAKDOWN_BATCH_MAX_MONTHS,
+            description="Месяцы (параметр повторяется); по умолчанию текущий",
+        ),
+    ] = None,
+) -> Any:
+    """Подневные расшифровки нескольких работ одним запросом к БД.
+
+    Работы сопоставляются с описанием точно. Ключи `works` — запрошенные
+    названия, значения — массивы в формате /dashboard/work-breakdown, дни
+    всех запрошенных месяцев идут подряд по возрастанию даты.
+    """
+    months = sorted({get_month_start(value) for value in month or [date.today()]})
+    works = list(dict.fromkeys(name.strip() for name in work if name.strip()))
+    etag, not_modified = _check_not_modified(request, months, works)
+    if not_modified is not None:
+        return not_modified
+
+    breakdowns = fetch_work_breakdown_batch(months, works)
+    _set_etag(response, etag)
+    return {
+        "months": months,
+        "works": {name: _work_breakdown_rows(rows) for name, rows in breakdowns.items()},
+    }
+
+
+@router.get("/dashboard/work-breakdown/all")
+def get_work_breakdown_all(
+    month: MonthQuery,
+    request: Request,
+    response: Response,
+    limit: Annotated[int, Query(gt=0, le=WORK_BREAKDOWN_ALL_MAX_LIMIT)] = WORK_BREAKDOWN_ALL_DEFAULT_LIMIT,
+    offset: Annotated[int, Query(ge=0)] = 0,
+) -> Any:
+    """Подневная расшифровка работ месяца постранично.
+
+    Фронтенд может загрузить её при открытии месяца и показывать расшифровку
+    любой строки без запросов. Работы упорядочены по ключу куба (описание в
+    нижнем регистре); `total` — число работ за месяц, следующая страница
+    начинается с offset + limit. Ключи `works` — описания работ как в БД,
+    значения — массивы в формате /dashboard/work-breakdown.
+    """
+    month = get_month_start(month)
+    etag, not_modified = _check_not_modified(request, month, limit, offset)
+    if not_modified is not None:
+        return not_modified
+
+    total, page = fetch_work_breakdown_page(month, offset, limit)
+    _set_etag(response, etag)
+    return {
+        "month": month,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "works": {
+            description: [
+                {"date": work_date.isoformat(), "amount": volume, "unit": unit, "total_amount": amount}
+                for work_date, volume, unit, amount in days
+            ]
+            for description, days in page
+        },
+    }
@@ -0,0 +1,303 @@
+"""Идемпотентная подготовка схемы БД при старте приложения.
+
+Индексы, на которые опираются горячие запросы и запись визитов, создаются
+в lifespan, до того как приложение начнёт принимать запросы. Если БД в этот
+момент недоступна, попытка повторяется лениво: ensure_schema() вызывает
+фоновая запись визитов перед каждой пачкой, но не чаще раза в
+SCHEMA_BOOTSTRAP_RETRY_SEC.
+
+DDL выполняется под блокировкой: внутри процесса — threading.Lock, между
+воркерами — advisory-блокировкой PostgreSQL. Индексы больших таблиц, в
+которые пишет ETL, строятся CREATE INDEX CONCURRENTLY вне транзакции, чтобы
+не блокировать загрузку. Такое построение идёт минутами, поэтому оно
+запускается в фоновом потоке после основной подготовки и не задерживает
+старт; ожидание блокировок и длительность ограничены
+SCHEMA_INDEX_LOCK_TIMEOUT_SEC и SCHEMA_INDEX_STATEMENT_TIMEOUT_SEC.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+from threading import Lock, Thread
+from time import monotonic
+
+from psycopg2 import connect
+
+from .constants import (
+    TABLE_DASHBOARD_VISITS,
+    TABLE_FACT_AGG,
+    TABLE_FACT_WITH_MONEY,
+    TABLE_PLAN_AGG,
+    TABLE_RATES,
+)
+from .config import get_settings
+from .db import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Произвольная константа для pg_advisory_xact_lock, общая для всех воркеров
+_SCHEMA_LOCK_KEY = 0x4D4144_0001
+# Сессионная блокировка для CONCURRENTLY: построение может идти минутами,
+# остальные воркеры его не ждут, а пропускают
+_SCHEMA_CONCURRENT_LOCK_KEY = 0x4D4144_0002
+
+# Индексы можно строить только по таблицам и материализованным представлениям
+_INDEXABLE_RELKINDS = ("r", "m", "p")
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    name: str
+    table: str
+    ddl: str
+    # CREATE INDEX CONCURRENTLY: выполняется вне транзакции и не блокирует запись
+    concurrently: bool = False
+
+
+SCHEMA_INDEXES: tuple[IndexDefinition, ...] = (
+    # Ключ ON CONFLICT при пакетной записи визитов
+    IndexDefinition(
+        name="dashboard_visits_user_session_uidx",
+        table=TABLE_DASHBOARD_VISITS,
+        ddl=f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS dashboard_visits_user_session_uidx
+                ON {TABLE_DASHBOARD_VISITS} (user_id, session_id);
+        """,
+    ),
+    # MAX(loaded_at) — водяной знак, который проверяется на каждом запросе
+    IndexDefinition(
+        name="skpdi_fact_agg_loaded_at_idx",
+        table=TABLE_FACT_AGG,
+        ddl=f"""
+            CREATE INDEX IF NOT EXISTS skpdi_fact_agg_loaded_at_idx
+                ON {TABLE_FACT_AGG} (loaded_at);
+        """,
+    ),
+    IndexDefinition(
+        name="skpdi_plan_agg_loaded_at_idx",
+        table=TABLE_PLAN_AGG,
+        ddl=f"""
+            CREATE INDEX IF NOT EXISTS skpdi_plan_agg_loaded_at_idx
+                ON {TABLE_PLAN_AGG} (loaded_at);
+        """,
+    ),
+    # Нормализованный ключ соединения items с расценками (ITEMS_SQL, RATES_SQL)
+    IndexDefinition(
+        name="skpdi_rates_work_name_norm_idx",
+        table=TABLE_RATES,
+        ddl=f"""
+            CREATE INDEX IF NOT EXISTS skpdi_rates_work_name_norm_idx
+                ON {TABLE_RATES} (TRIM(LOWER(work_name)));
+        """,
+    ),
+    # Дневные суммы факта за месяц (FactQueryBuilder.month_start().status()).
+    # Таблица большая и пополняется ETL — обычный CREATE INDEX заблокировал бы запись
+    IndexDefinition(
+        name="skpdi_fact_with_money_month_status_idx",
+        table=TABLE_FACT_WITH_MONEY,
+        ddl=f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS skpdi_fact_with_money_month_status_idx
+                ON {TABLE_FACT_WITH_MONEY} (month_start, status);
+        """,
+        concurrently=True,
+    ),
+)
+
+_bootstrap_lock = Lock()
+_bootstrapped = False
+_last_attempt: float | None = None
+_concurrent_thread: Thread | None = None
+
+
+def bootstrap_schema(indexes: tuple[IndexDefinition, ...] = SCHEMA_INDEXES) -> list[str]:
+    """Создаёт недостающие индексы и возвращает имена созданных.
+
+    Обычные индексы создаются в одной транзакции, каждый в своей точке
+    сохранения, поэтому ошибка одного (нет прав, таблица отсутствует) не
+    мешает остальным. Индексы с concurrently=True после этого строятся в
+    фоновом потоке (см. start_concurrent_index_build) и в результат не
+    входят. Повторный вызов в том же процессе ничего не делает. Если БД
+    недоступна, ошибка логируется, а флаг не выставляется — следующий вызов
+    (см. ensure_schema) попробует снова.
+    """
+
+    global _bootstrapped, _last_attempt
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return []
+        _last_attempt = monotonic()
+
+        created: list[str] = []
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (_SCHEMA_LOCK_KEY,))
+                    for index in indexes:
+                        if not index.concurrently and _ensure_index(cur, index):
+                            created.append(index.name)
+                conn.commit()
+        except Exception as exc:  # noqa: BLE001 - старт приложения не должен падать
+            logger.warning("Не удалось подготовить схему БД: %s", exc, exc_info=True)
+            return []
+
+        _bootstrapped = True
+
+    if created:
+        logger.info("Схема БД: созданы индексы %s", ", ".join(created))
+    else:
+        logger.info("Схема БД: все индексы уже существуют")
+    start_concurrent_index_build([index for index in indexes if index.concurrently])
+    return created
+
+
+def start_concurrent_index_build(indexes: list[IndexDefinition]) -> Thread | None:
+    """Запускает построение индексов CONCURRENTLY в фоновом потоке.
+
+    Поток берёт отдельное соединение, а не соединение пула: построение может
+    занимать его минутами. Если индекс не успел построиться за
+    SCHEMA_INDEX_STATEMENT_TIMEOUT_SEC, он остаётся невалидным и будет
+    перестроен при следующем старте. Повторный вызов, пока поток работает,
+    ничего не делает.
+    """
+
+    global _concurrent_thread
+    if not indexes:
+        return None
+    with _bootstrap_lock:
+        if _concurrent_thread is not None and _concurrent_thread.is_alive():
+            return None
+        _concurrent_thread = Thread(
+            target=_build_concurrent_indexes,
+            args=(indexes,),
+            name="schema-concurrent-indexes",
+            daemon=True,
+        )
+        _concurrent_thread.start()
+        return _concurrent_thread
+
+
+def _build_concurrent_indexes(indexes: list[IndexDefinition]) -> None:
+    settings = get_settings()
+    try:
+        conn = connect(settings.db_dsn)
+    except Exception as exc:  # noqa: BLE001 - фоновый поток не должен падать молча
+        logger.warning("Схема БД: не удалось подключиться для индексов CONCURRENTLY: %s", exc)
+        return
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT set_config('lock_timeout', %s, false), set_config('statement_timeout', %s, false)",
+                (
+                    f"{int(settings.schema_index_lock_timeout_sec * 1000)}ms",
+                    f"{int(settings.schema_index_statement_timeout_sec * 1000)}ms",
+                ),
+            )
+        created = _ensure_concurrent_indexes(conn, indexes)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Схема БД: не удалось построить индексы CONCURRENTLY: %s", exc, exc_info=True)
+        return
+    finally:
+        conn.close()
+    if created:
+        logger.info("Схема БД: в фоне построены индексы %s", ", ".join(created))
+
+
+def ensure_schema() -> bool:
+    """Повторяет подготовку схемы, если она ещё не удалась; True — схема готова.
+
+    Дёшево после успеха (проверка флага). После неудачи новая попытка
+    делается не чаще раза в SCHEMA_BOOTSTRAP_RETRY_SEC, чтобы недоступная БД
+    не получала DDL на каждый вызов.
+    """
+
+    if _bootstrapped:
+        return True
+    settings = get_settings()
+    if not settings.schema_bootstrap_enabled or not settings.db_dsn:
+        return False
+    last_attempt = _last_attempt
+    if last_attempt is not None and monotonic() - last_attempt < settings.schema_bootstrap_retry_sec:
+        return False
+    bootstrap_schema()
+    return _bootstrapped
+
+
+def _ensure_concurrent_indexes(conn, indexes: list[IndexDefinition]) -> list[str]:
+    """Строит индексы CREATE INDEX CONCURRENTLY: вне транзакции, под сессионной блокировкой."""
+
+    created: list[str] = []
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (_SCHEMA_CONCURRENT_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                logger.info("Схема БД: индексы CONCURRENTLY уже строит другой воркер")
+                return created
+            try:
+                for index in indexes:
+                    if _ensure_index(cur, index):
+                        created.append(index.name)
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (_SCHEMA_CONCURRENT_LOCK_KEY,))
+    finally:
+        conn.autocommit = False
+    return created
+
+
+def _ensure_index(cur, index: IndexDefinition) -> bool:
+    """Создаёт индекс, если его нет. Возвращает True, если индекс был создан.
+
+    Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс, который
+    планировщик не использует; такой индекс удаляется и строится заново.
+    """
+
+    cur.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (index.name,))
+    existing = cur.fetchone()
+    if existing is not None:
+        if existing[0] or not index.concurrently:
+            return False
+        logger.warning("Схема БД: индекс %s невалиден, перестраиваю", index.name)
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+
+    cur.execute(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+        (index.table,),
+    )
+    row = cur.fetchone()
+    if row is None or row[0] not in _INDEXABLE_RELKINDS:
+        logger.info(
+            "Схема БД: пропускаю индекс %s — %s не является таблицей",
+            index.name,
+            index.table,
+        )
+        return False
+
+    if index.concurrently:
+        # autocommit: неудачная команда ничего не откатывает
+        try:
+            cur.execute(index.ddl)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Схема БД: не удалось создать индекс %s: %s", index.name, exc)
+            return False
+        return True
+
+    cur.execute("SAVEPOINT schema_index")
+    try:
+        cur.execute(index.ddl)
+    except Exception as exc:  # noqa: BLE001
+        cur.execute("ROLLBACK TO SAVEPOINT schema_index")
+        logger.warning("Схема БД: не удалось создать индекс %s: %s", index.name, exc)
+        return False
+    cur.execute("RELEASE SAVEPOINT schema_index")
+    return True
+
+
+__all__ = [
+    "IndexDefinition",
+    "SCHEMA_INDEXES",
+    "bootstrap_schema",
+    "ensure_schema",
+    "start_concurrent_index_build",
+]
@@ -0,0 +1,135 @@
+"""Объединение одновременных одинаковых вызовов (single-flight).
+
+Когда появляется новая загрузка, многие пользователи открывают дашборд
+почти одновременно, и каждый поток запускает одну и ту же тяжёлую выборку.
+Декоратор `singleflight` пропускает к функции только первый вызов с данным
+ключом; остальные, пришедшие пока он выполняется, ждут и получают тот же
+результат (или то же исключение). Результат общий для всех дождавшихся,
+поэтому изменять его нельзя.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+from threading import Event, Lock
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Выполняющийся вызов, результат которого ждут остальные потоки."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Группа вызовов, объединяемых по ключу."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Выполняет func(*args, **kwargs) или дожидается уже идущего вызова с тем же ключом."""
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            logger.debug("%s: вызов с ключом %r ожидает уже выполняющийся", self.name, key)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "executed_total": self.executed,
+            "coalesced_total": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = Lock()
+
+
+def _default_key(*args: Any, **kwargs: Any) -> Hashable:
+    return args, tuple(sorted(kwargs.items()))
+
+
+def singleflight(
+    *,
+    key: Callable[..., Hashable] | None = None,
+    label: str | None = None,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Декоратор, объединяющий одновременные вызовы функции с одинаковым ключом.
+
+    Typical usage:
+        @singleflight(key=lambda month, last_updated, *_: (month, last_updated))
+        def render(month, last_updated, items, summary):
+            ...
+
+    Параметры:
+        key: функция от аргументов вызова, возвращающая хешируемый ключ
+            (по умолчанию — все позиционные и именованные аргументы).
+        label: имя группы в статистике (по умолчанию имя функции).
+    """
+
+    key_func = key or _default_key
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        name = label or func.__name__
+        with _groups_lock:
+            group = _groups.setdefault(name, SingleFlight(name))
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            return group.do(key_func(*args, **kwargs), func, *args, **kwargs)
+
+        wrapper.singleflight = group  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def get_singleflight_stats() -> dict[str, dict[str, int]]:
+    """Статистика по всем группам: сколько вызовов выполнено и сколько объединено."""
+
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
+
+
+__all__ = ["SingleFlight", "get_singleflight_stats", "singleflight"]
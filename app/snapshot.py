@@ -0,0 +1,617 @@
+"""Снимок данных дашборда в файле SQLite и источник данных поверх него.
+
+Снимок хранит те же таблицы, что читает приложение, под теми же именами и
+с теми же колонками, поэтому запросы к нему повторяют запросы к PostgreSQL.
+Отличия: даты и время хранятся ISO-строками, суммы — REAL; из таблиц
+загрузок выгружается только MAX(loaded_at) (водяной знак), из больших
+таблиц — только колонки, которые читает приложение.
+
+Снимок пишется во временный файл и атомарно подменяет прежний, поэтому
+читатели не видят его наполовину записанным, а воркер может переключиться
+на него в любой момент (см. data_source.py).
+
+Выгрузка из рабочей БД (DB_DSN) и просмотр сведений о снимке:
+    python -m app.snapshot export /var/lib/mad/snapshot.sqlite --months 12
+    python -m app.snapshot info /var/lib/mad/snapshot.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from itertools import chain, islice
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+from threading import Lock
+from typing import Any, Iterable, Iterator, Sequence
+
+from psycopg2 import Error as PsycopgError, InterfaceError, OperationalError
+from psycopg2.extensions import (
+    DATE,
+    DECIMAL,
+    FLOAT,
+    INTEGER,
+    LONGINTEGER,
+    PYDATETIME,
+    PYDATETIMETZ,
+)
+
+from .constants import (
+    TABLE_CONTRACT_EXECUTED,
+    TABLE_CONTRACT_TOTAL,
+    TABLE_FACT_AGG,
+    TABLE_FACT_WITH_MONEY,
+    TABLE_PLAN_AGG,
+    TABLE_PLAN_VS_FACT_MONTHLY,
+    TABLE_RATES,
+)
+from .db import get_connection, register_numeric_as_float, streaming_cursor
+from .models import DailyReportItem, DailyRevenue, DailyWorkVolume, RangeMonthSummary
+from .queries import (
+    AVAILABLE_MONTHS_SQL,
+    CONTRACT_EXECUTED_SQL,
+    CONTRACT_TOTAL_SQL,
+    ITEMS_WITHOUT_RATES_SQL,
+    RATES_SQL,
+    SUMMARY_SQL,
+    DashboardData,
+    RatesIndex,
+    WorkBreakdownBatch,
+    WorkBreakdownCube,
+    aggregate_items_with_rates,
+    build_daily_report_item,
+    build_daily_revenue,
+    build_dashboard_range,
+    build_dashboard_range_sql,
+    build_work_breakdown_batch,
+    build_work_breakdown_cube,
+    build_work_volumes,
+)
+from .timing import span
+from .utils import get_month_start, get_next_month_start, to_float
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+_META_TABLE = "snapshot_meta"
+_INSERT_BATCH_SIZE = 5000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_FACT_STATUS = "Рассмотрено"
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """Таблица снимка и запрос, которым она выгружается из PostgreSQL."""
+
+    name: str
+    export_sql: str
+    # Колонка-месяц для ограничения выгрузки последними месяцами (--months)
+    month_column: str | None = None
+    indexes: tuple[str, ...] = ()
+
+
+SNAPSHOT_TABLES: tuple[SnapshotTable, ...] = (
+    SnapshotTable(
+        TABLE_PLAN_VS_FACT_MONTHLY,
+        f"SELECT * FROM {TABLE_PLAN_VS_FACT_MONTHLY}",
+        month_column="month_start",
+        indexes=("month_start",),
+    ),
+    SnapshotTable(TABLE_RATES, f"SELECT work_name, smeta_code FROM {TABLE_RATES}"),
+    SnapshotTable(TABLE_FACT_AGG, f"SELECT MAX(loaded_at) AS loaded_at FROM {TABLE_FACT_AGG}"),
+    SnapshotTable(TABLE_PLAN_AGG, f"SELECT MAX(loaded_at) AS loaded_at FROM {TABLE_PLAN_AGG}"),
+    SnapshotTable(TABLE_CONTRACT_TOTAL, f"SELECT contract_amount FROM {TABLE_CONTRACT_TOTAL}"),
+    SnapshotTable(TABLE_CONTRACT_EXECUTED, f"SELECT category_amount FROM {TABLE_CONTRACT_EXECUTED}"),
+    SnapshotTable(
+        TABLE_FACT_WITH_MONEY,
+        f"""
+        SELECT
+            date_done, month_start, status, description, smeta_code,
+            smeta_section, unit, total_volume, total_amount
+        FROM {TABLE_FACT_WITH_MONEY}
+        """,
+        month_column="month_start",
+        indexes=("date_done", "month_start"),
+    ),
+)
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    path: Path
+    format_version: int
+    exported_at: datetime
+    source: str
+    tables: dict[str, int] = field(default_factory=dict)
+
+
+def _sqlite_type(type_code: Any) -> str:
+    """Тип колонки SQLite по типу колонки PostgreSQL из cursor.description."""
+    if type_code in INTEGER.values or type_code in LONGINTEGER.values:
+        return "INTEGER"
+    if type_code in FLOAT.values or type_code in DECIMAL.values:
+        return "REAL"
+    if type_code in DATE.values:
+        return "DATE"
+    if type_code in PYDATETIME.values or type_code in PYDATETIMETZ.values:
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def _to_sqlite(value: Any) -> Any:
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _batched(rows: Iterable[Sequence[Any]], size: int) -> Iterator[list[tuple[Any, ...]]]:
+    iterator = iter(rows)
+    while batch := [tuple(_to_sqlite(value) for value in row) for row in islice(iterator, size)]:
+        yield batch
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SnapshotWriter:
+    """Пишет снимок во временный файл рядом с целевым; finish() атомарно его публикует."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._tmp_path.unlink(missing_ok=True)
+        self._conn = sqlite3.connect(self._tmp_path)
+        # Файл публикуется только целиком, журнал при записи не нужен
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._tables: dict[str, int] = {}
+
+    def add_table(
+        self,
+        name: str,
+        columns: Sequence[tuple[str, str]],
+        rows: Iterable[Sequence[Any]],
+        indexes: Sequence[str] = (),
+    ) -> int:
+        """Создаёт таблицу с колонками (имя, тип SQLite) и записывает строки."""
+        column_sql = ", ".join(f"{_quote(column)} {sqlite_type}" for column, sqlite_type in columns)
+        self._conn.execute(f"CREATE TABLE {_quote(name)} ({column_sql})")
+        insert_sql = f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(columns))})"
+        count = 0
+        for batch in _batched(rows, _INSERT_BATCH_SIZE):
+            self._conn.executemany(insert_sql, batch)
+            count += len(batch)
+        for column in indexes:
+            self._conn.execute(
+                f"CREATE INDEX {_quote(f'{name}_{column}_idx')} ON {_quote(name)} ({_quote(column)})"
+            )
+        self._tables[name] = count
+        return count
+
+    def finish(self, *, source: str) -> SnapshotInfo:
+        exported_at = datetime.now(timezone.utc)
+        meta = {
+            "format_version": str(SNAPSHOT_FORMAT_VERSION),
+            "exported_at": exported_at.isoformat(),
+            "source": source,
+            "tables": json.dumps(self._tables, ensure_ascii=False),
+        }
+        self._conn.execute(f"CREATE TABLE {_META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.executemany(f"INSERT INTO {_META_TABLE} VALUES (?, ?)", meta.items())
+        self._conn.commit()
+        self._conn.close()
+        os.replace(self._tmp_path, self.path)
+        return SnapshotInfo(self.path, SNAPSHOT_FORMAT_VERSION, exported_at, source, dict(self._tables))
+
+    def abort(self) -> None:
+        self._conn.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, *_exc_info: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+
+
+def _connect_readonly(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    # Встроенный LOWER в SQLite меняет регистр только латиницы
+    conn.create_function("lower", 1, _unicode_lower, deterministic=True)
+    return conn
+
+
+def _unicode_lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def read_snapshot_info(path: str | Path) -> SnapshotInfo:
+    """Читает сведения о снимке; ValueError, если формат не поддерживается."""
+    path = Path(path)
+    conn = _connect_readonly(path)
+    try:
+        meta = dict(conn.execute(f"SELECT key, value FROM {_META_TABLE}").fetchall())
+    finally:
+        conn.close()
+    format_version = int(meta.get("format_version", 0))
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        msg = f"Снимок {path} в формате {format_version}, поддерживается {SNAPSHOT_FORMAT_VERSION}"
+        raise ValueError(msg)
+    return SnapshotInfo(
+        path=path,
+        format_version=format_version,
+        exported_at=datetime.fromisoformat(meta["exported_at"]),
+        source=meta.get("source", ""),
+        tables=json.loads(meta.get("tables") or "{}"),
+    )
+
+
+def _qmark(sql: str) -> str:
+    """Тот же запрос с плейсхолдерами sqlite3 вместо psycopg2."""
+    return sql.replace("%s", "?")
+
+
+def _parse_date(value: Any) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+_LAST_UPDATED_SQL = f"""
+    SELECT MAX(loaded_at)
+    FROM (
+        SELECT loaded_at FROM {TABLE_FACT_AGG}
+        UNION ALL
+        SELECT loaded_at FROM {TABLE_PLAN_AGG}
+    ) AS loads
+"""
+
+# Дата работы — первые 10 символов ISO-строки date_done: то же, что
+# date_done::date в часовом поясе сессии, из которой выгружен снимок
+_DAILY_FACT_TOTALS_SQL = f"""
+    SELECT substr(date_done, 1, 10) AS work_date, SUM(total_amount) AS fact_total
+    FROM {TABLE_FACT_WITH_MONEY}
+    WHERE month_start = ? AND status = ?
+    GROUP BY work_date
+    HAVING SUM(total_amount) IS NOT NULL
+    ORDER BY work_date
+"""
+
+_AVAILABLE_DAYS_SQL = f"""
+    SELECT DISTINCT substr(date_done, 1, 10) AS work_date
+    FROM {TABLE_FACT_WITH_MONEY}
+    WHERE date_done >= ? AND date_done < ? AND status = ?
+    ORDER BY work_date DESC
+"""
+
+_DAILY_REPORT_SQL = f"""
+    SELECT
+        COALESCE(f.smeta_code, '') AS smeta_code,
+        COALESCE(f.smeta_section, '') AS smeta_section,
+        COALESCE(f.description, '') AS description,
+        f.unit AS unit,
+        SUM(f.total_volume) AS total_volume,
+        SUM(f.total_amount) AS total_amount
+    FROM {TABLE_FACT_WITH_MONEY} AS f
+    WHERE f.date_done >= ? AND f.date_done < ? AND f.status = ?
+    GROUP BY f.smeta_code, f.smeta_section, f.description, f.unit
+    ORDER BY total_amount DESC NULLS LAST, description
+"""
+
+_WORK_BREAKDOWN_SQL = f"""
+    SELECT
+        substr(date_done, 1, 10) AS work_date,
+        SUM(COALESCE(total_volume, 0)) AS total_volume,
+        MAX(COALESCE(CAST(unit AS TEXT), '')) AS unit,
+        SUM(COALESCE(total_amount, 0)) AS total_amount
+    FROM {TABLE_FACT_WITH_MONEY}
+    WHERE date_done >= ? AND date_done < ? AND status = ?
+        AND LOWER(COALESCE(description, '')) LIKE LOWER(?) ESCAPE '\\'
+    GROUP BY work_date
+    ORDER BY work_date
+"""
+
+_WORK_BREAKDOWN_CUBE_SQL = f"""
+    SELECT
+        COALESCE(CAST(description AS TEXT), '') AS description,
+        substr(date_done, 1, 10) AS work_date,
+        SUM(COALESCE(total_volume, 0)) AS total_volume,
+        MAX(COALESCE(CAST(unit AS TEXT), '')) AS unit,
+        SUM(COALESCE(total_amount, 0)) AS total_amount
+    FROM {TABLE_FACT_WITH_MONEY} AS f
+    WHERE date_done >= ? AND date_done < ? AND status = ?
+    GROUP BY f.description, work_date
+"""
+
+
+# Списки месяцев и работ подставляются как IN (?, ?, ...), см. work_breakdown_batch
+_WORK_BREAKDOWN_BATCH_SQL = f"""
+    SELECT
+        CAST(description AS TEXT) AS description,
+        substr(date_done, 1, 10) AS work_date,
+        SUM(COALESCE(total_volume, 0)) AS total_volume,
+        MAX(COALESCE(CAST(unit AS TEXT), '')) AS unit,
+        SUM(COALESCE(total_amount, 0)) AS total_amount
+    FROM {TABLE_FACT_WITH_MONEY} AS f
+    WHERE date_done >= ? AND date_done < ? AND status = ?
+        AND substr(date_done, 1, 7) IN ({{months}})
+        AND description IN ({{works}})
+    GROUP BY f.description, work_date
+    ORDER BY work_date
+"""
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> list[dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
+
+
+class _SnapshotSession:
+    """Сессия снимка: чтения по одному соединению SQLite только для чтения."""
+
+    source_name = "snapshot"
+    fallback_age_sec: float | None = None
+
+    def __init__(self, source: "SnapshotDataSource", conn: sqlite3.Connection) -> None:
+        self._source = source
+        self.conn = conn
+
+    def last_updated(self) -> datetime | None:
+        with span("db_watermark"):
+            row = self.conn.execute(_LAST_UPDATED_SQL).fetchone()
+        if not row or row[0] is None:
+            return _EPOCH
+        return datetime.fromisoformat(row[0])
+
+    def dashboard_data(self, month_start: date, watermark: datetime | None) -> DashboardData:
+        rates = self._source.rates_index(self.conn)
+        with span("items_query"):
+            cur = self.conn.execute(_qmark(ITEMS_WITHOUT_RATES_SQL), (month_start.isoformat(),))
+        with span("items_aggregate"):
+            items = aggregate_items_with_rates(cur, rates)
+
+        with span("summary"):
+            cur = self.conn.execute(_qmark(SUMMARY_SQL), (month_start.isoformat(),))
+            summary_rows = _dict_rows(cur)
+
+        return DashboardData(
+            items=items,
+            summary_row=summary_rows[0] if summary_rows else {},
+            daily_revenue=self._daily_revenue(month_start),
+            contract_progress=self._contract_progress(),
+        )
+
+    def _daily_revenue(self, month_start: date) -> list[DailyRevenue]:
+        try:
+            with span("daily_revenue"):
+                cur = self.conn.execute(_DAILY_FACT_TOTALS_SQL, (month_start.isoformat(), _FACT_STATUS))
+                rows = _dict_rows(cur)
+        except sqlite3.Error as exc:
+            logger.warning("Снимок без дневных сумм за %s: %s", month_start, exc)
+            return []
+        for row in rows:
+            row["work_date"] = _parse_date(row["work_date"])
+        return build_daily_revenue(rows)
+
+    def _contract_progress(self) -> dict[str, float] | None:
+        try:
+            with span("contract"):
+                contract_total = self.conn.execute(CONTRACT_TOTAL_SQL).fetchone()[0]
+                executed_total = self.conn.execute(CONTRACT_EXECUTED_SQL).fetchone()[0]
+        except sqlite3.Error as exc:
+            logger.warning("Снимок без агрегатов по контракту: %s", exc)
+            return None
+        return {
+            "contract_total": to_float(contract_total) or 0.0,
+            "executed_total": to_float(executed_total) or 0.0,
+        }
+
+    def available_months(self, limit: int) -> list[date]:
+        rows = self.conn.execute(_qmark(AVAILABLE_MONTHS_SQL), (limit,)).fetchall()
+        return [_parse_date(row[0]) for row in rows if row[0] is not None]
+
+    def available_days(self) -> list[date]:
+        month_start = get_month_start(date.today())
+        params = (month_start.isoformat(), get_next_month_start(month_start).isoformat(), _FACT_STATUS)
+        rows = self.conn.execute(_AVAILABLE_DAYS_SQL, params).fetchall()
+        return [_parse_date(row[0]) for row in rows if row[0] is not None]
+
+    def daily_report_items(self, target_date: date) -> list[DailyReportItem]:
+        next_day = date.fromordinal(target_date.toordinal() + 1)
+        with span("daily_report_query"):
+            cur = self.conn.execute(
+                _DAILY_REPORT_SQL, (target_date.isoformat(), next_day.isoformat(), _FACT_STATUS)
+            )
+            return [build_daily_report_item(row) for row in _dict_rows(cur)]
+
+    def work_daily_breakdown(self, month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
+        params = (
+            month_start.isoformat(),
+            get_next_month_start(month_start).isoformat(),
+            _FACT_STATUS,
+            f"%{work_identifier.strip()}%",
+        )
+        with span("work_breakdown_query"):
+            rows = _dict_rows(self.conn.execute(_WORK_BREAKDOWN_SQL, params))
+        for row in rows:
+            row["work_date"] = _parse_date(row["work_date"])
+        return build_work_volumes(rows)
+
+    def work_breakdown_cube(self, month_start: date) -> WorkBreakdownCube:
+        params = (month_start.isoformat(), get_next_month_start(month_start).isoformat(), _FACT_STATUS)
+        with span("work_breakdown_cube_query"):
+            rows = self.conn.execute(_WORK_BREAKDOWN_CUBE_SQL, params)
+            return build_work_breakdown_cube(
+                (description, _parse_date(work_date), volume, unit, amount)
+                for description, work_date, volume, unit, amount in rows
+            )
+
+    def work_breakdown_batch(self, months: Sequence[date], works: Sequence[str]) -> WorkBreakdownBatch:
+        sql = _WORK_BREAKDOWN_BATCH_SQL.format(
+            months=_placeholders(len(months)), works=_placeholders(len(works))
+        )
+        params = (
+            months[0].isoformat(),
+            get_next_month_start(months[-1]).isoformat(),
+            _FACT_STATUS,
+            *(month.isoformat()[:7] for month in months),
+            *works,
+        )
+        with span("work_breakdown_batch_query"):
+            rows = _dict_rows(self.conn.execute(sql, params))
+        for row in rows:
+            row["work_date"] = _parse_date(row["work_date"])
+        return build_work_breakdown_batch(rows, works)
+
+    def dashboard_range(self, start: date, end: date) -> list[RangeMonthSummary]:
+        params = (start.isoformat(), end.isoformat()) * 2
+        # Снимок может быть выгружен из другой версии представления — колонки проверяются на месте
+        view = self.conn.execute(f"SELECT * FROM {TABLE_PLAN_VS_FACT_MONTHLY} LIMIT 0")
+        sql = build_dashboard_range_sql(column[0] for column in view.description)
+        with span("dashboard_range_query"):
+            rows = self.conn.execute(_qmark(sql), params).fetchall()
+        return build_dashboard_range(
+            ((_parse_date(month_start), *values) for month_start, *values in rows), start, end
+        )
+
+
+class SnapshotDataSource:
+    """Источник данных из файла снимка; сведения и справочник расценок читаются
+    один раз на версию файла (подмена снимка сбрасывает их)."""
+
+    name = "snapshot"
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = Lock()
+        self._stamp: int | None = None
+        self._info: SnapshotInfo | None = None
+        self._rates: RatesIndex | None = None
+
+    def info(self) -> SnapshotInfo:
+        stamp = self.path.stat().st_mtime_ns
+        with self._lock:
+            if self._info is None or self._stamp != stamp:
+                self._info = read_snapshot_info(self.path)
+                self._rates = None
+                self._stamp = stamp
+            return self._info
+
+    def age_sec(self) -> float:
+        return max(0.0, (datetime.now(timezone.utc) - self.info().exported_at).total_seconds())
+
+    def rates_index(self, conn: sqlite3.Connection) -> RatesIndex:
+        """Справочник расценок в той же форме, что _load_rates_index в queries.py."""
+        rates = self._rates
+        if rates is not None:
+            return rates
+        grouped: dict[str, list[Any]] = {}
+        with span("rates_load"):
+            for rates_key, smeta_code in conn.execute(RATES_SQL):
+                grouped.setdefault(rates_key, []).append(smeta_code)
+        rates = {key: tuple(codes) for key, codes in grouped.items()}
+        self._rates = rates
+        return rates
+
+    @contextmanager
+    def session(self) -> Iterator[_SnapshotSession]:
+        # Проверяет формат и сбрасывает кэши, если файл подменили
+        self.info()
+        conn = _connect_readonly(self.path)
+        try:
+            yield _SnapshotSession(self, conn)
+        finally:
+            conn.close()
+
+
+def _months_back(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def export_snapshot(path: str | Path, *, months: int | None = None) -> SnapshotInfo:
+    """Выгружает таблицы SNAPSHOT_TABLES из рабочей БД в файл снимка.
+
+    months ограничивает большие таблицы последними месяцами (включая текущий).
+    Таблица, запрос к которой падает не из-за соединения (например, её нет в
+    этой БД), пропускается: снимок читает её так же, как приложение — при
+    ошибке соответствующий блок дашборда остаётся пустым.
+    """
+    since = _months_back(get_month_start(date.today()), months) if months else None
+    with get_connection() as conn, SnapshotWriter(path) as writer:
+        for table in SNAPSHOT_TABLES:
+            sql, params = table.export_sql, ()
+            if since is not None and table.month_column:
+                sql, params = f"{sql} WHERE {table.month_column} >= %s", (since,)
+            try:
+                with streaming_cursor(conn, f"snapshot_{table.name}") as cur:
+                    register_numeric_as_float(cur)
+                    cur.execute(sql, params)
+                    rows = iter(cur)
+                    # У серверного курсора описание колонок появляется после первой порции
+                    first_row = next(rows, None)
+                    columns = [(column.name, _sqlite_type(column.type_code)) for column in cur.description]
+                    head = () if first_row is None else (first_row,)
+                    count = writer.add_table(table.name, columns, chain(head, rows), table.indexes)
+            except (OperationalError, InterfaceError):
+                raise
+            except PsycopgError as exc:
+                logger.warning("Таблица %s не выгружена в снимок: %s", table.name, exc)
+                conn.rollback()
+                continue
+            logger.info("Таблица %s: %d строк", table.name, count)
+        return writer.finish(source="postgres")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description="Снимок данных дашборда в SQLite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="выгрузить снимок из DB_DSN")
+    export_parser.add_argument("path", type=Path)
+    export_parser.add_argument("--months", type=int, default=None, help="только последние N месяцев")
+    info_parser = commands.add_parser("info", help="сведения о снимке")
+    info_parser.add_argument("path", type=Path)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.command == "export":
+        info = export_snapshot(args.path, months=args.months)
+    else:
+        info = read_snapshot_info(args.path)
+    print(f"{info.path}: формат {info.format_version}, выгружен {info.exported_at.isoformat()} из {info.source}")
+    for name, count in info.tables.items():
+        print(f"  {name}: {count} строк")
+    return 0
+
+
+__all__ = [
+    "SNAPSHOT_TABLES",
+    "SnapshotDataSource",
+    "SnapshotInfo",
+    "SnapshotTable",
+    "SnapshotWriter",
+    "export_snapshot",
+    "read_snapshot_info",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
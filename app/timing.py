@@ -0,0 +1,106 @@
+"""Лёгкие замеры этапов обработки запроса для заголовка Server-Timing.
+
+Middleware (см. main.py, SERVER_TIMING_ENABLED) кладёт в contextvar список
+замеров текущего запроса, а код оборачивает этапы в `with span("name"):`.
+Если замеры выключены, span возвращает общий пустой контекстный менеджер:
+цена — одно чтение contextvar. В потоки собственных пулов (параллельный
+режим, фоновое обновление) контекст передаётся через bind_context.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar, copy_context
+import functools
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+Spans = list[tuple[str, float]]
+
+_spans: ContextVar[Spans | None] = ContextVar("server_timing_spans", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_name", "_spans", "_started")
+
+    def __init__(self, name: str, spans: Spans) -> None:
+        self._name = name
+        self._spans = spans
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        # list.append атомарен под GIL: спаны пишутся и из потоков пулов
+        self._spans.append((self._name, perf_counter() - self._started))
+
+
+def span(name: str) -> _Span | _NoopSpan:
+    """Замер этапа с именем name (токен без пробелов, напр. "items_query")."""
+
+    spans = _spans.get()
+    if spans is None:
+        return _NOOP_SPAN
+    return _Span(name, spans)
+
+
+def start_request_timing() -> Spans:
+    """Включает сбор замеров в текущем контексте и возвращает их список."""
+
+    spans: Spans = []
+    _spans.set(spans)
+    return spans
+
+
+def bind_context(func: Callable[..., T]) -> Callable[..., T]:
+    """Оборачивает func так, чтобы она выполнялась в копии текущего контекста.
+
+    Нужна при передаче задачи в ThreadPoolExecutor: потоки пула не наследуют
+    contextvars. Копия создаётся на каждый вызов bind_context, поэтому одну
+    обёртку нельзя отправлять в несколько потоков одновременно.
+    """
+
+    return functools.partial(copy_context().run, func)
+
+
+def summarize(spans: Spans) -> list[tuple[str, float, int]]:
+    """Суммирует замеры по имени в порядке первого появления: (имя, мс, количество)."""
+
+    totals: dict[str, list[float]] = {}
+    for name, duration in spans:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += duration
+        entry[1] += 1
+    return [(name, total * 1000, int(count)) for name, (total, count) in totals.items()]
+
+
+def format_server_timing(spans: Spans, total_sec: float) -> str:
+    """Значение заголовка Server-Timing: этапы и общее время обработки."""
+
+    parts = [f"{name};dur={duration_ms:.1f}" for name, duration_ms, _ in summarize(spans)]
+    parts.append(f"total;dur={total_sec * 1000:.1f}")
+    return ", ".join(parts)
+
+
+__all__ = [
+    "bind_context",
+    "format_server_timing",
+    "span",
+    "start_request_timing",
+    "summarize",
+]
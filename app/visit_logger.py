@@ -1,18 +1,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Iterable
+from threading import Condition, Lock, Thread
+from typing import Any, Hashable
 
 from fastapi import Request
 from pydantic import BaseModel, Field, field_validator
-from psycopg2 import IntegrityError
+from psycopg2.extras import execute_values
 
+from .config import get_settings
 from .constants import TZ_MOSCOW_NAME
 from .db import get_connection
+from .schema import ensure_schema
 
 logger = logging.getLogger(__name__)
 
-_unique_index_created = False
+VisitValues = tuple[Any, ...]
 
 # Упрощённые словарные/табличные паттерны для определения браузера, ОС и типа устройства.
 # Порядок имеет значение: более специфичные/уязвимые к пересечению паттерны выше.
@@ -41,12 +44,12 @@ _DEVICE_PATTERNS: list[tuple[str, tuple[str, ...]]] = [
     ("mobile", ("mobi", "android", "iphone")),
 ]
 
-CREATE_UNIQUE_SESSION_INDEX_SQL = """
-    CREATE UNIQUE INDEX IF NOT EXISTS dashboard_visits_user_session_uidx
-        ON dashboard_visits (user_id, session_id);
-"""
-
-UPSERT_VISIT_SQL = """
+# Многострочный upsert для execute_values: VALUES %s раскрывается в пачку строк.
+# В одной пачке ключ (user_id, session_id) должен встречаться не больше раза,
+# поэтому очередь заранее схлопывает повторы. Уникальный индекс под ON CONFLICT
+# создаётся при старте приложения, а если тогда БД была недоступна — перед
+# записью очередной пачки (см. schema.ensure_schema).
+UPSERT_VISITS_BATCH_SQL = """
     INSERT INTO dashboard_visits (
         endpoint,
         client_ip,
@@ -58,7 +61,7 @@ UPSERT_VISIT_SQL = """
         browser,
         os
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    VALUES %s
     ON CONFLICT (user_id, session_id) DO UPDATE
         SET visited_at = TIMEZONE('Europe/Moscow', CURRENT_TIMESTAMP),
             endpoint = EXCLUDED.endpoint,
@@ -185,19 +188,196 @@ def _parse_user_agent(user_agent: str | None) -> tuple[str | None, str | None, s
     return device_type, browser, os
 
 
-def _ensure_unique_index(cur) -> None:
-    global _unique_index_created
-    if _unique_index_created:
-        return
+class _VisitQueue:
+    """Ограниченная очередь визитов с фоновой пакетной записью в БД.
 
-    try:
-        cur.execute(CREATE_UNIQUE_SESSION_INDEX_SQL)
-    except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
-        logger.warning(
-            "Не удалось создать уникальный индекс по user_id и session_id: %s", exc
-        )
-    else:
-        _unique_index_created = True
+    Повторные визиты одной сессии (user_id, session_id) схлопываются в одну
+    запись: берутся последние значения и максимальная длительность сессии.
+    При переполнении новые сессии отбрасываются, уже стоящие в очереди
+    продолжают обновляться. Пачка, которую не удалось записать, один раз
+    возвращается в очередь (в пределах её размера) и пишется после паузы;
+    визиты, потерянные при повторной ошибке или переполнении, учитываются
+    в dropped_total.
+    """
+
+    def __init__(self, *, max_size: int, batch_size: int, flush_interval_sec: float) -> None:
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._flush_interval_sec = flush_interval_sec
+        self._pending: dict[Hashable, VisitValues] = {}
+        self._condition = Condition(Lock())
+        self._thread: Thread | None = None
+        self._stopped = False
+        self._anonymous_seq = 0
+        # Ключи визитов, которые уже один раз вернулись в очередь после ошибки записи
+        self._retried: set[Hashable] = set()
+        self.dropped_total = 0
+        self.written_total = 0
+        self.batches_total = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, values: VisitValues) -> bool:
+        user_id, session_id = values[3], values[4]
+        with self._condition:
+            if self._stopped:
+                return False
+            if user_id is not None and session_id is not None:
+                key: Hashable = (user_id, session_id)
+            else:
+                # NULL-ключи не конфликтуют в уникальном индексе — не схлопываем
+                self._anonymous_seq += 1
+                key = ("anonymous", self._anonymous_seq)
+
+            previous = self._pending.get(key)
+            if previous is None and len(self._pending) >= self._max_size:
+                self._count_dropped(1)
+                return False
+            self._pending[key] = _merge_visit(previous, values)
+
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="visit-flusher", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self._batch_size:
+                self._condition.notify()
+        return True
+
+    def _count_dropped(self, count: int) -> None:
+        """Учитывает потерянные визиты. Вызывается под self._condition."""
+        previous = self.dropped_total
+        self.dropped_total += count
+        if previous == 0 or previous // 100 != self.dropped_total // 100:
+            logger.warning(
+                "Очередь визитов (%d) не приняла визиты. Всего отброшено: %d",
+                self._max_size,
+                self.dropped_total,
+            )
+
+    def _take_batch(self) -> list[tuple[Hashable, VisitValues]]:
+        batch: list[tuple[Hashable, VisitValues]] = []
+        while self._pending and len(batch) < self._batch_size:
+            key = next(iter(self._pending))
+            batch.append((key, self._pending.pop(key)))
+        return batch
+
+    def _requeue(self, batch: list[tuple[Hashable, VisitValues]]) -> None:
+        """Возвращает незаписанную пачку в очередь; второй попытки не бывает."""
+        dropped = 0
+        with self._condition:
+            for key, values in batch:
+                if key in self._retried:
+                    self._retried.discard(key)
+                    dropped += 1
+                    continue
+                newer = self._pending.get(key)
+                if newer is None and len(self._pending) >= self._max_size:
+                    dropped += 1
+                    continue
+                # Визит той же сессии, пришедший во время записи, новее неудачного
+                self._pending[key] = _merge_visit(values, newer) if newer is not None else values
+                self._retried.add(key)
+            if dropped:
+                self._count_dropped(dropped)
+
+    def _run(self) -> None:
+        failed = False
+        while True:
+            with self._condition:
+                if not self._stopped and (failed or len(self._pending) < self._batch_size):
+                    self._condition.wait(self._flush_interval_sec)
+                batch = self._take_batch()
+                stopped = self._stopped
+            failed = bool(batch) and not self._write(batch)
+            if stopped and not batch:
+                return
+
+    def _write(self, batch: list[tuple[Hashable, VisitValues]]) -> bool:
+        ensure_schema()
+        try:
+            with get_connection() as conn, conn.cursor() as cur:
+                execute_values(
+                    cur, UPSERT_VISITS_BATCH_SQL, [values for _, values in batch], page_size=len(batch)
+                )
+                conn.commit()
+        except Exception as exc:  # pragma: no cover - запись не должна падать приложение
+            logger.warning(
+                "Не удалось записать пачку визитов (%d шт.): %s", len(batch), exc, exc_info=True
+            )
+            self._requeue(batch)
+            return False
+        if self._retried:
+            with self._condition:
+                self._retried.difference_update(key for key, _ in batch)
+        self.written_total += len(batch)
+        self.batches_total += 1
+        return True
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Останавливает фоновый поток, дописав накопленные визиты."""
+        with self._condition:
+            self._stopped = True
+            thread = self._thread
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout)
+            return
+        # Каждый визит возвращается в очередь не больше одного раза, цикл конечен
+        while self._pending:
+            self._write(self._take_batch())
+
+
+def _merge_visit(previous: VisitValues | None, current: VisitValues) -> VisitValues:
+    """Объединяет два визита одной сессии так же, как это делает ON CONFLICT."""
+
+    if previous is None:
+        return current
+    previous_duration, current_duration = previous[5], current[5]
+    if previous_duration is not None and (current_duration is None or previous_duration > current_duration):
+        return (*current[:5], previous_duration, *current[6:])
+    return current
+
+
+_visit_queue: _VisitQueue | None = None
+_visit_queue_lock = Lock()
+
+
+def _get_visit_queue() -> _VisitQueue:
+    global _visit_queue
+    if _visit_queue is None:
+        with _visit_queue_lock:
+            if _visit_queue is None:
+                settings = get_settings()
+                _visit_queue = _VisitQueue(
+                    max_size=settings.visit_queue_max_size,
+                    batch_size=settings.visit_batch_size,
+                    flush_interval_sec=settings.visit_flush_interval_sec,
+                )
+    return _visit_queue
+
+
+def get_visit_queue_stats() -> dict[str, int]:
+    """Глубина очереди визитов и счётчики записанных/отброшенных визитов."""
+
+    queue = _visit_queue
+    if queue is None:
+        return {"depth": 0, "dropped_total": 0, "written_total": 0, "batches_total": 0}
+    return {
+        "depth": len(queue),
+        "dropped_total": queue.dropped_total,
+        "written_total": queue.written_total,
+        "batches_total": queue.batches_total,
+    }
+
+
+def stop_visit_logger() -> None:
+    """Дописывает накопленные визиты и останавливает фоновую запись."""
+
+    global _visit_queue
+    with _visit_queue_lock:
+        queue, _visit_queue = _visit_queue, None
+    if queue is not None:
+        queue.close()
 
 
 def log_dashboard_visit(
@@ -208,9 +388,11 @@ def log_dashboard_visit(
     session_id: str | None = None,
     session_duration_sec: int | None = None,
 ) -> None:
-    """Фиксирует посещение дашборда в базе данных.
-    
-    Асинхронные ошибки БД игнорируются чтобы не повлиять на основной запрос.
+    """Ставит посещение дашборда в очередь на запись в базу данных.
+
+    Сама запись выполняется фоновым потоком пачками, поэтому запрос
+    не занимает соединение из пула и не ждёт INSERT. При переполнении
+    очереди визит отбрасывается.
     """
 
     client_ip = _get_client_ip(request)
@@ -224,7 +406,7 @@ def log_dashboard_visit(
     )
     device_type, browser, os = _parse_user_agent(user_agent)
 
-    values: Iterable[Any] = (
+    values: VisitValues = (
         endpoint,
         client_ip,
         user_agent,
@@ -236,24 +418,4 @@ def log_dashboard_visit(
         os,
     )
 
-    try:
-        with get_connection() as conn, conn.cursor() as cur:
-            _ensure_unique_index(cur)
-            cur.execute(UPSERT_VISIT_SQL, values)
-            conn.commit()
-    except IntegrityError as exc:
-        logger.debug(
-            "Duplicate visit record для %s (user_id=%s, session_id=%s): %s. Это нормально.",
-            endpoint,
-            user_id,
-            session_id,
-            exc,
-        )
-        try:
-            conn.rollback()
-        except Exception:
-            pass
-    except Exception as exc:  # pragma: no cover - запись не должна падать приложение
-        logger.warning(
-            "Не удалось записать посещение дашборда: %s", exc, exc_info=True
-        )
+    _get_visit_queue().put(values)
@@ -0,0 +1,123 @@
+"""Замер времени импорта приложения (python -X importtime).
+
+Запускает `python -X importtime -c "import app.main"` несколько раз в
+отдельных процессах, берёт медиану накопленного времени импорта app.main
+и завершается с кодом 1, если оно превышает порог или если при старте
+импортируются модули, которые должны грузиться лениво (по умолчанию reportlab).
+
+Пример:
+    python benchmarks/import_time.py --max-ms 800 --json import_time.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULE = "app.main"
+DEFAULT_MAX_MS = 800.0
+DEFAULT_RUNS = 5
+DEFAULT_FORBIDDEN = ("reportlab",)
+
+# "import time:  self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _measure_once(module: str) -> dict[str, int]:
+    """Возвращает накопленное время импорта (мкс) для каждого модуля."""
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Не удалось импортировать {module}")
+
+    timings: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Замер времени импорта приложения")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS, help="порог медианы, мс")
+    parser.add_argument(
+        "--forbid",
+        action="append",
+        default=None,
+        help="пакет, который не должен импортироваться при старте (можно несколько раз)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих модулей показать")
+    parser.add_argument("--json", type=Path, default=None, help="куда сохранить результат")
+    args = parser.parse_args(argv)
+
+    forbidden = tuple(args.forbid) if args.forbid is not None else DEFAULT_FORBIDDEN
+    runs = [_measure_once(args.module) for _ in range(max(1, args.runs))]
+    totals_ms = [run.get(args.module, 0) / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+
+    last = runs[-1]
+    top = sorted(
+        ((name, us / 1000) for name, us in last.items() if name != args.module),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )[: args.top]
+    leaked = sorted(
+        name for name in last if any(name == pkg or name.startswith(f"{pkg}.") for pkg in forbidden)
+    )
+
+    runs_text = ", ".join(f"{value:.1f}" for value in totals_ms)
+    print(f"{args.module}: медиана {median_ms:.1f} мс (порог {args.max_ms:.1f} мс), прогоны: {runs_text}")
+    print("Самые дорогие модули (накопленно, мс):")
+    for name, value in top:
+        print(f"  {value:9.1f}  {name}")
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps(
+                {
+                    "module": args.module,
+                    "runs_ms": totals_ms,
+                    "median_ms": median_ms,
+                    "max_ms": args.max_ms,
+                    "top_ms": dict(top),
+                    "forbidden_imported": leaked,
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+    failed = False
+    if median_ms > args.max_ms:
+        print(f"РЕГРЕССИЯ: импорт {args.module} дольше порога", file=sys.stderr)
+        failed = True
+    if leaked:
+        print(f"РЕГРЕССИЯ: при старте импортированы {', '.join(leaked[:5])}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
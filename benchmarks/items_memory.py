@@ -0,0 +1,140 @@
+"""Пиковая память чтения строк items: клиентский курсор против серверного.
+
+Нужен живой PostgreSQL (DB_DSN). Строки в форме skpdi_plan_vs_fact_monthly
+генерируются в БД через generate_series, поэтому таблицы с данными не нужны.
+Каждый замер выполняется в отдельном процессе: пиковый RSS (ru_maxrss)
+считается от состояния после импорта и подключения, так что учитывается и
+буфер libpq, невидимый для tracemalloc.
+
+Пример:
+    DB_DSN=postgresql://... python benchmarks/items_memory.py \\
+        --rows 10000 100000 1000000 --itersize 2000 --json items_memory.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+DEFAULT_ITERSIZE = 2000
+MODES = ("client", "server")
+
+# Около 5 000 различных работ: агрегированный результат мал, а число строк
+# и объём их буферизации растут линейно
+SYNTHETIC_ITEMS_SQL = """
+    SELECT
+        'Смета ' || (g % 20) AS smeta,
+        'Раздел ' || (g % 50) AS section,
+        'Работа ' || (g % 5000) AS work_name,
+        'Работа ' || (g % 5000) || ' — описание строки сметы' AS description,
+        CASE WHEN g % 10 = 0 THEN 'внерегл_ч_1' ELSE 'лето' END AS smeta_code,
+        ((g % 1000) * 1.5)::numeric(14, 2) AS planned_amount,
+        ((g % 700) * 1.1)::numeric(14, 2) AS fact_amount_done,
+        ((g % 300) * 0.4)::numeric(14, 2) AS delta_amount_done,
+        NULL::text AS category_code
+    FROM generate_series(1, %s) AS g
+"""
+
+
+def _max_rss_kb() -> int:
+    # На Linux ru_maxrss в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_child(mode: str, rows: int, itersize: int) -> dict[str, float]:
+    os.environ["DB_SERVER_CURSOR_ITERSIZE"] = str(itersize if mode == "server" else 0)
+
+    from app.db import get_connection, register_numeric_as_float, streaming_cursor
+    from app.queries import _aggregate_items_streaming
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        baseline_kb = _max_rss_kb()
+        started = time.perf_counter()
+        with streaming_cursor(conn, "bench_items") as cur:
+            register_numeric_as_float(cur)
+            cur.execute(SYNTHETIC_ITEMS_SQL, (rows,))
+            items = _aggregate_items_streaming(cur)
+        elapsed = time.perf_counter() - started
+        conn.rollback()
+
+    return {
+        "mode": mode,
+        "rows": rows,
+        "itersize": itersize if mode == "server" else 0,
+        "items": len(items),
+        "seconds": round(elapsed, 3),
+        "peak_rss_delta_mb": round((_max_rss_kb() - baseline_kb) / 1024, 1),
+    }
+
+
+def _spawn(mode: str, rows: int, itersize: int) -> dict[str, float]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--child",
+            mode,
+            "--rows",
+            str(rows),
+            "--itersize",
+            str(itersize),
+        ],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Замер {mode}/{rows} завершился ошибкой")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Пиковая память чтения строк items")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--itersize", type=int, default=DEFAULT_ITERSIZE)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", type=Path, default=None, help="куда сохранить результат")
+    parser.add_argument("--child", choices=MODES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        print(json.dumps(_run_child(args.child, args.rows[0], args.itersize)))
+        return 0
+
+    if not os.environ.get("DB_DSN"):
+        print("Нужна переменная окружения DB_DSN", file=sys.stderr)
+        return 2
+
+    results = []
+    print(f"{'режим':<8}{'строк':>10}{'items':>8}{'сек':>9}{'пик RSS, МБ':>14}")
+    for rows in args.rows:
+        for mode in args.modes:
+            result = _spawn(mode, rows, args.itersize)
+            results.append(result)
+            print(
+                f"{mode:<8}{rows:>10}{result['items']:>8}"
+                f"{result['seconds']:>9.3f}{result['peak_rss_delta_mb']:>14.1f}"
+            )
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
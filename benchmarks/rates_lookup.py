@@ -0,0 +1,96 @@
+"""Сравнение способов получить код сметы для строк items.
+
+join       — ITEMS_SQL с LEFT JOIN по TRIM(LOWER(...)) (как работает по умолчанию);
+memory     — ITEMS_WITHOUT_RATES_SQL + справочник расценок в памяти,
+             с загрузкой справочника на каждом запросе (холодный кэш);
+memory-hot — то же, но справочник уже загружен для водяного знака.
+
+Нужен живой PostgreSQL (DB_DSN) с реальными таблицами. Индекс
+skpdi_rates_work_name_norm_idx создаётся schema bootstrap; чтобы сравнить
+join с индексом и без, запустите бенчмарк до и после bootstrap.
+
+Пример:
+    DB_DSN=postgresql://... python benchmarks/rates_lookup.py --month 2025-01-01 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timezone
+import json
+import os
+from pathlib import Path
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+MODES = ("join", "memory", "memory-hot")
+
+
+def _run_mode(mode: str, month: date, repeat: int) -> dict[str, float]:
+    from app import queries
+    from app.config import get_settings
+    from app.db import get_connection
+
+    settings = get_settings()
+    settings.dashboard_sql_aggregation = False
+    settings.dashboard_rates_lookup = "join" if mode == "join" else "memory"
+    # Для memory-hot водяной знак постоянный, справочник грузится один раз
+    watermark = datetime.now(timezone.utc) if mode == "memory-hot" else None
+
+    timings: list[float] = []
+    items_count = 0
+    with get_connection() as conn:
+        # Прогрев: план запроса, кэш страниц, справочник для memory-hot
+        queries._fetch_items(conn, month, watermark)
+        conn.rollback()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            items, _ = queries._fetch_items(conn, month, watermark)
+            timings.append(time.perf_counter() - started)
+            items_count = len(items)
+            conn.rollback()
+
+    return {
+        "mode": mode,
+        "items": items_count,
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Сравнение join и справочника расценок в памяти")
+    parser.add_argument("--month", type=date.fromisoformat, default=date.today().replace(day=1))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", type=Path, default=None, help="куда сохранить результат")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DB_DSN"):
+        print("Нужна переменная окружения DB_DSN", file=sys.stderr)
+        return 2
+
+    month = args.month.replace(day=1)
+    results = [_run_mode(mode, month, max(1, args.repeat)) for mode in args.modes]
+
+    print(f"Месяц {month.isoformat()}, повторов: {args.repeat}")
+    print(f"{'режим':<12}{'items':>8}{'медиана, мс':>14}{'мин':>10}{'макс':>10}")
+    for result in results:
+        print(
+            f"{result['mode']:<12}{result['items']:>8}{result['median_ms']:>14.2f}"
+            f"{result['min_ms']:>10.2f}{result['max_ms']:>10.2f}"
+        )
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
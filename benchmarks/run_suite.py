@@ -0,0 +1,245 @@
+"""Набор бенчмарков горячих путей на синтетических данных (БД не нужна).
+
+Замеряет на строках разного размера (по умолчанию 100 … 500 000):
+  aggregate          — queries._aggregate_items_streaming;
+  vnr_plan           — queries._calculate_vnr_plan;
+  response_build     — сборка DashboardResponse;
+  response_serialize — DashboardResponse.model_dump_json;
+  pdf_group_items    — pdf._group_items;
+  pdf_build          — pdf.build_dashboard_pdf (только до --pdf-max-rows строк).
+
+С --dashboard-month дополнительно замеряется queries._build_dashboard в каждом
+режиме DASHBOARD_QUERY_MODE (multi, combined, parallel) на живой БД из DB_DSN:
+dashboard_<режим>, в колонке «строк» — число items месяца.
+
+Результаты печатаются таблицей и при --json сохраняются в файл. С --baseline
+медианы сравниваются с сохранёнными ранее; если какая-то стала медленнее
+более чем на --threshold (доля), скрипт завершается с кодом 1.
+
+Пример:
+    python benchmarks/run_suite.py --json bench.json
+    python benchmarks/run_suite.py --baseline bench.json --threshold 0.2
+    DB_DSN=postgresql://... python benchmarks/run_suite.py --sizes --dashboard-month 2025-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timezone
+import json
+import os
+import platform
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from synthetic import (  # noqa: E402
+    SYNTHETIC_LAST_UPDATED,
+    SYNTHETIC_MONTH,
+    SyntheticCursor,
+    generate_item_rows,
+)
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 500_000)
+DEFAULT_REPEAT = 5
+DEFAULT_PDF_MAX_ROWS = 10_000
+DEFAULT_THRESHOLD = 0.2
+BENCHMARKS = (
+    "aggregate",
+    "vnr_plan",
+    "response_build",
+    "response_serialize",
+    "pdf_group_items",
+    "pdf_build",
+)
+DASHBOARD_MODES = ("multi", "combined", "parallel")
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> tuple[list[float], Any]:
+    timings: list[float] = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def _result(name: str, rows: int, items: int, timings: list[float]) -> dict[str, Any]:
+    return {
+        "name": name,
+        "rows": rows,
+        "items": items,
+        "repeat": len(timings),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def run_size(rows: int, selected: set[str], repeat: int, pdf_max_rows: int) -> list[dict[str, Any]]:
+    from app import queries
+    from app.models import DashboardResponse
+
+    data = generate_item_rows(rows)
+    results: list[dict[str, Any]] = []
+
+    timings, items = _measure(lambda: queries._aggregate_items_streaming(SyntheticCursor(data)), repeat)
+    if "aggregate" in selected:
+        results.append(_result("aggregate", rows, len(items), timings))
+
+    if "vnr_plan" in selected:
+        timings, _ = _measure(lambda: queries._calculate_vnr_plan(items), repeat)
+        results.append(_result("vnr_plan", rows, len(items), timings))
+
+    def build_response() -> DashboardResponse:
+        return DashboardResponse(
+            month=SYNTHETIC_MONTH,
+            last_updated=SYNTHETIC_LAST_UPDATED,
+            summary=None,
+            items=items,
+            has_data=bool(items),
+        )
+
+    timings, response = _measure(build_response, repeat)
+    if "response_build" in selected:
+        results.append(_result("response_build", rows, len(items), timings))
+
+    if "response_serialize" in selected:
+        timings, _ = _measure(response.model_dump_json, repeat)
+        results.append(_result("response_serialize", rows, len(items), timings))
+
+    if selected & {"pdf_group_items", "pdf_build"}:
+        from app import pdf
+
+        if "pdf_group_items" in selected:
+            timings, _ = _measure(lambda: pdf._group_items(items), repeat)
+            results.append(_result("pdf_group_items", rows, len(items), timings))
+
+        if "pdf_build" in selected and rows <= pdf_max_rows:
+            timings, _ = _measure(
+                lambda: pdf.build_dashboard_pdf(SYNTHETIC_MONTH, SYNTHETIC_LAST_UPDATED, items, None),
+                max(1, min(repeat, 3)),
+            )
+            results.append(_result("pdf_build", rows, len(items), timings))
+
+    return results
+
+
+def run_dashboard_modes(month: date, modes: list[str], repeat: int) -> list[dict[str, Any]]:
+    """Замеряет сборку дашборда за month в каждом режиме загрузки на живой БД (DB_DSN)."""
+
+    from app import queries
+    from app.db import get_connection
+
+    results: list[dict[str, Any]] = []
+    for mode in modes:
+        with get_connection() as conn:
+
+            def build() -> queries.DashboardResult:
+                try:
+                    return queries._build_dashboard(conn, month, mode=mode)
+                finally:
+                    conn.rollback()
+
+            # Прогрев: планы запросов, кэш страниц, пул потоков режима parallel
+            build()
+            timings, (items, _summary, _last_updated) = _measure(build, repeat)
+        results.append(_result(f"dashboard_{mode}", len(items), len(items), timings))
+    return results
+
+
+def compare_with_baseline(
+    results: list[dict[str, Any]],
+    baseline: dict[str, Any],
+    threshold: float,
+) -> list[str]:
+    """Возвращает описания регрессий относительно сохранённых результатов."""
+
+    previous = {(entry["name"], entry["rows"]): entry for entry in baseline.get("results", [])}
+    regressions: list[str] = []
+    for entry in results:
+        before = previous.get((entry["name"], entry["rows"]))
+        if before is None or not before.get("median_ms"):
+            continue
+        ratio = entry["median_ms"] / before["median_ms"]
+        entry["baseline_median_ms"] = before["median_ms"]
+        entry["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{entry['name']} / {entry['rows']} строк: "
+                f"{before['median_ms']:.2f} → {entry['median_ms']:.2f} мс (×{ratio:.2f})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки агрегации, моделей и PDF на синтетике")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument(
+        "--dashboard-month",
+        type=date.fromisoformat,
+        default=None,
+        help="месяц для сравнения режимов загрузки дашборда на БД из DB_DSN",
+    )
+    parser.add_argument("--dashboard-modes", nargs="+", choices=DASHBOARD_MODES, default=list(DASHBOARD_MODES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--pdf-max-rows", type=int, default=DEFAULT_PDF_MAX_ROWS)
+    parser.add_argument("--json", type=Path, default=None, help="куда сохранить результат")
+    parser.add_argument("--baseline", type=Path, default=None, help="результат прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимое замедление (доля)")
+    args = parser.parse_args(argv)
+
+    if args.dashboard_month is not None and not os.environ.get("DB_DSN"):
+        print("Для --dashboard-month нужна переменная окружения DB_DSN", file=sys.stderr)
+        return 2
+
+    selected = set(args.only)
+    results: list[dict[str, Any]] = []
+    for rows in args.sizes:
+        results.extend(run_size(rows, selected, max(1, args.repeat), args.pdf_max_rows))
+    if args.dashboard_month is not None:
+        month = args.dashboard_month.replace(day=1)
+        results.extend(run_dashboard_modes(month, args.dashboard_modes, max(1, args.repeat)))
+
+    regressions: list[str] = []
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+
+    print(f"{'бенчмарк':<20}{'строк':>9}{'items':>8}{'медиана, мс':>14}{'мин, мс':>11}{'к базе':>9}")
+    for entry in results:
+        ratio = f"×{entry['ratio']:.2f}" if "ratio" in entry else ""
+        print(
+            f"{entry['name']:<20}{entry['rows']:>9}{entry['items']:>8}"
+            f"{entry['median_ms']:>14.3f}{entry['min_ms']:>11.3f}{ratio:>9}"
+        )
+
+    if args.json is not None:
+        payload = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        args.json.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if regressions:
+        print("РЕГРЕССИИ:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
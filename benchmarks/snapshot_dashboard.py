@@ -0,0 +1,94 @@
+"""Полный путь сборки дашборда на снимке SQLite, без PostgreSQL.
+
+Снимок либо генерируется из синтетики (--rows), либо берётся готовый,
+выгруженный из рабочей БД (--snapshot, --month). Каждый прогон — холодная
+сборка: чтение items и агрегатов из снимка и _assemble_dashboard, без кэшей
+дашборда. Так изменения в агрегации и сборке ответа можно сравнивать на
+одних и тех же данных на любой машине.
+
+Пример:
+    python benchmarks/snapshot_dashboard.py --rows 1000 10000 100000
+    python benchmarks/snapshot_dashboard.py --snapshot snapshot.sqlite --month 2025-11-01
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from synthetic import SYNTHETIC_MONTH, write_synthetic_snapshot  # noqa: E402
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+DEFAULT_REPEAT = 5
+
+
+def measure(snapshot: Path, month_start: date, repeat: int) -> dict[str, Any]:
+    from app.queries import _assemble_dashboard
+    from app.snapshot import SnapshotDataSource
+
+    source = SnapshotDataSource(snapshot)
+    timings: list[float] = []
+    items: list[Any] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with source.session() as session:
+            data = session.dashboard_data(month_start, session.last_updated())
+        items, _summary = _assemble_dashboard(month_start, data)
+        timings.append(time.perf_counter() - started)
+    return {
+        "snapshot": str(snapshot),
+        "month": month_start.isoformat(),
+        "items": len(items),
+        "repeat": repeat,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Сборка дашборда на снимке SQLite")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--snapshot", type=Path, default=None, help="готовый снимок вместо синтетики")
+    parser.add_argument("--month", type=date.fromisoformat, default=None, help="месяц для --snapshot")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args(argv)
+    repeat = max(1, args.repeat)
+
+    results: list[dict[str, Any]] = []
+    if args.snapshot is not None:
+        if args.month is None:
+            parser.error("--snapshot требует --month")
+        results.append(measure(args.snapshot, args.month, repeat))
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for rows in args.rows:
+                path = Path(tmp_dir) / f"synthetic_{rows}.sqlite"
+                write_synthetic_snapshot(path, rows)
+                result = measure(path, SYNTHETIC_MONTH, repeat)
+                result["rows"] = rows
+                results.append(result)
+
+    for result in results:
+        print(
+            f"{result.get('rows', '-')!s:>8} строк  {result['items']:>6} items  "
+            f"медиана {result['median_ms']:.2f} мс  мин {result['min_ms']:.2f} мс"
+        )
+    if args.json is not None:
+        args.json.write_text(json.dumps({"results": results}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
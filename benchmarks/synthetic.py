@@ -0,0 +1,192 @@
+"""Синтетические строки в форме skpdi_plan_vs_fact_monthly для бенчмарков без БД.
+
+Строки — кортежи в порядке ITEM_COLUMNS, как их отдаёт кортежный курсор
+после register_numeric_as_float (NUMERIC уже float). Генерация
+детерминирована: одинаковые seed и размер дают одинаковые данные.
+write_synthetic_snapshot складывает такие же данные в файл снимка
+(app/snapshot.py), чтобы гонять полный путь дашборда без PostgreSQL.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import random
+from typing import Any, Iterator, Sequence
+
+# Колонки pvf.* + rates.smeta_code AS category_code, которые читает агрегация
+ITEM_COLUMNS: tuple[str, ...] = (
+    "month_start",
+    "smeta",
+    "smeta_code",
+    "work_name",
+    "description",
+    "planned_amount",
+    "fact_amount_done",
+    "delta_amount_done",
+    "category_code",
+)
+
+SYNTHETIC_MONTH = date(2025, 1, 1)
+SYNTHETIC_LAST_UPDATED = datetime(2025, 1, 31, 21, 0, tzinfo=timezone.utc)
+
+# (smeta, smeta_code, доля строк): сезонные сметы, внерегламент и прочие
+_SMETAS: tuple[tuple[str, str, float], ...] = (
+    ("Лето", "лето", 0.45),
+    ("Зима", "зима", 0.25),
+    ("Внерегламентные работы ч.1", "внерегл_ч_1", 0.12),
+    ("Внерегламентные работы ч.2", "внерегл_ч_2", 0.08),
+    ("Содержание", "содержание", 0.10),
+)
+
+
+def _distinct_works(rows: int) -> int:
+    # В реальных месяцах сотни различных работ; на малых размерах каждая
+    # работа встречается несколько раз, чтобы агрегация что-то складывала
+    return max(10, min(rows // 4, 5000))
+
+
+def generate_item_rows(rows: int, *, seed: int = 42, distinct_works: int | None = None) -> list[tuple[Any, ...]]:
+    """Возвращает rows строк с повторяющимися работами разных смет."""
+
+    rng = random.Random(seed)
+    works = distinct_works or _distinct_works(rows)
+    weights = [share for _, _, share in _SMETAS]
+    work_smetas = rng.choices(_SMETAS, weights=weights, k=works)
+
+    result: list[tuple[Any, ...]] = []
+    for index in range(rows):
+        work = index % works
+        smeta, smeta_code, _ = work_smetas[work]
+        description = f"Работа {work}: {smeta.lower()}, участок {work % 37}"
+        planned = round(rng.uniform(0, 250_000), 2) if rng.random() < 0.8 else None
+        fact = round(rng.uniform(0, 250_000), 2) if rng.random() < 0.7 else None
+        delta = (fact or 0.0) - (planned or 0.0)
+        result.append(
+            (
+                SYNTHETIC_MONTH,
+                smeta,
+                smeta_code,
+                description if rng.random() < 0.5 else None,
+                description,
+                planned,
+                fact,
+                delta,
+                smeta_code if rng.random() < 0.9 else None,
+            )
+        )
+    return result
+
+
+FACT_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("date_done", "TIMESTAMP"),
+    ("month_start", "DATE"),
+    ("status", "TEXT"),
+    ("description", "TEXT"),
+    ("smeta_code", "TEXT"),
+    ("smeta_section", "TEXT"),
+    ("unit", "TEXT"),
+    ("total_volume", "REAL"),
+    ("total_amount", "REAL"),
+)
+
+
+def generate_fact_rows(item_rows: Sequence[tuple[Any, ...]], *, seed: int = 42) -> list[tuple[Any, ...]]:
+    """Строки skpdi_fact_with_money, раскладывающие факт item_rows по дням месяца.
+
+    Колонки — FACT_COLUMNS, даты уже ISO-строками, как в снимке.
+    """
+
+    rng = random.Random(seed)
+    fact_position = ITEM_COLUMNS.index("fact_amount_done")
+    result: list[tuple[Any, ...]] = []
+    for row in item_rows:
+        fact = row[fact_position]
+        if not fact:
+            continue
+        day = SYNTHETIC_MONTH + timedelta(days=rng.randrange(28))
+        volume = round(rng.uniform(1, 500), 2)
+        result.append(
+            (
+                f"{day.isoformat()}T{rng.randrange(7, 20):02d}:00:00+03:00",
+                SYNTHETIC_MONTH.isoformat(),
+                "Рассмотрено",
+                row[ITEM_COLUMNS.index("description")],
+                row[ITEM_COLUMNS.index("smeta_code")],
+                row[ITEM_COLUMNS.index("smeta")],
+                "м2",
+                volume,
+                fact,
+            )
+        )
+    return result
+
+
+def write_synthetic_snapshot(path: str | Path, rows: int, *, seed: int = 42) -> None:
+    """Пишет снимок с rows строками плана-факта за SYNTHETIC_MONTH."""
+
+    from app.constants import (
+        TABLE_CONTRACT_EXECUTED,
+        TABLE_CONTRACT_TOTAL,
+        TABLE_FACT_AGG,
+        TABLE_FACT_WITH_MONEY,
+        TABLE_PLAN_AGG,
+        TABLE_PLAN_VS_FACT_MONTHLY,
+        TABLE_RATES,
+    )
+    from app.snapshot import SnapshotWriter
+
+    item_rows = generate_item_rows(rows, seed=seed)
+    # category_code приходит из справочника расценок, в самой таблице его нет
+    pvf_columns = ITEM_COLUMNS[:-1]
+    pvf_types = {
+        "month_start": "DATE",
+        "planned_amount": "REAL",
+        "fact_amount_done": "REAL",
+        "delta_amount_done": "REAL",
+    }
+    description_position = ITEM_COLUMNS.index("description")
+    rates = {row[description_position]: row[-1] for row in item_rows if row[-1] is not None}
+
+    with SnapshotWriter(path) as writer:
+        writer.add_table(
+            TABLE_PLAN_VS_FACT_MONTHLY,
+            [(name, pvf_types.get(name, "TEXT")) for name in pvf_columns],
+            ((row[0].isoformat(), *row[1:-1]) for row in item_rows),
+            ("month_start",),
+        )
+        writer.add_table(TABLE_RATES, [("work_name", "TEXT"), ("smeta_code", "TEXT")], rates.items())
+        for table in (TABLE_FACT_AGG, TABLE_PLAN_AGG):
+            writer.add_table(table, [("loaded_at", "TIMESTAMP")], [(SYNTHETIC_LAST_UPDATED,)])
+        writer.add_table(TABLE_CONTRACT_TOTAL, [("contract_amount", "REAL")], [(1.5e9,)])
+        writer.add_table(TABLE_CONTRACT_EXECUTED, [("category_amount", "REAL")], [(4.2e8,)])
+        writer.add_table(
+            TABLE_FACT_WITH_MONEY,
+            FACT_COLUMNS,
+            generate_fact_rows(item_rows, seed=seed),
+            ("date_done", "month_start"),
+        )
+        writer.finish(source="synthetic")
+
+
+class SyntheticCursor:
+    """Минимальная замена кортежного курсора psycopg2: description и итерация."""
+
+    def __init__(self, rows: Sequence[tuple[Any, ...]], columns: Sequence[str] = ITEM_COLUMNS) -> None:
+        self._rows = rows
+        self.description = [(name,) for name in columns]
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        return iter(self._rows)
+
+
+__all__ = [
+    "FACT_COLUMNS",
+    "ITEM_COLUMNS",
+    "SYNTHETIC_LAST_UPDATED",
+    "SYNTHETIC_MONTH",
+    "SyntheticCursor",
+    "generate_fact_rows",
+    "generate_item_rows",
+    "write_synthetic_snapshot",
+]
@@ -80,20 +80,18 @@ export class DataManager {
     }
     const url = new URL(this.apiUrl, window.location.origin);
     url.searchParams.set("month", monthIso);
-    // Добавляем технический параметр, чтобы обойти агрессивные HTTP-кэши
-    // (например, на стороне браузера или CDN) и гарантировать получение
-    // свежих данных сразу после обновления в источнике.
-    url.searchParams.set("_", Date.now().toString());
+    // Сервер отдаёт ETag по времени последней загрузки данных. Режим
+    // cache: "no-cache" заставляет браузер перепроверять сохранённый ответ
+    // через If-None-Match: при неизменных данных приходит пустой 304,
+    // а после новой загрузки — свежий ответ.
     const headers = {
-      "Cache-Control": "no-cache",
-      Pragma: "no-cache",
       ...(this.visitorTracker ? this.visitorTracker.buildHeaders() : {}),
     };
 
     const response = await withRetry(
       () =>
         fetch(url.toString(), {
-          cache: "no-store",
+          cache: "no-cache",
           headers,
         }).then((res) => {
           if (!res.ok) {
@@ -112,7 +110,7 @@ export class DataManager {
     const response = await withRetry(
       () =>
         fetch(this.monthsUrl, {
-          cache: "no-store",
+          cache: "no-cache",
           headers: this.visitorTracker ? this.visitorTracker.buildHeaders() : undefined,
         }).then((res) => {
           if (!res.ok) {
@@ -130,7 +128,7 @@ export class DataManager {
     const response = await withRetry(
       () =>
         fetch(this.daysUrl, {
-          cache: "no-store",
+          cache: "no-cache",
           headers: this.visitorTracker ? this.visitorTracker.buildHeaders() : undefined,
         }).then((res) => {
           if (!res.ok) {
@@ -158,17 +156,14 @@ export class DataManager {
 
     const url = new URL(this.dailyUrl, window.location.origin);
     url.searchParams.set("day", dayIso);
-    url.searchParams.set("_", Date.now().toString());
     const headers = {
-      "Cache-Control": "no-cache",
-      Pragma: "no-cache",
       ...(this.visitorTracker ? this.visitorTracker.buildHeaders() : {}),
     };
 
     const response = await withRetry(
       () =>
         fetch(url.toString(), {
-          cache: "no-store",
+          cache: "no-cache",
           headers,
         }).then((res) => {
           if (!res.ok) {
@@ -0,0 +1,88 @@
+"""Общие фикстуры тестов: пути импорта и синтетический снимок.
+
+Тесты не требуют PostgreSQL: данные берутся из benchmarks/synthetic.py и
+файла снимка SQLite (app/snapshot.py). Проверки, которым нужна настоящая
+БД, пропускаются, если не задан TEST_DB_DSN. Пул соединений проверяется
+на поддельных соединениях (фикстура connections).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# benchmarks/ — набор скриптов, а не пакет: они импортируют synthetic напрямую
+for path in (PROJECT_ROOT, PROJECT_ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from app import db  # noqa: E402
+from synthetic import write_synthetic_snapshot  # noqa: E402
+
+SYNTHETIC_ROWS = 600
+
+
+@pytest.fixture(scope="session")
+def synthetic_snapshot(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Файл снимка с SYNTHETIC_ROWS строками плана-факта за SYNTHETIC_MONTH."""
+
+    path = tmp_path_factory.mktemp("snapshot") / "synthetic.sqlite"
+    write_synthetic_snapshot(path, SYNTHETIC_ROWS)
+    return path
+
+
+class FakeInfo:
+    transaction_status = TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection") -> None:
+        self._conn = conn
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: object = None) -> None:
+        if self._conn.broken:
+            raise OperationalError("server closed the connection unexpectedly")
+        self._conn.executed.append(sql)
+
+
+class FakeConnection:
+    """Соединение psycopg2 без сервера: пулу хватает статуса транзакции и close()."""
+
+    def __init__(self) -> None:
+        self.closed = 0
+        self.broken = False
+        self.executed: list[str] = []
+        self.info = FakeInfo()
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def rollback(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+@pytest.fixture
+def connections(monkeypatch: pytest.MonkeyPatch) -> list[FakeConnection]:
+    opened: list[FakeConnection] = []
+
+    def connect(_conninfo: str) -> FakeConnection:
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(db, "connect", connect)
+    return opened
@@ -0,0 +1,193 @@
+"""Совпадение результатов разных путей агрегации items на синтетических данных.
+
+Один и тот же месяц собирается несколькими способами, которые переключаются
+настройками, и все они должны давать одинаковые items и итоги.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+import pytest
+
+from app import queries
+from app.models import DashboardItem
+from app.snapshot import SnapshotDataSource, _qmark
+from synthetic import ITEM_COLUMNS, SYNTHETIC_MONTH, generate_item_rows
+
+ItemKey = tuple[str | None, str | None, str | None, str]
+
+
+def _by_key(items: Iterable[DashboardItem]) -> dict[ItemKey, tuple[float, float]]:
+    result: dict[ItemKey, tuple[float, float]] = {}
+    for item in items:
+        key = (item.category, item.smeta, item.work_name, item.description)
+        assert key not in result, f"повтор ключа группировки {key}"
+        result[key] = (item.planned_amount or 0.0, item.fact_amount or 0.0)
+    return result
+
+
+def _assert_same_items(actual: Iterable[DashboardItem], expected: Iterable[DashboardItem]) -> None:
+    actual_map, expected_map = _by_key(actual), _by_key(expected)
+    assert actual_map.keys() == expected_map.keys()
+    for key, (planned, fact) in expected_map.items():
+        assert actual_map[key] == (pytest.approx(planned), pytest.approx(fact)), key
+
+
+@pytest.fixture(scope="module")
+def joined_items(synthetic_snapshot: Path) -> list[DashboardItem]:
+    """Items основного пути: код сметы соединяется в SQL (ITEMS_SQL), группировка в Python."""
+
+    with SnapshotDataSource(synthetic_snapshot).session() as session:
+        cursor = session.conn.execute(_qmark(queries.ITEMS_SQL), (SYNTHETIC_MONTH.isoformat(),))
+        return queries._aggregate_items_streaming(cursor)
+
+
+def test_rates_lookup_in_memory_matches_sql_join(
+    synthetic_snapshot: Path, joined_items: list[DashboardItem]
+) -> None:
+    with SnapshotDataSource(synthetic_snapshot).session() as session:
+        data = session.dashboard_data(SYNTHETIC_MONTH, None)
+
+    assert joined_items
+    _assert_same_items(data.items, joined_items)
+
+
+def test_dict_rows_match_tuple_rows() -> None:
+    rows = generate_item_rows(500)
+    columns = queries._ItemColumns.from_names(ITEM_COLUMNS)
+    dict_rows = [dict(zip(ITEM_COLUMNS, row)) for row in rows]
+
+    _assert_same_items(queries._aggregate_item_dicts(dict_rows), queries._aggregate_item_rows(rows, columns))
+
+
+def test_aggregation_keeps_totals() -> None:
+    rows = generate_item_rows(1000)
+    items = queries._aggregate_item_rows(rows, queries._ItemColumns.from_names(ITEM_COLUMNS))
+    fact_position = ITEM_COLUMNS.index("fact_amount_done")
+
+    assert sum(item.fact_amount or 0.0 for item in items) == pytest.approx(
+        sum(row[fact_position] or 0.0 for row in rows)
+    )
+
+
+def test_dashboard_range_matches_items(synthetic_snapshot: Path, joined_items: list[DashboardItem]) -> None:
+    with SnapshotDataSource(synthetic_snapshot).session() as session:
+        data = session.dashboard_data(SYNTHETIC_MONTH, None)
+        (month,) = session.dashboard_range(SYNTHETIC_MONTH, SYNTHETIC_MONTH)
+
+    vnr_plan = queries._calculate_vnr_plan(joined_items)
+    assert month.has_data
+    assert month.planned_amount == pytest.approx(data.summary_row["planned_total"] + vnr_plan)
+    assert month.fact_amount == pytest.approx(data.summary_row["fact_total"])
+
+    expected: dict[str, list[float]] = {}
+    for item in joined_items:
+        category = item.category or ""
+        if category.strip().lower() in queries._VNR_CATEGORY_CODES:
+            category = queries.CATEGORY_VNR_LABEL
+        entry = expected.setdefault(category, [0.0, 0.0])
+        entry[0] += item.planned_amount or 0.0
+        entry[1] += item.fact_amount or 0.0
+    expected.setdefault(queries.CATEGORY_VNR_LABEL, [0.0, 0.0])[0] += vnr_plan
+
+    actual = {total.category: (total.planned_amount, total.fact_amount) for total in month.categories or []}
+    assert actual.keys() == expected.keys()
+    for category, (planned, fact) in expected.items():
+        assert actual[category] == (pytest.approx(planned), pytest.approx(fact)), category
+
+
+def test_dashboard_range_tolerates_missing_view_columns() -> None:
+    sql = queries.build_dashboard_range_sql(["month_start", "description", "planned_amount", "fact_amount_done"])
+
+    assert "pvf.smeta" not in sql
+    assert "rates.smeta_code" in sql
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_DB_DSN"), reason="нужен PostgreSQL (TEST_DB_DSN)")
+def test_sql_aggregation_matches_python(monkeypatch: pytest.MonkeyPatch) -> None:
+    """_build_items_aggregated_sql против Python-агрегации на временных таблицах."""
+
+    from psycopg2 import connect
+    from psycopg2.extras import execute_values
+
+    from app.db import register_numeric_as_float
+
+    monkeypatch.setattr(queries, "_items_aggregated_sql", None)
+    rows = generate_item_rows(2000)
+    pvf_columns = ITEM_COLUMNS[:-1]
+    description_position = ITEM_COLUMNS.index("description")
+    rates = {row[description_position]: row[-1] for row in rows if row[-1] is not None}
+
+    conn = connect(os.environ["TEST_DB_DSN"])
+    try:
+        with conn.cursor() as cur:
+            # Временные таблицы с теми же именами перекрывают рабочие в этой сессии
+            cur.execute(
+                f"""
+                CREATE TEMP TABLE {queries.TABLE_PLAN_VS_FACT_MONTHLY} (
+                    month_start date, smeta text, smeta_code text, work_name text,
+                    description text, planned_amount numeric, fact_amount_done numeric,
+                    delta_amount_done numeric
+                );
+                CREATE TEMP TABLE {queries.TABLE_RATES} (work_name text, smeta_code text);
+                """
+            )
+            execute_values(
+                cur,
+                f"INSERT INTO {queries.TABLE_PLAN_VS_FACT_MONTHLY} ({', '.join(pvf_columns)}) VALUES %s",
+                [row[:-1] for row in rows],
+            )
+            execute_values(cur, f"INSERT INTO {queries.TABLE_RATES} VALUES %s", list(rates.items()))
+
+        aggregated = queries._fetch_items_aggregated(conn, SYNTHETIC_MONTH)
+        with conn.cursor() as cur:
+            register_numeric_as_float(cur)
+            cur.execute(queries.ITEMS_SQL, (SYNTHETIC_MONTH,))
+            expected = queries._aggregate_items_streaming(cur)
+    finally:
+        conn.rollback()
+        conn.close()
+
+    assert aggregated is not None
+    items, vnr_plan = aggregated
+    _assert_same_items(items, expected)
+    assert vnr_plan == pytest.approx(queries._calculate_vnr_plan(expected))
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_DB_DSN"), reason="нужен PostgreSQL (TEST_DB_DSN)")
+def test_combined_mode_matches_multi(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Режим combined против multi на данных TEST_DB_DSN за последний месяц с планом."""
+
+    from psycopg2 import connect
+
+    def fail_fallback(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("объединённый запрос завершился ошибкой и перешёл на multi")
+
+    conn = connect(os.environ["TEST_DB_DSN"])
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT MAX(month_start) FROM {queries.TABLE_PLAN_VS_FACT_MONTHLY}")
+            (month,) = cur.fetchone()
+        if month is None:
+            pytest.skip("в TEST_DB_DSN нет данных плана-факта")
+        multi_items, multi_summary, _ = queries._build_dashboard(conn, month, mode="multi")
+        conn.rollback()
+        monkeypatch.setattr(queries, "_load_dashboard_multi", fail_fallback)
+        combined_items, combined_summary, _ = queries._build_dashboard(conn, month, mode="combined")
+    finally:
+        conn.rollback()
+        conn.close()
+
+    _assert_same_items(combined_items, multi_items)
+    assert (combined_summary is None) == (multi_summary is None)
+    if multi_summary is not None:
+        expected = multi_summary.model_dump(exclude={"daily_revenue"})
+        assert combined_summary.model_dump(exclude={"daily_revenue"}) == pytest.approx(expected)
+        expected_daily = [day.model_dump() for day in multi_summary.daily_revenue or []]
+        actual_daily = [day.model_dump() for day in combined_summary.daily_revenue or []]
+        assert len(actual_daily) == len(expected_daily)
+        for actual_day, expected_day in zip(actual_daily, expected_daily):
+            assert actual_day == pytest.approx(expected_day)
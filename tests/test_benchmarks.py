@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from run_suite import compare_with_baseline
+
+
+def _entry(name: str, rows: int, median_ms: float) -> dict[str, object]:
+    return {"name": name, "rows": rows, "median_ms": median_ms}
+
+
+def test_regression_above_threshold_is_reported() -> None:
+    baseline = {"results": [_entry("aggregate", 1000, 10.0), _entry("vnr_plan", 1000, 2.0)]}
+    results = [_entry("aggregate", 1000, 13.0), _entry("vnr_plan", 1000, 2.1)]
+
+    regressions = compare_with_baseline(results, baseline, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("aggregate / 1000 строк")
+    assert results[0]["ratio"] == 1.3
+    assert results[1]["baseline_median_ms"] == 2.0
+
+
+def test_entries_without_baseline_are_skipped() -> None:
+    baseline = {"results": [_entry("aggregate", 100, 0.0)]}
+    results = [_entry("aggregate", 100, 5.0), _entry("aggregate", 1000, 50.0)]
+
+    assert compare_with_baseline(results, baseline, threshold=0.2) == []
+    assert all("ratio" not in entry for entry in results)
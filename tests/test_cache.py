@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import LRUCache
+
+
+def test_get_counts_hits_and_misses() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", 0) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_put_existing_key_refreshes_position() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_zero_size_disables_cache() -> None:
+    cache: LRUCache[str, int] = LRUCache(0)
+    cache.put("a", 1)
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_clear_drops_entries() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_ttl_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(cache_module, "monotonic", lambda: now[0])
+    cache: LRUCache[str, int] = LRUCache(2, ttl_sec=10)
+    cache.put("a", 1)
+
+    now[0] = 109.9
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_is_renewed_by_put(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(cache_module, "monotonic", lambda: now[0])
+    cache: LRUCache[str, int] = LRUCache(2, ttl_sec=10)
+    cache.put("a", 1)
+    now[0] = 8.0
+    cache.put("a", 2)
+    now[0] = 15.0
+
+    assert cache.get("a") == 2
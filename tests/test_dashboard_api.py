@@ -0,0 +1,110 @@
+"""Эндпоинты дашборда на синтетическом снимке: ETag/304 и форма ответов."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+from starlette.requests import Request
+
+from app import data_source
+from app.constants import API_PREFIX
+from app.routers import dashboard
+from app.snapshot import SnapshotDataSource
+from synthetic import SYNTHETIC_LAST_UPDATED, SYNTHETIC_MONTH
+
+MONTH = SYNTHETIC_MONTH.isoformat()
+
+
+def _request(headers: dict[str, str]) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch, synthetic_snapshot: Path) -> TestClient:
+    monkeypatch.setattr(data_source, "_source", SnapshotDataSource(synthetic_snapshot))
+    # Визиты пишутся фоновым потоком в PostgreSQL, которого в тестах нет
+    monkeypatch.setattr(dashboard, "log_dashboard_visit", lambda **_kwargs: None)
+    app = FastAPI()
+    app.include_router(dashboard.router, prefix=API_PREFIX)
+    return TestClient(app)
+
+
+def test_etag_depends_on_watermark_and_parameters() -> None:
+    etag = dashboard._make_etag(SYNTHETIC_LAST_UPDATED, "/dashboard", MONTH)
+
+    assert etag == dashboard._make_etag(SYNTHETIC_LAST_UPDATED, "/dashboard", MONTH)
+    assert etag != dashboard._make_etag(None, "/dashboard", MONTH)
+    assert etag != dashboard._make_etag(SYNTHETIC_LAST_UPDATED, "/dashboard", "2025-02-01")
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.parametrize(
+    ("header", "matches"),
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other", "abc"', True),
+        ("*", True),
+        ('"other"', False),
+    ],
+)
+def test_etag_matches_if_none_match(header: str | None, matches: bool) -> None:
+    request = _request({"If-None-Match": header} if header else {})
+
+    assert dashboard._etag_matches(request, '"abc"') is matches
+
+
+def test_dashboard_returns_not_modified_for_current_etag(client: TestClient) -> None:
+    response = client.get(f"{API_PREFIX}/dashboard", params={"month": MONTH})
+    assert response.status_code == 200
+    assert response.json()["items"]
+    etag = response.headers["etag"]
+
+    cached = client.get(f"{API_PREFIX}/dashboard", params={"month": MONTH}, headers={"If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+
+def test_dashboard_with_last_good_skips_watermark_precheck(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    etag = client.get(f"{API_PREFIX}/dashboard", params={"month": MONTH}).headers["etag"]
+
+    def fail() -> None:
+        raise AssertionError("водяной знак читается до stale-while-revalidate")
+
+    # При недоступной БД этот запрос ждал бы пул и повтор db_retry
+    monkeypatch.setattr(dashboard, "fetch_last_updated", fail)
+    cached = client.get(f"{API_PREFIX}/dashboard", params={"month": MONTH}, headers={"If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+def test_dashboard_range_rejects_too_long_range(client: TestClient) -> None:
+    response = client.get(
+        f"{API_PREFIX}/dashboard/range", params={"start": "2023-01-01", "end": "2025-12-01"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_work_breakdown_all_is_paginated(client: TestClient) -> None:
+    first = client.get(f"{API_PREFIX}/dashboard/work-breakdown/all", params={"month": MONTH, "limit": 2})
+    second = client.get(
+        f"{API_PREFIX}/dashboard/work-breakdown/all", params={"month": MONTH, "limit": 2, "offset": 2}
+    )
+
+    assert first.status_code == second.status_code == 200
+    first_page, second_page = first.json(), second.json()
+    assert first_page["total"] == second_page["total"] > 4
+    assert len(first_page["works"]) == len(second_page["works"]) == 2
+    assert not first_page["works"].keys() & second_page["works"].keys()
+    assert first.headers["etag"] != second.headers["etag"]
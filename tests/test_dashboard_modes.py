@@ -0,0 +1,58 @@
+"""Режим parallel загрузки дашборда на поддельном пуле соединений."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from threading import Barrier
+
+import pytest
+
+from app import db, queries
+from app.config import get_settings
+from app.db import _ThreadSafeConnectionPool
+from conftest import FakeConnection
+
+MONTH = date(2025, 1, 1)
+
+
+def test_parallel_mode_releases_connection_before_waiting(
+    connections: list[FakeConnection], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Пул на два соединения и две одновременные загрузки: каждая держит
+    # соединение, пока читает items, а подзапросам нужны ещё соединения
+    pool = _ThreadSafeConnectionPool(
+        "postgresql://test", min_size=0, max_size=2, acquire_timeout=2.0, max_lifetime_sec=0.0
+    )
+    monkeypatch.setattr(db, "_pool", pool)
+    settings = get_settings()
+    monkeypatch.setattr(settings, "dashboard_query_mode", "parallel")
+    monkeypatch.setattr(settings, "dashboard_parallel_workers", 3)
+    monkeypatch.setattr(queries, "_query_executor", None)
+
+    both_reading_items = Barrier(2)
+
+    def fetch_items(_conn: object, _month: date, _watermark: object) -> tuple[list, float]:
+        both_reading_items.wait(5)
+        return [], 0.0
+
+    monkeypatch.setattr(queries, "_fetch_items", fetch_items)
+    monkeypatch.setattr(queries, "_fetch_daily_fact_totals", lambda _conn, _month: [])
+    monkeypatch.setattr(queries, "_fetch_contract_progress", lambda _conn, _month: None)
+    monkeypatch.setattr(queries, "_fetch_summary_row", lambda _conn, _month: {"planned_total": 1.0})
+
+    def load() -> queries.DashboardData:
+        with queries.PostgresDataSource().session() as session:
+            return session.dashboard_data(MONTH, None)
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = [future.result(10) for future in [executor.submit(load) for _ in range(2)]]
+    finally:
+        if queries._query_executor is not None:
+            queries._query_executor.shutdown(wait=True)
+
+    assert [data.summary_row for data in results] == [{"planned_total": 1.0}] * 2
+    stats = pool.stats()
+    assert stats["timeouts_total"] == 0
+    assert stats["in_use"] == 0
@@ -0,0 +1,150 @@
+"""Пул соединений (app/db.py) на поддельных соединениях без PostgreSQL."""
+
+from __future__ import annotations
+
+from threading import Thread
+import time
+
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError
+import pytest
+
+from app.db import PoolTimeout, _ThreadSafeConnectionPool
+from conftest import FakeConnection
+
+
+def _make_pool(**kwargs: float) -> _ThreadSafeConnectionPool:
+    options = {"min_size": 0, "max_size": 1, "acquire_timeout": 5.0, "max_lifetime_sec": 0.0}
+    options.update(kwargs)
+    return _ThreadSafeConnectionPool("postgresql://test", **options)
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "условие не выполнилось вовремя"
+        time.sleep(0.001)
+
+
+def test_released_connection_is_reused(connections: list[FakeConnection]) -> None:
+    pool = _make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert len(connections) == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_waiter_receives_released_connection(connections: list[FakeConnection]) -> None:
+    pool = _make_pool()
+    received: list[object] = []
+
+    def wait_for_connection() -> None:
+        with pool.connection() as conn:
+            received.append(conn)
+
+    with pool.connection() as held:
+        waiter = Thread(target=wait_for_connection)
+        waiter.start()
+        _wait_for(lambda: pool.stats()["waiting"] == 1)
+    waiter.join(5)
+
+    assert received == [held]
+    assert pool.stats()["waited_total"] == 1
+    assert len(connections) == 1
+
+
+def test_acquire_times_out_when_pool_is_exhausted(connections: list[FakeConnection]) -> None:
+    pool = _make_pool(acquire_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+
+    stats = pool.stats()
+    assert stats["timeouts_total"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_recently_used_connection_skips_validation(connections: list[FakeConnection]) -> None:
+    pool = _make_pool(validate_idle_sec=60.0)
+    for _ in range(3):
+        with pool.connection():
+            pass
+
+    assert pool.stats()["validations_total"] == 0
+    assert connections[0].executed == []
+
+
+def test_idle_connection_is_validated(connections: list[FakeConnection]) -> None:
+    pool = _make_pool(validate_idle_sec=0.0)
+    with pool.connection():
+        pass
+
+    assert pool.stats()["validations_total"] == 1
+    assert connections[0].executed == ["SELECT 1"]
+
+
+def test_network_error_forces_validation_of_idle_connections(
+    connections: list[FakeConnection],
+) -> None:
+    pool = _make_pool(max_size=2, validate_idle_sec=60.0)
+    with pool.connection(), pool.connection():
+        pass
+
+    with pytest.raises(OperationalError):
+        with pool.connection() as failed:
+            raise OperationalError("connection reset")
+
+    # Соединение с ошибкой закрыто, а простаивавшее до обрыва проверяется перед выдачей
+    with pool.connection() as survivor:
+        pass
+
+    assert failed.closed
+    assert survivor is not failed
+    assert survivor.executed == ["SELECT 1"]
+    assert pool.stats()["validations_total"] == 1
+
+
+def test_broken_idle_connection_is_replaced_on_validation(connections: list[FakeConnection]) -> None:
+    pool = _make_pool(validate_idle_sec=0.0)
+    with pool.connection():
+        pass
+    connections[0].broken = True
+
+    with pool.connection() as conn:
+        pass
+
+    assert conn is connections[1]
+    assert connections[0].closed
+    assert pool.stats()["size"] == 1
+
+
+def test_close_wakes_waiters_with_pool_error(connections: list[FakeConnection]) -> None:
+    pool = _make_pool(acquire_timeout=30.0)
+    errors: list[BaseException] = []
+
+    def wait_for_connection() -> None:
+        try:
+            with pool.connection():
+                pass
+        except PoolError as exc:
+            errors.append(exc)
+
+    with pool.connection():
+        waiters = [Thread(target=wait_for_connection) for _ in range(2)]
+        for waiter in waiters:
+            waiter.start()
+        _wait_for(lambda: pool.stats()["waiting"] == 2)
+        started = time.monotonic()
+        pool.close()
+        for waiter in waiters:
+            waiter.join(5)
+
+    assert time.monotonic() - started < 5
+    assert len(errors) == 2
+    assert not any(isinstance(exc, PoolTimeout) for exc in errors)
+    assert connections[0].closed
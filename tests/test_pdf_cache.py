@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+import os
+from pathlib import Path
+
+from app.pdf_cache import PdfDiskCache
+
+MONTH = date(2025, 1, 1)
+
+
+def _age(path: Path, seconds_ago: float) -> None:
+    stamp = path.stat().st_mtime - seconds_ago
+    os.utime(path, (stamp, stamp))
+
+
+def test_key_depends_on_watermark() -> None:
+    first = PdfDiskCache.make_key(MONTH, datetime(2025, 1, 31, tzinfo=timezone.utc))
+    second = PdfDiskCache.make_key(MONTH, datetime(2025, 2, 1, tzinfo=timezone.utc))
+
+    assert first != second
+    assert PdfDiskCache.make_key(MONTH, None) == PdfDiskCache.make_key(MONTH, None)
+
+
+def test_get_returns_stored_bytes(tmp_path: Path) -> None:
+    cache = PdfDiskCache(tmp_path, 1024)
+    key = cache.make_key(MONTH, None)
+
+    assert cache.get(key) is None
+    cache.put(key, b"%PDF-1.4")
+
+    assert cache.get(key) == b"%PDF-1.4"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicted_file_is_a_miss(tmp_path: Path) -> None:
+    cache = PdfDiskCache(tmp_path, 1024)
+    key = cache.make_key(MONTH, None)
+    path = cache.put(key, b"%PDF-1.4")
+    assert path is not None
+    path.unlink()
+
+    assert cache.get(key) is None
+    assert cache.misses == 1
+
+
+def test_eviction_removes_least_recently_used(tmp_path: Path) -> None:
+    cache = PdfDiskCache(tmp_path, 25)
+    keys = [cache.make_key(date(2025, month, 1), None) for month in (1, 2, 3)]
+    first = cache.put(keys[0], b"a" * 10)
+    second = cache.put(keys[1], b"b" * 10)
+    assert first is not None and second is not None
+    _age(first, 20)
+    _age(second, 30)
+    # Чтение обновляет время доступа: первый файл становится самым свежим
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[2], b"c" * 10)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == b"a" * 10
+    assert cache.get(keys[2]) == b"c" * 10
+
+
+def test_eviction_keeps_just_written_file(tmp_path: Path) -> None:
+    cache = PdfDiskCache(tmp_path, 5)
+    key = cache.make_key(MONTH, None)
+    cache.put(key, b"x" * 10)
+
+    assert cache.get(key) == b"x" * 10
+
+
+def test_disabled_cache_stores_nothing(tmp_path: Path) -> None:
+    cache = PdfDiskCache(tmp_path / "pdf", 0)
+    key = cache.make_key(MONTH, None)
+
+    assert cache.put(key, b"%PDF") is None
+    assert cache.get(key) is None
+    assert not (tmp_path / "pdf").exists()
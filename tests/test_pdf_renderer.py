@@ -0,0 +1,65 @@
+"""Пул рендеринга PDF (app/pdf_renderer.py) на настоящих процессах spawn."""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Iterator
+
+import pytest
+
+from app import pdf_renderer
+from app.config import get_settings
+from app.pdf_renderer import PdfRenderCrashedError, PdfRenderTimeoutError, _RenderPool
+
+
+def _sleep_and_return(seconds: float, payload: bytes) -> bytes:
+    time.sleep(seconds)
+    return payload
+
+
+def _crash() -> bytes:
+    os._exit(1)
+
+
+@pytest.fixture
+def render_pool(monkeypatch: pytest.MonkeyPatch) -> Iterator[_RenderPool]:
+    settings = get_settings()
+    monkeypatch.setattr(settings, "pdf_render_timeout_sec", 1.0)
+    monkeypatch.setattr(settings, "pdf_queue_timeout_sec", 30.0)
+    render_pool = _RenderPool(2)
+    # Процессы spawn стартуют с инициализацией движка PDF — дожидаемся обоих
+    render_pool.pool.map(time.sleep, [0.2, 0.2])
+    yield render_pool
+    render_pool.pool.terminate()
+    render_pool.pool.join()
+
+
+def test_stuck_render_stops_only_its_worker(render_pool: _RenderPool) -> None:
+    healthy = render_pool.pool.apply_async(_sleep_and_return, (1.5, b"ok"))
+
+    with pytest.raises(PdfRenderTimeoutError):
+        pdf_renderer._render_in_pool(render_pool, 0, _sleep_and_return, (30, b""))
+
+    assert healthy.get(5) == b"ok"
+    # Пул заменил остановленный процесс и принимает новые задачи
+    assert pdf_renderer._render_in_pool(render_pool, 0, _sleep_and_return, (0, b"again")) == b"again"
+
+
+def test_timeout_starts_when_worker_takes_task(render_pool: _RenderPool) -> None:
+    busy = [render_pool.pool.apply_async(time.sleep, (0.8,)) for _ in range(2)]
+
+    # Задача ждёт свободный процесс ~0.8 с и рендерится 0.5 с: дольше таймаута
+    # от отправки, но в пределах таймаута от начала рендера
+    assert pdf_renderer._render_in_pool(render_pool, 0, _sleep_and_return, (0.5, b"late")) == b"late"
+    for result in busy:
+        result.get(5)
+
+
+def test_crashed_worker_is_reported_without_inline_render(render_pool: _RenderPool) -> None:
+    started = time.monotonic()
+    with pytest.raises(PdfRenderCrashedError):
+        pdf_renderer._render_in_pool(render_pool, 0, _crash, ())
+
+    assert time.monotonic() - started < 1
+    assert pdf_renderer._render_in_pool(render_pool, 1, _sleep_and_return, (0, b"ok")) == b"ok"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+import time
+
+import pytest
+
+from app.singleflight import SingleFlight, singleflight
+
+
+def _run_concurrently(
+    executor: ThreadPoolExecutor, group: SingleFlight, func, callers: int, started: Event
+) -> list:
+    leader = executor.submit(group.do, "key", func)
+    assert started.wait(5)
+    followers = [executor.submit(group.do, "key", func) for _ in range(callers - 1)]
+    # Последователи должны встать в ожидание, пока ведущий выполняется
+    deadline = time.monotonic() + 5
+    while group.coalesced < callers - 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return [leader, *followers]
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    group = SingleFlight("test")
+    started, release = Event(), Event()
+    calls = []
+
+    def load() -> list[int]:
+        calls.append(1)
+        started.set()
+        assert release.wait(5)
+        return [1, 2, 3]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = _run_concurrently(executor, group, load, 4, started)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert group.stats() == {"executed_total": 1, "coalesced_total": 3, "in_flight": 0}
+
+
+def test_error_is_raised_for_every_waiter() -> None:
+    group = SingleFlight("test")
+    started, release = Event(), Event()
+
+    def fail() -> None:
+        started.set()
+        assert release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = _run_concurrently(executor, group, fail, 3, started)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="boom"):
+                future.result(5)
+    assert group.stats()["in_flight"] == 0
+
+
+def test_sequential_calls_execute_again() -> None:
+    group = SingleFlight("test")
+    calls = []
+
+    def load() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert group.do("key", load) == 1
+    assert group.do("key", load) == 2
+    assert group.coalesced == 0
+
+
+def test_decorator_key_selects_coalesced_arguments() -> None:
+    calls = []
+
+    @singleflight(key=lambda month, *_args: month, label="test_decorator_key")
+    def render(month: str, payload: list[int]) -> str:
+        calls.append(payload)
+        return month
+
+    assert render("2025-01", [1]) == "2025-01"
+    assert render.singleflight.name == "test_decorator_key"
+    assert calls == [[1]]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, timezone
+from decimal import Decimal
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from app.snapshot import SnapshotDataSource, SnapshotWriter, read_snapshot_info
+from synthetic import SYNTHETIC_LAST_UPDATED, SYNTHETIC_MONTH
+
+
+def test_writer_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.sqlite"
+    with SnapshotWriter(path) as writer:
+        writer.add_table(
+            "sample",
+            [("day", "DATE"), ("amount", "REAL"), ("title", "TEXT")],
+            [(date(2025, 1, 2), Decimal("1.50"), "Лето"), (date(2025, 1, 3), None, None)],
+            ("day",),
+        )
+        written = writer.finish(source="test")
+
+    info = read_snapshot_info(path)
+    assert info.tables == {"sample": 2} == written.tables
+    assert info.source == "test"
+    assert info.exported_at == written.exported_at
+
+    source = SnapshotDataSource(path)
+    with source.session() as session:
+        rows = session.conn.execute('SELECT day, amount, title FROM "sample" ORDER BY day').fetchall()
+        # LOWER подменён: встроенный в SQLite не меняет регистр кириллицы
+        lowered = session.conn.execute("SELECT LOWER('ЛЕТО')").fetchone()[0]
+    assert rows == [("2025-01-02", 1.5, "Лето"), ("2025-01-03", None, None)]
+    assert lowered == "лето"
+    assert 0 <= source.age_sec() < 60
+
+
+def test_aborted_writer_leaves_no_file(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.sqlite"
+    with pytest.raises(RuntimeError):
+        with SnapshotWriter(path) as writer:
+            writer.add_table("sample", [("value", "TEXT")], [("x",)])
+            raise RuntimeError("export failed")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unsupported_format_is_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.sqlite"
+    with SnapshotWriter(path) as writer:
+        writer.finish(source="test")
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE snapshot_meta SET value = '0' WHERE key = 'format_version'")
+
+    with pytest.raises(ValueError):
+        read_snapshot_info(path)
+
+
+def test_synthetic_snapshot_serves_dashboard_data(synthetic_snapshot: Path) -> None:
+    with SnapshotDataSource(synthetic_snapshot).session() as session:
+        watermark = session.last_updated()
+        months = session.available_months(12)
+        data = session.dashboard_data(SYNTHETIC_MONTH, watermark)
+
+    assert watermark == SYNTHETIC_LAST_UPDATED.astimezone(timezone.utc)
+    assert months == [SYNTHETIC_MONTH]
+    assert data.items
+    assert data.daily_revenue